@@ -3,7 +3,7 @@
 
 a = Analysis(
     ['app.py'],
-    pathex=[],
+    pathex=['backend'],
     binaries=[],
     datas=[('out', 'out')],
     hiddenimports=[],
@@ -2,7 +2,7 @@
 from PyInstaller.utils.hooks import collect_submodules
 from PyInstaller.utils.hooks import collect_all
 
-datas = [('backend/model_handler.py', '.'), ('backend/image_processor.py', '.'), ('backend/report_generator.py', '.'), ('backend/file_manager.py', '.'), ('backend/models', 'models'), ('backend/frontend_out', 'frontend_out')]
+datas = [('backend/model_handler.py', '.'), ('backend/image_processor.py', '.'), ('backend/report_generator.py', '.'), ('backend/file_manager.py', '.'), ('backend/admission.py', '.'), ('backend/run_index.py', '.'), ('backend/detection_query.py', '.'), ('backend/zip_stream.py', '.'), ('backend/retention.py', '.'), ('backend/detection_store.py', '.'), ('backend/report_cache.py', '.'), ('backend/pdf_report.py', '.'), ('backend/spc.py', '.'), ('backend/detection_export.py', '.'), ('backend/metrics.py', '.'), ('backend/profiling.py', '.'), ('backend/memory.py', '.'), ('backend/warmup.py', '.'), ('backend/inference_server.py', '.'), ('backend/uploads_catalog.py', '.'), ('backend/static_delivery.py', '.'), ('backend/models', 'models'), ('backend/frontend_out', 'frontend_out')]
 binaries = []
 hiddenimports = []
 hiddenimports += collect_submodules('cv2')
@@ -1,14 +1,18 @@
-import sys, time, threading
+import os, sys, time, threading
+import urllib.error, urllib.request
 from pathlib import Path
 
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
 import uvicorn
 
-import webview  # pywebview
+# static_delivery backend/ altında (paketlenince spec'teki pathex ile bulunur)
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+from static_delivery import CachedStaticFiles
 
 PORT = 8765
+READY_TIMEOUT_SECONDS = 30
+# API sunucusu (backend/main.py) ayrı süreçte çalışır; pencere onun /ready'si 200 olunca açılır
+BACKEND_URL = os.getenv("PDA_BACKEND_URL", "http://127.0.0.1:8000").rstrip("/")
 
 # PyInstaller ile paketlenince çalışma dizinini doğru çöz
 def resource_path(*parts):
@@ -22,22 +26,19 @@ FRONT_DIR = resource_path("out")
 if not FRONT_DIR.exists():
     raise RuntimeError(f"Frontend build bulunamadı: {FRONT_DIR}")
 
-# _next, assets vs. otomatik servis edilsin
-app.mount("/_next", StaticFiles(directory=str(FRONT_DIR / "_next")), name="_next")
-# kökü mount et (index.html dahil)
+# Statik sunucunun ayakta olduğunu gösterir (port dinleniyor); asıl hazırlık backend'in /ready'si.
+# "/" mount'undan önce tanımlanmalı (yoksa statik mount yakalar)
+@app.get("/ready")
+def ready():
+    return {"ready": True}
+
+# kökü mount et: index.html bellekte, _next/static immutable, varsa .br/.gz kopyaları;
+# SPA fallback (yanlış route'larda index'e dön) mount'un içinde
 app.mount("/",
-          StaticFiles(directory=str(FRONT_DIR), html=True),
+          CachedStaticFiles(directory=str(FRONT_DIR), html=True, immutable_dirs=["_next/static"],
+                            precompressed=True, spa_fallback=True),
           name="root")
 
-# SPA fallback (yanlış route'larda index'e dön)
-@app.get("/{full_path:path}")
-def spa_fallback(full_path: str):
-    candidate = FRONT_DIR / full_path
-    if candidate.is_file():
-        return FileResponse(str(candidate))
-    index_html = FRONT_DIR / "index.html"
-    return HTMLResponse(index_html.read_text(encoding="utf-8"))
-
 # --- BACKEND: burada kendi API'lerini ekle ---
 # Eğer halihazırda FastAPI app'in varsa, onu "include_router" ile bağla.
 # örn:
@@ -47,13 +48,35 @@ def spa_fallback(full_path: str):
 def run_server():
     uvicorn.run(app, host="127.0.0.1", port=PORT, log_level="warning")
 
+def wait_until_ready(*urls: str, timeout: float = READY_TIMEOUT_SECONDS, interval: float = 0.05) -> bool:
+    """URL'ler sırayla 200 dönene kadar kısa aralıklarla yoklar (sabit bekleme yerine); süre ortaktır."""
+    deadline = time.monotonic() + timeout
+    return all(_poll(url, deadline, interval) for url in urls)
+
+def _poll(url: str, deadline: float, interval: float) -> bool:
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as r:
+                if r.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(interval)
+    return False
+
 if __name__ == "__main__":
     t = threading.Thread(target=run_server, daemon=True)
     t.start()
 
-    # basit sağlık kontrolü
-    for _ in range(50):
-        time.sleep(0.1)
+    # pywebview import'u sunucu açılırken yapılsın
+    import webview  # pywebview
+
+    started = time.perf_counter()
+    # backend /ready: warm-up (indeks, model, rapor kütüphaneleri) bitene kadar 503 döner
+    if wait_until_ready(f"http://127.0.0.1:{PORT}/ready", f"{BACKEND_URL}/ready"):
+        print(f"Server ready in {time.perf_counter() - started:.2f}s")
+    else:
+        print(f"Server not ready after {READY_TIMEOUT_SECONDS}s, opening window anyway")
 
     webview.create_window(
         "Paint Defect Analyzer",
@@ -50,9 +50,17 @@ interface DetectionResult {
   detection_count: number;
 }
 
+interface ResultsPage {
+  offset: number;
+  limit: number;
+  total: number;
+  next: string | null;
+}
+
 interface AnalysisResponse {
   message: string;
   results: DetectionResult[];
+  results_page?: ResultsPage;
   summary: {
     total_images: number;
     total_detections: number;
@@ -315,9 +323,27 @@ export default function PaintDefectAnalyzer() {
 
       setProcessingProgress(80);
       const data: AnalysisResponse = await response.json();
+
+      // /analyze sadece ilk sayfayı döner; kalan sonuçlar run'dan sayfa sayfa çekilir
+      let allResults = data.results;
+      let next = data.results_page?.next ?? null;
+      const total = data.results_page?.total ?? allResults.length;
+      while (next) {
+        const pageRes = await fetch(`${API_BASE_URL}${next}`);
+        if (!pageRes.ok)
+          throw new Error(`Loading results failed: ${pageRes.status}`);
+        const page: { results: DetectionResult[] } & ResultsPage =
+          await pageRes.json();
+        allResults = allResults.concat(page.results);
+        next = page.next;
+        setProcessingProgress(
+          80 + Math.round((20 * allResults.length) / Math.max(total, 1))
+        );
+      }
+
       setProcessingProgress(100);
-      setResults(data.results);
-      setAnalysisResponse(data);
+      setResults(allResults);
+      setAnalysisResponse({ ...data, results: allResults });
 
       setTimeout(() => {
         setIsProcessing(false);
@@ -338,16 +364,15 @@ export default function PaintDefectAnalyzer() {
   const [isUploadsOpen, setIsUploadsOpen] = useState(false);
 
   const downloadResults = async () => {
-    if (!analysisResponse || results.length === 0) return;
+    const run = analysisResponse?.run;
+    if (!run || results.length === 0) return;
     setIsDownloading(true);
     try {
-      // mevcut paketi rapor + processed için /download-results kullanmaya devam
+      // paket sunucuda run'ın kayıtlı tespitlerinden kurulur (tüm görseller, istemci verisi gönderilmez)
       const formData = new FormData();
-      formData.append(
-        "folder_name",
-        analysisResponse?.run?.group_name || "Analiz_Sonuclari"
-      );
-      formData.append("results_json", JSON.stringify(results));
+      formData.append("folder_name", run.group_name || "Analiz_Sonuclari");
+      formData.append("group_slug", run.group_slug);
+      formData.append("run_id", run.run_id);
       const response = await fetch(`${API_BASE_URL}/download-results`, {
         method: "POST",
         body: formData,
@@ -361,8 +386,7 @@ export default function PaintDefectAnalyzer() {
       }`;
       const link = document.createElement("a");
       link.href = downloadUrl;
-      link.download =
-        (analysisResponse?.run?.group_name || "Analiz_Sonuclari") + ".zip";
+      link.download = (run.group_name || "Analiz_Sonuclari") + ".zip";
       document.body.appendChild(link);
       link.click();
       document.body.removeChild(link);
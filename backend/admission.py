@@ -0,0 +1,134 @@
+# backend/admission.py
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+
+class AdmissionRejected(Exception):
+    """Kuyruk dolu ya da tahmini bekleme çok uzun: istek hemen reddedilir."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float, queue_depth: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        self.queue_depth = queue_depth
+
+
+class AdmissionTicket:
+    """slot() içindeki iş; inferred = modelden geçen görsel sayısı (boşsa süre EMA'ya katılmaz)."""
+
+    def __init__(self):
+        self.inferred: Optional[int] = None
+
+
+class AdmissionController:
+    """
+    /analyze istekleri için eşzamanlılık limiti + sınırlı bekleme kuyruğu.
+    - max_concurrent: aynı anda model üzerinde çalışan analiz sayısı
+    - max_queue: slot bekleyebilecek istek sayısı (fazlası 429)
+    - max_wait_seconds: tahmini bekleme (sıradakiler + bu işin kendisi) bunu aşarsa 503 (0 = sınırsız)
+    Bekleme tahmini, görsel başına süre üzerinden (EMA) hesaplanır; EMA yalnızca
+    hatasız biten ve çıkarım yapılan görsel sayısını bildiren (AdmissionTicket.inferred)
+    işlerden beslenir: anında dönen 404/500'ler ve modelsiz /refilter tahmini aşağı çekmez.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 1,
+        max_queue: int = 4,
+        max_wait_seconds: float = 0.0,
+        initial_seconds_per_image: float = 0.5,
+    ):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait_seconds = float(max_wait_seconds)
+        self.seconds_per_image = float(initial_seconds_per_image)
+        self._sem: Optional[asyncio.Semaphore] = None
+
+        self.active = 0
+        self.queued = 0
+        self._active_cost = 0
+        self._queued_cost = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Event loop içinde ilk kullanımda oluştur
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrent)
+        return self._sem
+
+    def estimate_wait(self, extra_cost: int = 0) -> float:
+        """Yeni gelen bir işin slot alana kadar bekleyeceği tahmini süre (sn)."""
+        if self.active < self.max_concurrent and self.queued == 0:
+            return 0.0
+        pending = self._active_cost + self._queued_cost + int(extra_cost)
+        return pending * self.seconds_per_image / self.max_concurrent
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "queued_images": self._queued_cost,
+            "seconds_per_image": round(self.seconds_per_image, 3),
+            "estimated_wait_seconds": round(self.estimate_wait(), 1),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def _check_admission(self, cost: int):
+        # Bekleme tahmini bu işin kendi görsellerini de içerir: büyük bir batch hem
+        # max_wait_seconds'a daha erken takılır hem de daha uzun Retry-After alır
+        busy = self.active >= self.max_concurrent
+        wait = self.estimate_wait(cost)
+        if busy and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(
+                429, "Analysis queue is full", wait, self.queued
+            )
+        if busy and self.max_wait_seconds > 0 and wait > self.max_wait_seconds:
+            self.rejected += 1
+            raise AdmissionRejected(
+                503, "Estimated wait exceeds limit", wait - self.max_wait_seconds, self.queued
+            )
+
+    @asynccontextmanager
+    async def slot(self, cost: int = 1):
+        """
+        async with admission.slot(cost=len(file_list)) as ticket:
+            ... analiz ...
+            ticket.inferred = işlenen görsel sayısı
+        Limit aşılırsa AdmissionRejected fırlatır (beklemeden).
+        """
+        cost = max(1, int(cost))
+        self._check_admission(cost)
+
+        sem = self._semaphore()
+        self.queued += 1
+        self._queued_cost += cost
+        try:
+            await sem.acquire()
+        finally:
+            self.queued -= 1
+            self._queued_cost -= cost
+
+        self.active += 1
+        self._active_cost += cost
+        ticket = AdmissionTicket()
+        t0 = time.perf_counter()
+        try:
+            yield ticket
+            if ticket.inferred:
+                # görsel başı süre için üstel hareketli ortalama (yalnızca hatasız biten analizler)
+                elapsed = time.perf_counter() - t0
+                self.seconds_per_image = 0.7 * self.seconds_per_image + 0.3 * (elapsed / ticket.inferred)
+        finally:
+            self.active -= 1
+            self._active_cost -= cost
+            self.completed += 1
+            sem.release()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the analysis pipeline.
+
+Generates synthetic paint panels (several resolutions / defect densities) in a
+throw-away runtime folder and times every stage with a tiny randomly initialized
+YOLO model (yolov8n architecture from the bundled yaml, no download):
+
+    python benchmark.py                       # full grid -> benchmark_<stamp>.json
+    python benchmark.py --quick --out a.json  # small grid (CI / smoke)
+    python benchmark.py --compare a.json      # print ratios against a previous result
+    python benchmark.py --model models/best.pt --only predict,convert
+
+Results are machine readable (JSON: environment + one record per case with
+mean/median/p95/min/max seconds) so releases and settings can be compared.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+SUITES = ("convert", "predict", "draw", "reports", "history", "zip")
+
+
+# ---------------- Sentetik veri ----------------
+
+def synthetic_panel(width: int, height: int, n_defects: int, seed: int = 0) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """
+    Boyalı panel benzeri görsel (gradyan + gren + kusur lekeleri) ve lekelerin
+    tespit listesi (bbox bu görselin pikselleri).
+    """
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    base = np.linspace(150, 200, width, dtype=np.float32)[None, :, None]
+    tint = np.array([1.0, 0.92, 0.85], dtype=np.float32)[None, None, :]
+    img = np.broadcast_to(base * tint, (height, width, 3)).copy()
+    img += rng.normal(0, 4, size=(height, width, 1)).astype(np.float32)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+
+    dets = []
+    for i in range(n_defects):
+        r = int(rng.integers(3, max(4, min(width, height) // 60)))
+        cx, cy = int(rng.integers(r, width - r)), int(rng.integers(r, height - r))
+        cls = i % 3
+        color = (40, 40, 40) if cls == 0 else (235, 235, 235) if cls == 1 else (90, 70, 60)
+        cv2.circle(img, (cx, cy), r, color, -1)
+        dets.append({
+            "class_id": cls,
+            "class_name": {0: "Krater", 1: "Tanecik", 2: "Pinhol"}[cls],
+            "confidence": float(rng.uniform(0.5, 1.0)),
+            "bbox": [cx - r, cy - r, cx + r, cy + r],
+        })
+    return img, dets
+
+
+def scale_dets(dets: List[Dict[str, Any]], sx: float, sy: float) -> List[Dict[str, Any]]:
+    return [
+        {**d, "bbox": [int(d["bbox"][0] * sx), int(d["bbox"][1] * sy), int(d["bbox"][2] * sx), int(d["bbox"][3] * sy)]}
+        for d in dets
+    ]
+
+
+def write_image(path: Path, img: np.ndarray) -> Path:
+    import cv2
+
+    ok, buf = cv2.imencode(path.suffix, img)
+    if not ok:
+        raise RuntimeError(f"encode failed: {path}")
+    path.write_bytes(buf.tobytes())
+    return path
+
+
+# ---------------- Ölçüm ----------------
+
+class Bench:
+    def __init__(self, repeat: int, warmup: int):
+        self.repeat = max(1, repeat)
+        self.warmup = max(0, warmup)
+        self.results: List[Dict[str, Any]] = []
+        self.loop = asyncio.new_event_loop()
+
+    def _call(self, fn: Callable[[], Any]) -> Any:
+        out = fn()
+        if asyncio.iscoroutine(out):
+            out = self.loop.run_until_complete(out)
+        return out
+
+    def run(self, suite: str, name: str, params: Dict[str, Any], fn: Callable[[], Any],
+            repeat: Optional[int] = None, extra: Optional[Callable[[Any, float], Dict[str, Any]]] = None):
+        for _ in range(self.warmup):
+            self._call(fn)
+        times, out = [], None
+        for _ in range(repeat or self.repeat):
+            t0 = time.perf_counter()
+            out = self._call(fn)
+            times.append(time.perf_counter() - t0)
+        times.sort()
+        rec = {
+            "suite": suite,
+            "name": name,
+            "params": params,
+            "n": len(times),
+            "mean_s": statistics.fmean(times),
+            "median_s": statistics.median(times),
+            "p95_s": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+            "min_s": times[0],
+            "max_s": times[-1],
+            "stdev_s": statistics.stdev(times) if len(times) > 1 else 0.0,
+        }
+        if extra:
+            rec.update(extra(out, rec["median_s"]))
+        self.results.append(rec)
+        p = " ".join(f"{k}={v}" for k, v in params.items())
+        print(f"  {name:<28} {p:<40} median {rec['median_s'] * 1000:9.2f} ms  p95 {rec['p95_s'] * 1000:9.2f} ms")
+        return out
+
+
+def environment(model_desc: str) -> Dict[str, Any]:
+    versions = {}
+    for mod in ("numpy", "pandas", "cv2", "PIL", "openpyxl", "reportlab", "pypdf", "torch", "ultralytics", "fastapi"):
+        try:
+            versions[mod] = getattr(__import__(mod), "__version__", "?")
+        except ImportError:
+            versions[mod] = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "model": model_desc,
+        "versions": versions,
+    }
+
+
+# ---------------- Süitler ----------------
+
+def load_model(handler, model_path: Optional[str]) -> str:
+    if model_path:
+        if not asyncio.run(handler.load_model(model_path)):
+            raise SystemExit(f"Model load failed: {model_path}")
+        return Path(model_path).name
+    from ultralytics import YOLO
+
+    # yaml'dan kurulan model rastgele ağırlıklıdır; ağ erişimi gerekmez
+    handler.model = YOLO("yolov8n.yaml")
+    try:
+        handler.model.to(handler._device_arg())
+    except Exception:
+        pass
+    handler.current_model = "yolov8n.yaml (random init)"
+    return handler.current_model
+
+
+def run_suites(args, base: Path, bench: Bench) -> str:
+    # Uygulama modülleri çalışma klasörünü import sırasında LOCALAPPDATA'dan okur
+    os.environ["LOCALAPPDATA"] = str(base)
+    sys.path.insert(0, str(BACKEND_DIR))
+    from file_manager import FileManager, UPLOADS_DIR, RESULTS_DIR, TEMP_DIR
+    from image_processor import ImageProcessor
+    from report_generator import ReportGenerator
+    from pdf_report import PdfRenderer
+    from run_index import RunIndex
+    from detection_store import detections_to_array, save_run_detections
+    from zip_stream import iter_zip
+
+    fm, ip = FileManager(), ImageProcessor()
+    model_desc = "-"
+    only = set(args.only.split(",")) if args.only else set(SUITES)
+    resolutions = [tuple(int(v) for v in r.split("x")) for r in args.resolutions.split(",")]
+    densities = [int(v) for v in args.densities.split(",")]
+
+    # Girdi panelleri (TIFF: sahadaki kamera çıktısı gibi)
+    panels = {}
+    for w, h in resolutions:
+        img, dets = synthetic_panel(w, h, max(densities), seed=w)
+        panels[(w, h)] = (write_image(UPLOADS_DIR / f"panel_{w}x{h}.tif", img), dets)
+
+    converted = {}
+    if only & {"convert", "predict", "draw", "reports", "zip"}:
+        print("convert_to_jpg_resized")
+        for (w, h), (src, _) in panels.items():
+            params = {"resolution": f"{w}x{h}", "long_side": args.long_side}
+            res = bench.run("convert", "convert_to_jpg_resized", params, lambda src=src: fm.convert_to_jpg_resized(
+                str(src), dst_dir=str(TEMP_DIR), long_side=args.long_side, quality=95))
+            if not res.get("success"):
+                raise SystemExit(f"convert failed: {res}")
+            converted[(w, h)] = Path(res["path"])
+        if "convert" not in only:
+            bench.results = [r for r in bench.results if r["suite"] != "convert"]
+
+    if "predict" in only:
+        from model_handler import YOLOModelHandler
+
+        handler = YOLOModelHandler(input_size=args.imgsz)
+        t0 = time.perf_counter()
+        model_desc = load_model(handler, args.model)
+        print(f"predict ({model_desc}, load {time.perf_counter() - t0:.2f}s)")
+        for (w, h), path in converted.items():
+            bench.run("predict", "predict", {"resolution": f"{w}x{h}", "imgsz": args.imgsz},
+                      lambda path=path: handler.predict(str(path), confidence_threshold=0.25, max_det=300),
+                      extra=lambda out, _: {"detections": len(out)})
+
+    # çizim / rapor / zip: orta çözünürlükteki dönüştürülmüş panel
+    (mw, mh) = resolutions[len(resolutions) // 2]
+    mid_src, mid_dets = converted.get((mw, mh)), panels[(mw, mh)][1]
+    if mid_src is not None:
+        import cv2
+        ph, pw = cv2.imread(str(mid_src)).shape[:2]
+        mid_dets = scale_dets(mid_dets, pw / mw, ph / mh)
+
+    run_dir = RESULTS_DIR / "bench" / "run_0000"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    if "draw" in only or "reports" in only or "zip" in only:
+        print("draw_detections")
+        mid_arr = detections_to_array([{"detections": mid_dets}])
+        for n in densities:
+            out = run_dir / f"processed_d{n}.jpg"
+            bench.run("draw", "draw_detections", {"detections": n},
+                          lambda n=n, out=out: ip.draw_detections(str(mid_src), mid_arr[:n], str(out)))
+        if "draw" not in only:
+            bench.results = [r for r in bench.results if r["suite"] != "draw"]
+
+    if "reports" in only:
+        rg = ReportGenerator(results_dir=RESULTS_DIR, pdf_renderer=PdfRenderer(max_workers=args.pdf_workers or None))
+        print("ReportGenerator")
+        report_root = base / "reports"
+        try:
+            for n_images in [int(v) for v in args.report_images.split(",")]:
+                for n in densities:
+                    results = [
+                        {
+                            "id": f"result_{i}",
+                            "filename": f"panel_{i:05d}.jpg",
+                            "original_path": str(panels[(mw, mh)][0]),
+                            "processed_path": f"results/bench/run_0000/processed_d{n}.jpg",
+                            "detections": mid_dets[:n],
+                            "detection_count": n,
+                        }
+                        for i in range(n_images)
+                    ]
+                    for fmt in ("excel", "json", "pdf"):
+                        if fmt == "pdf" and n_images > args.pdf_max_images:
+                            continue
+                        out_dir = report_root / f"{fmt}_{n_images}_{n}"
+                        bench.run("reports", f"report.{fmt}", {"images": n_images, "detections_per_image": n},
+                                  lambda fmt=fmt, out_dir=out_dir, results=results: rg.generate_reports(
+                                      results_data=results, report_dir=str(out_dir), formats=(fmt,)),
+                                  repeat=min(bench.repeat, args.report_repeat))
+        finally:
+            rg.pdf_renderer.shutdown()
+
+    if "history" in only:
+        print("list_history")
+        idx = RunIndex(base / "index.sqlite3", RESULTS_DIR)
+        dets = mid_dets[: densities[len(densities) // 2]]
+        for g in range(args.history_groups):
+            for r in range(args.history_runs):
+                rd = RESULTS_DIR / f"group-{g:03d}" / f"2025010{1 + r % 9}_{r:06d}"
+                rd.mkdir(parents=True, exist_ok=True)
+                results = [
+                    {"filename": f"p{i}.jpg", "processed_path": f"results/{rd.parent.name}/{rd.name}/processed_p{i}.jpg",
+                     "detections": dets, "detection_count": len(dets)}
+                    for i in range(args.history_images)
+                ]
+                meta = {
+                    "group_name": rd.parent.name, "group_slug": rd.parent.name, "run_id": rd.name,
+                    "created_at": datetime.now().isoformat(),
+                    "summary": {"total_images": len(results), "total_detections": len(results) * len(dets)},
+                    "items": [{k: v for k, v in x.items() if k != "detections"} for x in results],
+                }
+                (rd / "run.json").write_text(json.dumps(meta), encoding="utf-8")
+                save_run_detections(rd, results)
+                idx.index_run(meta, results)
+        params = {"groups": args.history_groups, "runs_per_group": args.history_runs}
+        bench.run("history", "list_history.index", params, lambda: idx.list_history())
+        bench.run("history", "list_history.index_page", {**params, "limit": 50}, lambda: idx.list_history(limit=50))
+        bench.run("history", "list_history.disk_scan", params, lambda: fm.list_history())
+        bench.run("history", "run_index.rebuild", params, idx.rebuild, repeat=min(bench.repeat, 3))
+
+    if "zip" in only:
+        print("zip")
+        src = next(run_dir.glob("processed_*.jpg"))
+        entries = [(src, f"processed_images/{i:05d}.jpg") for i in range(args.zip_files)]
+
+        def consume():
+            return sum(len(chunk) for chunk in iter_zip(entries))
+
+        bench.run("zip", "iter_zip", {"files": args.zip_files}, consume,
+                  extra=lambda size, t: {"bytes": size, "mb_per_s": round(size / (1024 * 1024) / t, 1) if t else None})
+
+    return model_desc
+
+
+def compare(current: List[Dict[str, Any]], previous_path: str):
+    prev = json.loads(Path(previous_path).read_text(encoding="utf-8"))
+    key = lambda r: (r["name"], json.dumps(r["params"], sort_keys=True))
+    old = {key(r): r for r in prev.get("results", [])}
+    print(f"\nCompared with {previous_path} ({prev.get('meta', {}).get('git_commit')}): median ratio new/old")
+    for r in current:
+        o = old.get(key(r))
+        if o and o["median_s"]:
+            ratio = r["median_s"] / o["median_s"]
+            flag = "  <-- slower" if ratio > 1.1 else "  faster" if ratio < 0.9 else ""
+            print(f"  {r['name']:<28} {json.dumps(r['params']):<50} {ratio:6.2f}x{flag}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", default=None, help="JSON output (default: benchmark_<stamp>.json)")
+    ap.add_argument("--quick", action="store_true", help="small grid, 2 repeats")
+    ap.add_argument("--only", default=None, help=f"comma separated subset of: {','.join(SUITES)}")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--resolutions", default="1024x768,2448x2048,4096x3000")
+    ap.add_argument("--densities", default="0,20,200", help="detections per image")
+    ap.add_argument("--long-side", type=int, default=640, help="convert_to_jpg_resized long side")
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--model", default=None, help=".pt model instead of the random yolov8n")
+    ap.add_argument("--report-images", default="50,500", help="images per report")
+    ap.add_argument("--report-repeat", type=int, default=3)
+    ap.add_argument("--pdf-max-images", type=int, default=100, help="skip PDF cases above this many images")
+    ap.add_argument("--pdf-workers", type=int, default=0)
+    ap.add_argument("--history-groups", type=int, default=10)
+    ap.add_argument("--history-runs", type=int, default=20)
+    ap.add_argument("--history-images", type=int, default=20)
+    ap.add_argument("--zip-files", type=int, default=200)
+    ap.add_argument("--keep", action="store_true", help="keep the temporary runtime folder")
+    ap.add_argument("--compare", default=None, help="previous benchmark JSON to compare against")
+    args = ap.parse_args()
+
+    if args.quick:
+        args.repeat, args.warmup = min(args.repeat, 2), 0
+        args.resolutions, args.densities = "1024x768,2448x2048", "0,50"
+        args.report_images, args.pdf_max_images = "20", 20
+        args.history_groups, args.history_runs, args.history_images = 3, 5, 5
+        args.zip_files = 20
+
+    base = Path(tempfile.mkdtemp(prefix="pda_bench_"))
+    bench = Bench(args.repeat, args.warmup)
+    print(f"runtime folder: {base}")
+    try:
+        model_desc = run_suites(args, base, bench)
+    finally:
+        bench.loop.close()
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+    out = Path(args.out or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    payload = {
+        "meta": {**environment(model_desc), "args": vars(args)},
+        "results": bench.results,
+    }
+    out.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n{len(bench.results)} results -> {out}")
+    if args.compare:
+        compare(bench.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+# backend/detection_export.py
+import csv
+import io
+import itertools
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from detection_store import load_run_detections
+from zip_stream import ZipEntry, iter_zip
+
+EXPORT_FORMATS = ("csv", "ndjson", "coco", "yolo")
+
+CSV_COLUMNS = [
+    "group_slug", "run_id", "image_index", "filename", "det_no", "class_id", "class_name",
+    "confidence", "x1", "y1", "x2", "y2", "width", "height", "area",
+]
+
+# Kırpıntı kenar payı: kutu boyutunun oranı (en az CROP_MIN_PAD piksel)
+CROP_PAD = 0.1
+CROP_MIN_PAD = 4
+
+
+def _image_size(path: Path) -> Optional[Tuple[int, int]]:
+    """Sadece başlığı okuyarak (w, h); dosya yoksa None."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as im:
+            return im.size
+    except (OSError, ValueError):
+        return None
+
+
+class DetectionExporter:
+    """
+    Kayıtlı tespitleri (detections.npz) bir ya da birden çok run için satır satır
+    dışa aktarır: CSV, NDJSON, COCO JSON, YOLO etiketleri (+ opsiyonel kusur
+    kırpıntıları). Bellekte aynı anda tek run'ın tespit dizisi bulunur; çıktı
+    batch_rows satırlık parçalar halinde üretilir.
+    """
+
+    def __init__(self, results_dir: Path, uploads_dir: Path, class_names: Dict[int, str], batch_rows: int = 5000):
+        self.results_dir = Path(results_dir)
+        self.uploads_dir = Path(uploads_dir)
+        self.class_names = class_names
+        self.batch_rows = max(1, int(batch_rows))
+
+    def _name(self, class_id: int) -> str:
+        return self.class_names.get(class_id, f"Class_{class_id}")
+
+    def _iter_images(
+        self,
+        runs: Sequence[Tuple[str, str]],
+        class_ids: Optional[Sequence[int]] = None,
+        min_confidence: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Run sırasıyla görsel başına: run bilgisi + o görselin (filtrelenmiş) tespitleri."""
+        for group_slug, run_id in runs:
+            run_dir = self.results_dir / group_slug / run_id
+            ds = load_run_detections(run_dir)
+            if ds is None:
+                continue
+            for i, dets in enumerate(ds):
+                keep = np.ones(len(dets), dtype=bool)
+                if class_ids is not None:
+                    keep &= np.isin(dets["class_id"], np.asarray(class_ids))
+                if min_confidence is not None:
+                    keep &= dets["confidence"] >= np.float32(min_confidence)
+                yield {
+                    "group_slug": group_slug,
+                    "run_id": run_id,
+                    "run_dir": run_dir,
+                    "index": i,
+                    "filename": ds.filenames[i],
+                    "original_name": ds.original_paths[i],
+                    "processed_name": Path(ds.processed_paths[i]).name,
+                    "dets": dets[keep],
+                    # det_no: filtreden önceki görsel içi sıra (rapor/Excel ile aynı numara)
+                    "det_no": np.flatnonzero(keep) + 1,
+                }
+
+    # ---------------- Tablo formatları ----------------
+
+    def _rows(self, img: Dict[str, Any]) -> Iterator[List[Any]]:
+        dets = img["dets"]
+        boxes = dets["bbox"].tolist()
+        for no, cid, conf, (x1, y1, x2, y2) in zip(
+            img["det_no"].tolist(), dets["class_id"].tolist(), dets["confidence"].tolist(), boxes
+        ):
+            w, h = max(0, x2 - x1), max(0, y2 - y1)
+            yield [
+                img["group_slug"], img["run_id"], img["index"], img["filename"], no, cid, self._name(cid),
+                round(conf, 6), x1, y1, x2, y2, w, h, w * h,
+            ]
+
+    def iter_csv(self, runs: Sequence[Tuple[str, str]], **filters) -> Iterator[bytes]:
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+        pending = 0
+        for img in self._iter_images(runs, **filters):
+            for row in self._rows(img):
+                writer.writerow(row)
+                pending += 1
+            if pending >= self.batch_rows:
+                yield buf.getvalue().encode("utf-8")
+                buf.seek(0)
+                buf.truncate()
+                pending = 0
+        yield buf.getvalue().encode("utf-8")
+
+    def iter_ndjson(self, runs: Sequence[Tuple[str, str]], **filters) -> Iterator[bytes]:
+        lines: List[str] = []
+        for img in self._iter_images(runs, **filters):
+            for row in self._rows(img):
+                rec = dict(zip(CSV_COLUMNS, row))
+                rec["bbox"] = [rec.pop("x1"), rec.pop("y1"), rec.pop("x2"), rec.pop("y2")]
+                lines.append(json.dumps(rec, ensure_ascii=False))
+            if len(lines) >= self.batch_rows:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                lines.clear()
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    def iter_coco(self, runs: Sequence[Tuple[str, str]], **filters) -> Iterator[bytes]:
+        """
+        COCO detection JSON. Görseller akış halinde yazılır; annotation'lar tek
+        geçişte diske taşabilen geçici bir tampona alınıp sonra eklenir.
+        Koordinatlar analiz edilen (yeniden boyutlandırılmış) görselin pikselleridir.
+        """
+        categories = [{"id": cid, "name": name, "supercategory": "defect"} for cid, name in sorted(self.class_names.items())]
+        yield (
+            '{"info":' + json.dumps({"description": "PaintDefectAnalyzer export", "date_created": datetime.now().isoformat()})
+            + ',"licenses":[],"categories":' + json.dumps(categories, ensure_ascii=False) + ',"images":['
+        ).encode("utf-8")
+
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode="w+b") as ann:
+            image_id, ann_id = 0, 0
+            images: List[str] = []
+            img_sep, ann_sep = b"", b""
+            for img in self._iter_images(runs, **filters):
+                image_id += 1
+                size = _image_size(img["run_dir"] / img["processed_name"]) or (None, None)
+                images.append(json.dumps({
+                    "id": image_id,
+                    "file_name": f"{img['group_slug']}/{img['run_id']}/{img['processed_name']}",
+                    "original_name": img["original_name"],
+                    "width": size[0],
+                    "height": size[1],
+                }, ensure_ascii=False))
+                if len(images) >= self.batch_rows:
+                    yield img_sep + ",".join(images).encode("utf-8")
+                    img_sep = b","
+                    images.clear()
+
+                parts = []
+                for row in self._rows(img):
+                    ann_id += 1
+                    x1, y1, w, h = row[8], row[9], row[12], row[13]
+                    parts.append(json.dumps({
+                        "id": ann_id, "image_id": image_id, "category_id": row[5],
+                        "bbox": [x1, y1, w, h], "area": row[14], "iscrowd": 0, "score": row[7],
+                    }))
+                if parts:
+                    ann.write(ann_sep + ",".join(parts).encode("utf-8"))
+                    ann_sep = b","
+            if images:
+                yield img_sep + ",".join(images).encode("utf-8")
+
+            yield b'],"annotations":['
+            ann.seek(0)
+            while True:
+                chunk = ann.read(1 << 20)
+                if not chunk:
+                    break
+                yield chunk
+        yield b"]}"
+
+    # ---------------- YOLO / kırpıntılar ----------------
+
+    def _yolo_labels(self, img: Dict[str, Any]) -> Optional[bytes]:
+        size = _image_size(img["run_dir"] / img["processed_name"])
+        if size is None:
+            return None
+        w, h = size
+        dets = img["dets"]
+        if not len(dets):
+            return b""
+        b = dets["bbox"].astype(np.float64)
+        cx, cy = (b[:, 0] + b[:, 2]) / 2 / w, (b[:, 1] + b[:, 3]) / 2 / h
+        bw, bh = (b[:, 2] - b[:, 0]) / w, (b[:, 3] - b[:, 1]) / h
+        return "".join(
+            f"{c} {x:.6f} {y:.6f} {ww:.6f} {hh:.6f}\n"
+            for c, x, y, ww, hh in zip(dets["class_id"].tolist(), cx.tolist(), cy.tolist(), bw.tolist(), bh.tolist())
+        ).encode("utf-8")
+
+    def yolo_entries(self, runs: Sequence[Tuple[str, str]], **filters) -> Iterator[ZipEntry]:
+        """
+        labels/<group>/<run>/<görsel>.txt (normalize cx cy w h; orijinal yüklemeyle de
+        geçerli, çünkü yeniden boyutlandırma en-boy oranını korur) + classes.txt/data.yaml.
+        """
+        names = [self._name(cid) for cid in range(max(self.class_names, default=-1) + 1)]
+        yield ("\n".join(names) + "\n").encode("utf-8"), "classes.txt"
+        yield (
+            f"nc: {len(names)}\nnames:\n" + "".join(f"  {i}: {json.dumps(n, ensure_ascii=False)}\n" for i, n in enumerate(names))
+        ).encode("utf-8"), "data.yaml"
+        for img in self._iter_images(runs, **filters):
+            labels = self._yolo_labels(img)
+            if labels is not None:
+                yield labels, f"labels/{img['group_slug']}/{img['run_id']}/{Path(img['filename']).stem}.txt"
+
+    def _crop_source(self, img: Dict[str, Any]) -> Tuple[Optional[Path], float, float]:
+        """
+        Kırpıntı kaynağı: varsa orijinal yükleme (kutular yeniden boyutlandırılmış
+        görselden ölçeklenir), yoksa işlenmiş görsel (üzerinde çizimler vardır).
+        """
+        processed = img["run_dir"] / img["processed_name"]
+        original = self.uploads_dir / img["original_name"] if img["original_name"] else None
+        if original is not None and original.is_file():
+            psize, osize = _image_size(processed), _image_size(original)
+            if psize and osize:
+                return original, osize[0] / psize[0], osize[1] / psize[1]
+        return (processed, 1.0, 1.0) if processed.is_file() else (None, 1.0, 1.0)
+
+    def crop_entries(self, runs: Sequence[Tuple[str, str]], quality: int = 90, **filters) -> Iterator[ZipEntry]:
+        """crops/<group>/<run>/<görsel>_<no>_<sınıf>.jpg — görsel başına tek decode."""
+        from PIL import Image
+
+        for img in self._iter_images(runs, **filters):
+            if not len(img["dets"]):
+                continue
+            src, sx, sy = self._crop_source(img)
+            if src is None:
+                continue
+            try:
+                with Image.open(src) as im:
+                    im = im.convert("RGB")
+                    for no, cid, (x1, y1, x2, y2) in zip(
+                        img["det_no"].tolist(), img["dets"]["class_id"].tolist(), img["dets"]["bbox"].tolist()
+                    ):
+                        pad_x = max(CROP_MIN_PAD, (x2 - x1) * CROP_PAD)
+                        pad_y = max(CROP_MIN_PAD, (y2 - y1) * CROP_PAD)
+                        box = (
+                            max(0, int((x1 - pad_x) * sx)), max(0, int((y1 - pad_y) * sy)),
+                            min(im.width, int((x2 + pad_x) * sx)), min(im.height, int((y2 + pad_y) * sy)),
+                        )
+                        if box[2] <= box[0] or box[3] <= box[1]:
+                            continue
+                        buf = io.BytesIO()
+                        im.crop(box).save(buf, format="JPEG", quality=quality)
+                        yield buf.getvalue(), (
+                            f"crops/{img['group_slug']}/{img['run_id']}/"
+                            f"{Path(img['filename']).stem}_{no:03d}_{self._name(cid)}.jpg"
+                        )
+            except OSError:
+                continue
+
+    # ---------------- Giriş noktası ----------------
+
+    def export(
+        self,
+        fmt: str,
+        runs: Sequence[Tuple[str, str]],
+        crops: bool = False,
+        class_ids: Optional[Sequence[int]] = None,
+        min_confidence: Optional[float] = None,
+    ) -> Tuple[Iterator[bytes], str, str]:
+        """
+        (bayt akışı, media_type, dosya adı). YOLO ve crops=True her zaman zip akışıdır;
+        diğerleri tek dosya (crops ile zip içinde detections.<ext> + crops/).
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        filters = {"class_ids": class_ids, "min_confidence": min_confidence}
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        if fmt == "yolo":
+            entries: Iterator[ZipEntry] = self.yolo_entries(runs, **filters)
+        else:
+            producer, ext, media_type = {
+                "csv": (self.iter_csv, "csv", "text/csv; charset=utf-8"),
+                "ndjson": (self.iter_ndjson, "ndjson", "application/x-ndjson"),
+                "coco": (self.iter_coco, "json", "application/json"),
+            }[fmt]
+            if not crops:
+                return producer(runs, **filters), media_type, f"detections_{stamp}.{ext}"
+            entries = iter([(producer(runs, **filters), f"detections.{ext}")])
+
+        if crops:
+            entries = itertools.chain(entries, self.crop_entries(runs, **filters))
+        return iter_zip(entries), "application/zip", f"detections_{fmt}_{stamp}.zip"
+
@@ -0,0 +1,295 @@
+# backend/detection_query.py
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from run_index import RunIndex
+
+
+def _parse_ts(value: Optional[str], end_of_day: bool = False) -> Optional[float]:
+    """ISO tarih/saat → epoch saniye. Sadece tarih verilmişse günün başı/sonu."""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.strip())
+    if end_of_day and len(value.strip()) <= 10:
+        dt = dt.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return dt.timestamp()
+
+
+class DetectionQueryEngine:
+    """
+    Tüm run'lardaki tespitler üzerinde sorgu motoru.
+    - Sütun dizileri (numpy): class_id, confidence, area, x1..y2, image_id, run satırı
+    - Uniform uzamsal grid: kutular sol-üst köşelerinin hücresine göre sıralı (CSR);
+      bölge sorgusu sadece aday hücre aralıklarını tarar.
+    Veri RunIndex'ten okunur; yeni run'lar artımlı eklenir, silme/yeniden kurmada
+    (generation değişimi) dizi baştan yüklenir.
+    """
+
+    COLUMNS = ("id", "class_id", "confidence", "area", "x1", "y1", "x2", "y2", "image_id", "run_pk")
+    FETCH_CHUNK = 200_000
+
+    def __init__(self, run_index: RunIndex, class_names: Dict[int, str], cell_size: int = 64):
+        self.index = run_index
+        self.class_names = dict(class_names)
+        self.cell_size = int(cell_size)
+        self._lock = threading.Lock()
+        self._version = -1
+        self._generation = -1
+        self._cols: Dict[str, np.ndarray] = {}
+        self._runs: Dict[str, np.ndarray] = {}
+        self._run_lut = np.zeros(0, dtype=np.int32)
+        self._grid: Optional[Dict[str, Any]] = None
+
+    # ---------------- Yükleme ----------------
+
+    def _empty_cols(self) -> Dict[str, np.ndarray]:
+        return {
+            "id": np.zeros(0, np.int64),
+            "class_id": np.zeros(0, np.int16),
+            "confidence": np.zeros(0, np.float32),
+            "area": np.zeros(0, np.int64),
+            "x1": np.zeros(0, np.int32), "y1": np.zeros(0, np.int32),
+            "x2": np.zeros(0, np.int32), "y2": np.zeros(0, np.int32),
+            "image_id": np.zeros(0, np.int64),
+            "run_pk": np.zeros(0, np.int64),
+        }
+
+    def _fetch_detections(self, after_id: int) -> Dict[str, np.ndarray]:
+        cur = self.index.reader().cursor()
+        cur.row_factory = None  # düz tuple: numpy'a doğrudan
+        cur.execute(
+            "SELECT d.id, d.class_id, d.confidence, d.area, d.x1, d.y1, d.x2, d.y2, d.image_id, i.run_pk "
+            "FROM detections d JOIN images i ON i.id = d.image_id JOIN runs r ON r.id = i.run_pk "
+            "WHERE d.id > ? AND r.derived_from IS NULL ORDER BY d.id",  # türetilmiş (refilter) run'lar hariç
+            (after_id,),
+        )
+        chunks = []
+        while True:
+            rows = cur.fetchmany(self.FETCH_CHUNK)
+            if not rows:
+                break
+            chunks.append(np.array(rows, dtype=np.float64))
+        cols = self._empty_cols()
+        if not chunks:
+            return cols
+        arr = np.concatenate(chunks)
+        for i, name in enumerate(self.COLUMNS):
+            cols[name] = arr[:, i].astype(cols[name].dtype)
+        return cols
+
+    def _load_runs(self):
+        rows = self.index.reader().execute(
+            "SELECT r.id, r.run_id, r.created_at, g.slug, g.name FROM runs r JOIN groups g ON g.id = r.group_id"
+        ).fetchall()
+        pks = np.array([r["id"] for r in rows], dtype=np.int64)
+        created = []
+        for r in rows:
+            try:
+                created.append(datetime.fromisoformat(r["created_at"]).timestamp())
+            except (TypeError, ValueError):
+                created.append(0.0)
+        self._runs = {
+            "pk": pks,
+            "run_id": np.array([r["run_id"] for r in rows], dtype=object),
+            "group_slug": np.array([r["slug"] for r in rows], dtype=object),
+            "group_name": np.array([r["name"] for r in rows], dtype=object),
+            "created_ts": np.array(created, dtype=np.float64),
+        }
+        # run_pk → yoğun satır indeksi (silinmiş run'lar -1)
+        lut = np.full(int(pks.max()) + 1 if len(pks) else 1, -1, dtype=np.int32)
+        lut[pks] = np.arange(len(pks), dtype=np.int32)
+        self._run_lut = lut
+
+    def _refresh(self):
+        """RunIndex değiştiyse bellek içi dizileri günceller (kilit altında çağrılır)."""
+        version, generation = self.index.counters()
+        if version == self._version and self._cols:
+            return
+        if generation != self._generation or not self._cols:
+            self._cols = self._fetch_detections(after_id=0)
+        else:
+            last_id = int(self._cols["id"][-1]) if len(self._cols["id"]) else 0
+            new = self._fetch_detections(after_id=last_id)
+            if len(new["id"]):
+                self._cols = {k: np.concatenate([self._cols[k], new[k]]) for k in self._cols}
+        self._load_runs()
+        self._grid = None
+        self._version, self._generation = version, generation
+
+    def _build_grid(self) -> Dict[str, Any]:
+        x1, y1 = self._cols["x1"], self._cols["y1"]
+        cs = self.cell_size
+        ncols = int(max(x1.max(initial=0), 0) // cs) + 1
+        nrows = int(max(y1.max(initial=0), 0) // cs) + 1
+        cell = (np.clip(y1, 0, None) // cs).astype(np.int64) * ncols + (np.clip(x1, 0, None) // cs)
+        order = np.argsort(cell, kind="stable")
+        starts = np.searchsorted(cell[order], np.arange(ncols * nrows + 1))
+        w = self._cols["x2"] - x1
+        h = self._cols["y2"] - y1
+        return {
+            "ncols": ncols, "nrows": nrows, "order": order, "starts": starts,
+            "max_w": int(w.max(initial=0)), "max_h": int(h.max(initial=0)),
+        }
+
+    def _region_candidates(self, region: Tuple[int, int, int, int]) -> np.ndarray:
+        if self._grid is None:
+            self._grid = self._build_grid()
+        g = self._grid
+        cs = self.cell_size
+        rx1, ry1, rx2, ry2 = region
+        # sol-üst köşe hücresine göre indekslendiği için bölgeyi max kutu boyu kadar geri genişlet
+        cx0 = max(0, (rx1 - g["max_w"]) // cs)
+        cy0 = max(0, (ry1 - g["max_h"]) // cs)
+        cx1 = min(g["ncols"] - 1, rx2 // cs)
+        cy1 = min(g["nrows"] - 1, ry2 // cs)
+        if cx1 < cx0 or cy1 < cy0:
+            return np.zeros(0, dtype=np.int64)
+        parts = [
+            g["order"][g["starts"][row * g["ncols"] + cx0]: g["starts"][row * g["ncols"] + cx1 + 1]]
+            for row in range(cy0, cy1 + 1)
+        ]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    # ---------------- Sorgu ----------------
+
+    def query(self, **filters) -> Dict[str, Any]:
+        """Filtreler için _query'ye bakın; tazeleme + sorgu tek kilit altında."""
+        with self._lock:
+            self._refresh()
+            return self._query(**filters)
+
+    def _query(
+        self,
+        class_names: Optional[Sequence[str]] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None,
+        min_area: Optional[int] = None,
+        max_area: Optional[int] = None,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        region_mode: str = "intersects",
+        groups: Optional[Sequence[str]] = None,
+        run_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sort: str = "confidence",
+        descending: bool = True,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        cols, runs = self._cols, self._runs
+
+        if region is not None and len(cols["id"]):
+            idx = self._region_candidates(region)
+        else:
+            idx = None
+
+        def col(name: str) -> np.ndarray:
+            return cols[name] if idx is None else cols[name][idx]
+
+        n = len(cols["id"]) if idx is None else len(idx)
+        mask = np.ones(n, dtype=bool)
+
+        if class_names:
+            name_to_id = {v.lower(): k for k, v in self.class_names.items()}
+            unknown = [c for c in class_names if c.lower() not in name_to_id]
+            if unknown:
+                raise ValueError(f"Unknown class_name: {', '.join(unknown)}")
+            mask &= np.isin(col("class_id"), [name_to_id[c.lower()] for c in class_names])
+        if min_confidence is not None:
+            mask &= col("confidence") >= min_confidence
+        if max_confidence is not None:
+            mask &= col("confidence") <= max_confidence
+        if min_area is not None:
+            mask &= col("area") >= min_area
+        if max_area is not None:
+            mask &= col("area") <= max_area
+
+        if region is not None:
+            rx1, ry1, rx2, ry2 = region
+            if region_mode == "within":
+                mask &= (col("x1") >= rx1) & (col("y1") >= ry1) & (col("x2") <= rx2) & (col("y2") <= ry2)
+            else:
+                mask &= (col("x1") <= rx2) & (col("x2") >= rx1) & (col("y1") <= ry2) & (col("y2") >= ry1)
+
+        ts_from = _parse_ts(date_from)
+        ts_to = _parse_ts(date_to, end_of_day=True)
+        if groups or run_id or ts_from is not None or ts_to is not None:
+            run_mask = np.ones(len(runs["pk"]), dtype=bool)
+            if groups:
+                run_mask &= np.isin(runs["group_slug"], list(groups))
+            if run_id:
+                run_mask &= runs["run_id"] == run_id
+            if ts_from is not None:
+                run_mask &= runs["created_ts"] >= ts_from
+            if ts_to is not None:
+                run_mask &= runs["created_ts"] <= ts_to
+            rows = self._run_lut[col("run_pk")]
+            mask &= (rows >= 0) & run_mask[np.clip(rows, 0, None)]
+
+        hits = np.flatnonzero(mask) if idx is None else idx[mask]
+        total = int(len(hits))
+
+        class_counts = {}
+        if total:
+            ids, counts = np.unique(cols["class_id"][hits], return_counts=True)
+            class_counts = {self.class_names.get(int(i), f"Class_{int(i)}"): int(c) for i, c in zip(ids, counts)}
+
+        if sort == "created_at":
+            key = runs["created_ts"][self._run_lut[cols["run_pk"][hits]]]
+        else:
+            key = cols["area" if sort == "area" else "confidence"][hits]
+        key = -key if descending else key
+        k = offset + limit
+        if k < total:
+            # sadece ilk k eleman sıralanır (top-k), geri kalanı argpartition ile elenir
+            top = np.argpartition(key, k - 1)[:k]
+            order = top[np.argsort(key[top], kind="stable")]
+        else:
+            order = np.argsort(key, kind="stable")
+        page = hits[order[offset: offset + limit]]
+
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "class_counts": class_counts,
+            "items": self._materialize(page),
+        }
+
+    def _materialize(self, page: np.ndarray) -> List[Dict[str, Any]]:
+        """Sadece dönen sayfa için görsel/run bilgilerini çözer."""
+        if not len(page):
+            return []
+        cols, runs = self._cols, self._runs
+        image_ids = sorted({int(i) for i in cols["image_id"][page]})
+        marks = ",".join("?" * len(image_ids))
+        images = {
+            r["id"]: r
+            for r in self.index.reader().execute(
+                f"SELECT id, filename, processed_name FROM images WHERE id IN ({marks})", image_ids
+            ).fetchall()
+        }
+
+        items = []
+        for i in page:
+            row = self._run_lut[cols["run_pk"][i]]
+            img = images.get(int(cols["image_id"][i]))
+            slug, rid = runs["group_slug"][row], runs["run_id"][row]
+            cid = int(cols["class_id"][i])
+            items.append({
+                "group_slug": slug,
+                "group_name": runs["group_name"][row],
+                "run_id": rid,
+                "created_at": datetime.fromtimestamp(runs["created_ts"][row]).isoformat(),
+                "filename": img["filename"] if img else None,
+                "processed_path": f"results/{slug}/{rid}/{img['processed_name']}" if img else None,
+                "class_id": cid,
+                "class_name": self.class_names.get(cid, f"Class_{cid}"),
+                "confidence": round(float(cols["confidence"][i]), 4),
+                "bbox": [int(cols["x1"][i]), int(cols["y1"][i]), int(cols["x2"][i]), int(cols["y2"][i])],
+                "area": int(cols["area"][i]),
+            })
+        return items
@@ -0,0 +1,440 @@
+# backend/detection_store.py
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DETECTIONS_FILE = "detections.npz"
+# Ham (taban eşikteki) tespitler aynı npz'de: raw_detections + raw_floor [confidence, min_box_area]
+RAW_PREFIX = "raw_"
+
+# Tespit başına 26 bayt: görsel indeksi, sınıf, güven, xyxy kutu
+DETECTION_DTYPE = np.dtype([
+    ("image", "<u4"),
+    ("class_id", "<u2"),
+    ("confidence", "<f4"),
+    ("bbox", "<i4", (4,)),
+])
+
+
+def detections_to_array(results: List[Dict[str, Any]], class_ids: Optional[Dict[str, int]] = None) -> np.ndarray:
+    """
+    results[i]["detections"] dict listelerini (istemci JSON'u) tek bir yapılandırılmış
+    diziye çevirir. bbox yerine box/xyxy de kabul edilir; class_id yoksa class_ids
+    (ad -> id) ile class_name'den bulunur.
+    """
+    total = sum(len(r.get("detections") or []) for r in results)
+    arr = np.zeros(total, dtype=DETECTION_DTYPE)
+    k = 0
+    for i, r in enumerate(results):
+        for d in r.get("detections") or []:
+            cid = d.get("class_id")
+            if cid is None:
+                cid = (class_ids or {}).get(d.get("class_name"), 0)
+            bbox = d.get("bbox") or d.get("box") or d.get("xyxy")
+            arr[k] = (i, int(cid), float(d.get("confidence", 0.0)),
+                      [int(v) for v in bbox] if bbox and len(bbox) == 4 else (0, 0, 0, 0))
+            k += 1
+    return arr
+
+
+def detection_dicts(dets: np.ndarray, class_names: Dict[int, str], geometry: bool = False) -> List[Dict[str, Any]]:
+    """
+    DETECTION_DTYPE -> JSON dict listesi (sadece HTTP / JSON rapor sınırında).
+    geometry: size (w, h) ve center (cx, cy) de eklenir.
+    """
+    out = []
+    boxes = dets["bbox"].tolist()
+    for cid, conf, (x1, y1, x2, y2) in zip(dets["class_id"].tolist(), dets["confidence"].tolist(), boxes):
+        d = {
+            "class_id": cid,
+            "class_name": class_names.get(cid, f"Class_{cid}"),
+            "confidence": round(conf, 6),
+            "bbox": [x1, y1, x2, y2],
+        }
+        if geometry:
+            w, h = max(0, x2 - x1), max(0, y2 - y1)
+            d["size"] = [w, h]
+            d["center"] = [int(x1 + w / 2), int(y1 + h / 2)]
+        out.append(d)
+    return out
+
+
+def detection_mask(dets: np.ndarray, min_confidence: float = 0.0, min_box_area: int = 0) -> np.ndarray:
+    """
+    Eşik filtresi (bool maske). Model ile aynı kurallar: güven > eşik (float32'de
+    karşılaştırılır), kutu alanı >= min_box_area. Ham tespitlere uygulanınca sonuç
+    o eşikle yapılan tahminle aynıdır (NMS yüksek güvenli kutuyu tutar).
+    """
+    keep = dets["confidence"] > np.float32(min_confidence)
+    if min_box_area > 0:
+        b = dets["bbox"].astype(np.int64)
+        keep &= (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]) >= int(min_box_area)
+    return keep
+
+
+def threshold_sweep(
+    dets: np.ndarray,
+    thresholds: List[float],
+    n_classes: int,
+    n_images: int,
+    min_box_area: int = 0,
+) -> Dict[str, np.ndarray]:
+    """
+    Eşik ızgarası boyunca sınıf başına tespit sayıları (güven > eşik), tek sıralama +
+    searchsorted ile: anahtar = 2*sınıf + güven, her (sınıf, eşik) sorgusu tek aramadır.
+    Ayrıca eşik başına tespitli görsel sayısı (görsel başına en yüksek güven).
+    """
+    if min_box_area > 0:
+        dets = dets[detection_mask(dets, -1.0, min_box_area)]
+    t = np.asarray(thresholds, dtype=np.float32).astype(np.float64)
+    cls = dets["class_id"].astype(np.int64)
+    conf = dets["confidence"].astype(np.float64)
+
+    key = np.sort(cls * 2 + conf)
+    base = np.arange(n_classes, dtype=np.float64)[:, None] * 2
+    ends = np.searchsorted(key, base + 1.5)
+    above = np.searchsorted(key, base + t[None, :], side="right")
+    class_counts = ends - above
+
+    best = np.full(n_images, -1.0)
+    np.maximum.at(best, dets["image"].astype(np.int64), conf)
+    best.sort()
+    images_with = n_images - np.searchsorted(best, t, side="right")
+    return {"class_counts": class_counts, "images_with_detections": images_with}
+
+
+class DetectionSet:
+    """
+    Bir run'ın (ya da istemciden gelen sonuç listesinin) tespitleri, tek kompakt yapı:
+      dets:    DETECTION_DTYPE dizisi, görsel sırasına göre (tespit başına 26 bayt)
+      offsets: görsel başına başlangıçlar; görsel i'nin tespitleri dets[offsets[i]:offsets[i+1]]
+      + görsel tablosu (filename, original_path, processed_path)
+    Backend içinde (tahmin, çizim, rapor, indeks, dışa aktarım) bu taşınır;
+    dict'lere sadece HTTP/JSON sınırında to_results() ile dönülür.
+    """
+
+    __slots__ = ("dets", "offsets", "filenames", "original_paths", "processed_paths")
+
+    def __init__(
+        self,
+        dets: np.ndarray,
+        offsets: np.ndarray,
+        filenames: List[str],
+        original_paths: Optional[List[str]] = None,
+        processed_paths: Optional[List[str]] = None,
+    ):
+        n = len(filenames)
+        self.dets = dets
+        self.offsets = offsets
+        self.filenames = filenames
+        self.original_paths = original_paths if original_paths is not None else [""] * n
+        self.processed_paths = processed_paths if processed_paths is not None else [""] * n
+
+    @classmethod
+    def from_array(cls, dets: np.ndarray, filenames: List[str], **paths) -> "DetectionSet":
+        """image alanı dolu (sırasız olabilir) diziden; ofsetler tek sıralama + searchsorted."""
+        if len(dets) and np.any(np.diff(dets["image"].astype(np.int64)) < 0):
+            dets = dets[np.argsort(dets["image"], kind="stable")]
+        offsets = np.searchsorted(dets["image"], np.arange(len(filenames) + 1)).astype(np.int64)
+        return cls(dets, offsets, filenames, **paths)
+
+    @classmethod
+    def from_results(cls, results: List[Dict[str, Any]], class_ids: Optional[Dict[str, int]] = None) -> "DetectionSet":
+        """/analyze 'results' formatındaki dict listesinden (istemci JSON'u)."""
+        return cls.from_array(
+            detections_to_array(results, class_ids),
+            [r.get("filename") or r.get("name") or r.get("file") or "" for r in results],
+            original_paths=[r.get("original_path") or "" for r in results],
+            processed_paths=[r.get("processed_path") or "" for r in results],
+        )
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    @property
+    def n_detections(self) -> int:
+        return int(len(self.dets))
+
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def image(self, i: int) -> np.ndarray:
+        return self.dets[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for i in range(len(self)):
+            yield self.image(i)
+
+    def filter(self, min_confidence: float = 0.0, min_box_area: int = 0) -> "DetectionSet":
+        """Daha sıkı eşikle yeni küme (görsel tablosu aynı; ofsetler maskenin kümülatifinden)."""
+        keep = detection_mask(self.dets, min_confidence, min_box_area)
+        kept_before = np.concatenate(([0], np.cumsum(keep, dtype=np.int64)))
+        return DetectionSet(
+            self.dets[keep], kept_before[self.offsets], self.filenames,
+            original_paths=self.original_paths, processed_paths=self.processed_paths,
+        )
+
+    def to_results(
+        self,
+        class_names: Dict[int, str],
+        offset: int = 0,
+        limit: Optional[int] = None,
+        geometry: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """/analyze 'results' formatı (JSON); offset/limit ile sadece o sayfa kurulur."""
+        stop = len(self) if limit is None else min(len(self), offset + limit)
+        results = []
+        for i in range(offset, stop):
+            chunk = self.image(i)
+            results.append({
+                "id": f"result_{i}",
+                "filename": self.filenames[i],
+                "original_path": self.original_paths[i],
+                "processed_path": self.processed_paths[i],
+                "detections": detection_dicts(chunk, class_names, geometry=geometry),
+                "detection_count": int(len(chunk)),
+            })
+        return results
+
+
+def save_run_detections(run_dir: Path, results: Union[DetectionSet, List[Dict[str, Any]]]) -> Path:
+    """
+    run_dir/detections.npz: 'detections' (DETECTION_DTYPE) + görsel tablosu
+    (filename, original_name, processed_name). Yollar grup/run adına bağlı
+    olmadığından rename sonrası da geçerlidir.
+    """
+    ds = results if isinstance(results, DetectionSet) else DetectionSet.from_results(results)
+    out = Path(run_dir) / DETECTIONS_FILE
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            detections=ds.dets,
+            filenames=np.array(ds.filenames, dtype=str),
+            original_names=np.array([Path(p).name for p in ds.original_paths], dtype=str),
+            processed_names=np.array([Path(p).name for p in ds.processed_paths], dtype=str),
+        )
+    tmp.replace(out)
+    return out
+
+
+class RunSpool:
+    """
+    /analyze sırasında görsel başına sonuçları run klasörüne ekler (tespitler ham
+    DETECTION_DTYPE kayıtları, görsel satırları NDJSON); bellekte sadece sayaçlar
+    kalır. finish() detections.npz'yi spool'dan yazar; iter_results() / items()
+    indeks ve run.json için sonuçları tek tek geri okur. close() spool'u siler.
+    raw_floor verilirse (confidence, min_box_area) add()'e taban eşikteki ham tespitler de
+    verilir; yeniden eşikleme için npz'ye raw_detections olarak yazılırlar.
+    """
+
+    DETECTIONS = "detections.spool"
+    RAW = "raw.spool"
+    IMAGES = "images.spool.ndjson"
+    FILES = (DETECTIONS, IMAGES, RAW)
+
+    # bu süreçte açık spool'ların run klasörleri (sweep_spools bunlara dokunmaz)
+    _open: Set[Path] = set()
+
+    def __init__(self, run_dir: Path, raw_floor: Optional[Tuple[float, int]] = None):
+        self.run_dir = Path(run_dir)
+        RunSpool._open.add(self.run_dir)
+        self._map: Optional[np.memmap] = None
+        self._det = open(self.run_dir / self.DETECTIONS, "wb")
+        self._img = open(self.run_dir / self.IMAGES, "w", encoding="utf-8")
+        self.raw_floor = raw_floor
+        self._raw = open(self.run_dir / self.RAW, "wb") if raw_floor is not None else None
+        self.n_images = 0
+        self.n_detections = 0
+        self.n_raw = 0
+
+    def add(self, dets: np.ndarray, item: Dict[str, Any], raw: Optional[np.ndarray] = None) -> int:
+        """Bir görselin tespitlerini (DETECTION_DTYPE) ve satırını ekler; görsel indeksini döner."""
+        idx = self.n_images
+        dets = np.array(dets, dtype=DETECTION_DTYPE)
+        dets["image"] = idx
+        self._det.write(dets.tobytes())
+        if self._raw is not None:
+            raw = np.array(dets if raw is None else raw, dtype=DETECTION_DTYPE)
+            raw["image"] = idx
+            self._raw.write(raw.tobytes())
+            self.n_raw += len(raw)
+        self._img.write(json.dumps({**item, "detection_count": int(len(dets))}, ensure_ascii=False) + "\n")
+        self.n_images += 1
+        self.n_detections += len(dets)
+        return idx
+
+    def _flush(self):
+        self._det.flush()
+        self._img.flush()
+        if self._raw is not None:
+            self._raw.flush()
+
+    def detections(self) -> np.ndarray:
+        """Tüm tespitler, spool dosyası üzerinden memmap (bellekte kopya yok; close() bırakır)."""
+        self._flush()
+        if not self.n_detections:
+            return np.zeros(0, dtype=DETECTION_DTYPE)
+        if self._map is None or len(self._map) != self.n_detections:
+            self._map = np.memmap(self.run_dir / self.DETECTIONS, dtype=DETECTION_DTYPE, mode="r", shape=(self.n_detections,))
+        return self._map
+
+    def items(self) -> Iterator[Dict[str, Any]]:
+        self._flush()
+        with open(self.run_dir / self.IMAGES, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def iter_results(self) -> Iterator[Dict[str, Any]]:
+        """Görsel satırları + tespitleri (DETECTION_DTYPE dilimi; index_run girdisi), sırayla ve tek tek."""
+        dets = self.detections()
+        k = 0
+        for item in self.items():
+            n = item["detection_count"]
+            yield {**item, "detections": dets[k:k + n]}
+            k += n
+
+    def finish(self) -> Path:
+        """detections.npz'yi yazar (tespitler memmap'ten parça parça; görsel tablosu NDJSON'dan)."""
+        names = {"filenames": [], "original_names": [], "processed_names": []}
+        for item in self.items():
+            names["filenames"].append(item.get("filename", ""))
+            names["original_names"].append(Path(item.get("original_path") or "").name)
+            names["processed_names"].append(Path(item.get("processed_path") or "").name)
+
+        arrays = {k: np.array(v, dtype=str) for k, v in names.items()}
+        # Ham kümede fazladan tespit yoksa (taban = run eşiği) tekrar yazılmaz
+        if self._raw is not None and self.n_raw > self.n_detections:
+            self._raw.flush()
+            arrays[RAW_PREFIX + "detections"] = np.memmap(
+                self.run_dir / self.RAW, dtype=DETECTION_DTYPE, mode="r", shape=(self.n_raw,)
+            )
+            arrays[RAW_PREFIX + "floor"] = np.array(self.raw_floor, dtype=np.float64)
+
+        out = self.run_dir / DETECTIONS_FILE
+        tmp = out.with_name(out.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, detections=self.detections(), **arrays)
+        del arrays  # raw memmap'i bırak
+        tmp.replace(out)
+        return out
+
+    def close(self):
+        for f in (self._det, self._img, self._raw):
+            if f is not None:
+                f.close()
+        # Windows'ta açık memmap dosyayı kilitler: silmeden önce referansı bırak
+        self._map = None
+        for name in self.FILES:
+            try:
+                (self.run_dir / name).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Spool not removed, swept on next start: {self.run_dir / name} ({e})")
+        RunSpool._open.discard(self.run_dir)
+
+
+def sweep_spools(results_dir: Path, min_age_seconds: float = 600) -> int:
+    """
+    Yarım kalmış / silinememiş spool dosyalarını (çökme, kilitli memmap) results/<grup>/<run>/
+    altından siler; bu süreçte açık ya da min_age_seconds'tan yeni olanlara dokunmaz. Silinen sayıyı döner.
+    """
+    removed = 0
+    now = time.time()
+    for name in RunSpool.FILES:
+        for p in Path(results_dir).glob(f"*/*/{name}"):
+            if p.parent in RunSpool._open:
+                continue
+            try:
+                if now - p.stat().st_mtime < min_age_seconds:
+                    continue
+                p.unlink()
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Stale spool not removed: {p} ({e})")
+    return removed
+
+
+def load_run_arrays(run_dir: Path, raw: bool = False) -> Optional[Dict[str, np.ndarray]]:
+    """npz içeriği; ham (raw_*) diziler sadece raw=True ise okunur."""
+    p = Path(run_dir) / DETECTIONS_FILE
+    if not p.exists():
+        return None
+    with np.load(p, allow_pickle=False) as z:
+        return {k: z[k] for k in z.files if raw or not k.startswith(RAW_PREFIX)}
+
+
+def run_image_count(run_dir: Path) -> Optional[int]:
+    """Kayıtlı run'daki görsel sayısı (sadece görsel tablosu okunur)."""
+    p = Path(run_dir) / DETECTIONS_FILE
+    if not p.exists():
+        return None
+    with np.load(p, allow_pickle=False) as z:
+        return int(len(z["filenames"]))
+
+
+def load_run_detections(run_dir: Path, uploads_dir: Optional[Path] = None) -> Optional[DetectionSet]:
+    """
+    Kayıtlı tespitler (detections.npz) -> DetectionSet. processed_path'ler
+    'results/<group>/<run>/...' biçiminde, original_path'ler uploads_dir altında.
+    Kayıt yoksa None.
+    """
+    run_dir = Path(run_dir)
+    arrays = load_run_arrays(run_dir)
+    if arrays is None:
+        return None
+    return _run_detection_set(run_dir, arrays, arrays["detections"], uploads_dir)
+
+
+def _run_detection_set(
+    run_dir: Path, arrays: Dict[str, np.ndarray], dets: np.ndarray, uploads_dir: Optional[Path]
+) -> DetectionSet:
+    group_slug, run_id = run_dir.parent.name, run_dir.name
+    originals = arrays["original_names"].tolist()
+    return DetectionSet.from_array(
+        dets,
+        arrays["filenames"].tolist(),
+        original_paths=[str(uploads_dir / o) if uploads_dir and o else o for o in originals],
+        processed_paths=[f"results/{group_slug}/{run_id}/{p}" for p in arrays["processed_names"].tolist()],
+    )
+
+
+def load_raw_detections(
+    run_dir: Path, uploads_dir: Optional[Path] = None
+) -> Optional[Tuple[DetectionSet, Optional[Tuple[float, int]]]]:
+    """
+    Yeniden eşikleme girdisi: (ham DetectionSet, (taban güven, taban min_box_area)).
+    Ham küme saklanmamışsa (eski run'lar / taban = run eşiği) run'ın kendi tespitleri
+    ve None döner; taban o zaman run.json params'tır. Kayıt yoksa None.
+    """
+    run_dir = Path(run_dir)
+    arrays = load_run_arrays(run_dir, raw=True)
+    if arrays is None:
+        return None
+    floor = None
+    dets = arrays["detections"]
+    if RAW_PREFIX + "detections" in arrays:
+        dets = arrays[RAW_PREFIX + "detections"]
+        conf, area = arrays[RAW_PREFIX + "floor"].tolist()
+        floor = (float(conf), int(area))
+    return _run_detection_set(run_dir, arrays, dets, uploads_dir), floor
+
+
+def load_run_results(
+    run_dir: Path,
+    class_names: Dict[int, str],
+    uploads_dir: Optional[Path] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Kayıtlı tespitlerden /analyze 'results' formatını (JSON) yeniden kurar. Kayıt yoksa None.
+    offset/limit: sadece o sayfadaki görseller için dict kurulur.
+    """
+    ds = load_run_detections(run_dir, uploads_dir)
+    return None if ds is None else ds.to_results(class_names, offset, limit)
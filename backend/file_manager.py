@@ -1,14 +1,21 @@
 # backend/file_manager.py
 import os
 import json
+import time
+import uuid
+import asyncio
 import shutil
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Set, Tuple, Union
 
 import cv2
 import numpy as np
 
+from metrics import stage
+from zip_stream import iter_zip, manifest_expired, manifest_path_for, read_manifest_info, write_manifest
+
 
 # ---- Ortak klasörler (kullanıcıya yazılabilir) ----
 BASE_DIR       = Path(os.getenv("LOCALAPPDATA", Path.home())) / "PaintDefectAnalyzer"
@@ -20,6 +27,9 @@ TEMP_DIR       = BASE_DIR / "temp"
 for d in [UPLOADS_DIR, RESULTS_DIR, DOWNLOADS_DIR, TEMP_DIR]:
     d.mkdir(parents=True, exist_ok=True)
 
+# Manifest'li paketin indirilebilir kaldığı süre; bu süre boyunca kaynakları retention'dan korunur
+MANIFEST_TTL_SECONDS = float(os.getenv("PDA_DOWNLOAD_TTL_HOURS", "24")) * 3600
+
 
 class FileManager:
     def __init__(self):
@@ -29,6 +39,10 @@ class FileManager:
         self.results_dir   = RESULTS_DIR
         self.downloads_dir = DOWNLOADS_DIR
         self.temp_dir      = TEMP_DIR
+        self.manifest_ttl  = MANIFEST_TTL_SECONDS
+        # şu an akıtılan paketler (zip adı → akış sayısı); süresi dolsa da akış bitene kadar korunur
+        self._streaming: Dict[str, int] = {}
+        self._stream_lock = threading.Lock()
 
     # ---------------- Upload / Convert ----------------
 
@@ -49,30 +63,32 @@ class FileManager:
         dst_dir: Optional[str] = None,
         long_side: int = 640,
         quality: int = 95,
+        timings: Optional[Dict[str, float]] = None,
     ) -> Dict[str, Any]:
         """
         TIFF/PNG vs. dosyayı okumaya çalışır, uzun kenarı long_side olacak şekilde
-        yeniden boyutlandırır ve JPG olarak kaydeder.
+        yeniden boyutlandırır ve JPG olarak kaydeder. timings verilirse aşama
+        süreleri (convert.read/decode/resize/encode/write) eklenir.
+        İş bir thread'de yapılır: /analyze birden çok görseli paralel decode edebilir.
         """
+        return await asyncio.to_thread(
+            self._convert_to_jpg_resized, src_path, dst_dir, long_side, quality, timings
+        )
+
+    def _convert_to_jpg_resized(
+        self,
+        src_path: str,
+        dst_dir: Optional[str],
+        long_side: int,
+        quality: int,
+        timings: Optional[Dict[str, float]],
+    ) -> Dict[str, Any]:
         try:
             src_path = str(src_path)
 
-            with open(src_path, "rb") as f:
-                file_bytes = f.read()
-
-            img = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), cv2.IMREAD_COLOR)
-            if img is None:
-                return {"success": False, "error": "decode failed"}
-
-            h, w = img.shape[:2]
-            if w >= h:
-                new_w = int(long_side)
-                new_h = int(h * (long_side / max(w, 1)))
-            else:
-                new_h = int(long_side)
-                new_w = int(w * (long_side / max(h, 1)))
-
-            img_resized = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_AREA)
+            out = self._resize_encode(src_path, long_side, quality, timings)
+            if not out["success"]:
+                return out
 
             dst_dir_p = Path(dst_dir) if dst_dir else self.temp_dir
             dst_dir_p.mkdir(exist_ok=True, parents=True)
@@ -80,11 +96,112 @@ class FileManager:
             stem = Path(src_path).stem
             out_path = dst_dir_p / f"{stem}.jpg"
 
-            cv2.imwrite(str(out_path), img_resized, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+            # imencode + open: Unicode yol güvenli (imwrite Windows'ta değil)
+            with stage(timings, "convert.write"):
+                with open(out_path, "wb") as f:
+                    f.write(out["jpg"].tobytes())
             return {"success": True, "path": str(out_path)}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def _resize_encode(
+        self,
+        source: Union[str, bytes],
+        long_side: int,
+        quality: int,
+        timings: Optional[Dict[str, float]],
+        keep_path: Optional[Path] = None,
+    ) -> Dict[str, Any]:
+        """
+        Dosya yolu ya da ham baytlar -> uzun kenarı long_side olan JPG (bellekte).
+        keep_path: tam çözünürlüklü görsel de JPG (q95) olarak buraya yazılır (ikinci decode yok).
+        """
+        if isinstance(source, str):
+            with stage(timings, "convert.read"):
+                with open(source, "rb") as f:
+                    file_bytes = f.read()
+        else:
+            file_bytes = source
+        del source
+        with stage(timings, "convert.decode"):
+            img = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), cv2.IMREAD_COLOR)
+        del file_bytes  # tepe bellek: ham dosya ile tam çözünürlüklü görsel aynı anda tutulmasın
+        if img is None:
+            return {"success": False, "error": "decode failed"}
+
+        kept = {}
+        if keep_path is not None:
+            with stage(timings, "convert.keep"):
+                ok, full = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+                if ok:
+                    with open(keep_path, "wb") as f:
+                        f.write(full.tobytes())
+                    kept["kept_path"] = str(keep_path)
+                del full
+
+        h, w = img.shape[:2]
+        if w >= h:
+            new_w = int(long_side)
+            new_h = int(h * (long_side / max(w, 1)))
+        else:
+            new_h = int(long_side)
+            new_w = int(w * (long_side / max(h, 1)))
+
+        with stage(timings, "convert.resize"):
+            img_resized = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_AREA)
+        del img
+
+        with stage(timings, "convert.encode"):
+            ok, buf = cv2.imencode(".jpg", img_resized, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+        if not ok:
+            return {"success": False, "error": "encode failed"}
+        return {"success": True, "jpg": buf, **kept}
+
+    async def frame_from_bytes(
+        self,
+        content: bytes,
+        long_side: int = 640,
+        quality: int = 95,
+        timings: Optional[Dict[str, float]] = None,
+        keep_path: Optional[Path] = None,
+    ) -> Dict[str, Any]:
+        """
+        Diske yazmadan convert_to_jpg_resized ile aynı kare: istek gövdesindeki
+        görsel bellekte yeniden boyutlandırılıp JPG'ye çevrilir ve geri decode
+        edilir (model, diskteki akışla aynı JPG karesini görür). Dönüş: {"image": BGR}.
+        keep_path verilirse orijinal aynı decode'dan tam çözünürlüklü JPG (q95) olarak
+        oraya da yazılır; başarılıysa dönüşte "kept_path" bulunur.
+        """
+        return await asyncio.to_thread(self._frame, content, long_side, quality, timings, keep_path)
+
+    async def frame_from_file(
+        self,
+        src_path: str,
+        long_side: int = 640,
+        quality: int = 95,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """frame_from_bytes'ın dosya karşılığı: temp/'e yazmadan analizdeki kare (yeniden çizim için)."""
+        return await asyncio.to_thread(self._frame, str(src_path), long_side, quality, timings)
+
+    def _frame(
+        self,
+        source: Union[str, bytes],
+        long_side: int,
+        quality: int,
+        timings: Optional[Dict[str, float]],
+        keep_path: Optional[Path] = None,
+    ) -> Dict[str, Any]:
+        try:
+            out = self._resize_encode(source, long_side, quality, timings, keep_path)
+            if not out["success"]:
+                return out
+            with stage(timings, "convert.frame"):
+                image = cv2.imdecode(out.pop("jpg"), cv2.IMREAD_COLOR)
+            return {**out, "image": image}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
     # ---------------- History / Details ----------------
 
     async def list_history(self, query: Optional[str] = None) -> Dict[str, Any]:
@@ -158,8 +275,29 @@ class FileManager:
             "created_at": meta.get("created_at"),
             "images": images,
             "summary": meta.get("summary", {"total_images": len(images), "total_detections": 0}),
+            "pinned": bool(meta.get("pinned", False)),
         }
 
+    async def set_pinned(self, group_slug: str, run_id: str, pinned: bool) -> bool:
+        """Pinned run'lar retention (disk kotası) tarafından silinmez; bayrak run.json'da tutulur."""
+        run_dir = self.results_dir / group_slug / run_id
+        if not run_dir.exists():
+            return False
+
+        meta_file = run_dir / "run.json"
+        meta: Dict[str, Any] = {}
+        if meta_file.exists():
+            try:
+                meta = json.loads(meta_file.read_text(encoding="utf-8"))
+            except Exception:
+                meta = {}
+        meta["pinned"] = bool(pinned)
+        # tmp + replace: yarım yazılmış run.json (pinned bayrağı kaybolur) retention'a görünmesin
+        tmp = meta_file.with_name(meta_file.name + ".tmp")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(meta_file)
+        return True
+
     async def delete_run(self, group_slug: str, run_id: str) -> bool:
         run_dir = self.results_dir / group_slug / run_id
         if not run_dir.exists():
@@ -176,27 +314,30 @@ class FileManager:
 
         return True
 
-    async def zip_run(self, group_slug: str, run_id: str) -> Dict[str, Any]:
+    def run_zip_entries(self, group_slug: str, run_id: str, prefix: str = "") -> Optional[List[Tuple[Path, str]]]:
+        """Bir run'ın zip içeriği: (kaynak dosya, arşiv adı). Run yoksa None."""
         run_dir = self.results_dir / group_slug / run_id
-        if not run_dir.exists():
-            return {"success": False, "error": "run not found"}
-
-        package_name = f"{group_slug}__{run_id}"
-        pkg_dir = self.downloads_dir / package_name
-        if pkg_dir.exists():
-            shutil.rmtree(pkg_dir, ignore_errors=True)
-
-        (pkg_dir / "processed_images").mkdir(parents=True, exist_ok=True)
-
-        copied = 0
-        for p in run_dir.glob("processed_*.jpg"):
-            shutil.copy2(p, pkg_dir / "processed_images" / p.name)
-            copied += 1
+        if not run_dir.is_dir():
+            return None
+        return [
+            (p, f"{prefix}processed_images/{p.name}")
+            for p in sorted(run_dir.glob("processed_*.jpg"))
+        ]
+
+    def runs_zip_entries(self, runs: List[Tuple[str, str]]) -> List[Tuple[Path, str]]:
+        """Birden çok run: her biri <group>__<run_id>/ altında."""
+        entries: List[Tuple[Path, str]] = []
+        for group_slug, run_id in runs:
+            entries.extend(self.run_zip_entries(group_slug, run_id, prefix=f"{group_slug}__{run_id}/") or [])
+        return entries
 
-        zip_path = self.downloads_dir / f"{package_name}.zip"
-        await self._create_zip_file(pkg_dir, zip_path)
+    async def zip_run(self, group_slug: str, run_id: str) -> Dict[str, Any]:
+        """Zip dosyası üretmez; akış (streaming) indirme adresini döner."""
+        entries = self.run_zip_entries(group_slug, run_id)
+        if entries is None:
+            return {"success": False, "error": "run not found"}
 
-        return {"success": True, "files": copied, "download_url": f"/download/{package_name}.zip"}
+        return {"success": True, "files": len(entries), "download_url": f"/history/{group_slug}/{run_id}/zip"}
 
     async def rename_group(self, old_slug: str, new_slug: str, new_name_display: Optional[str] = None) -> bool:
         src = self.results_dir / old_slug
@@ -248,15 +389,11 @@ class FileManager:
     ) -> Dict[str, Any]:
         """
         processed_paths: "results/<group>/<run_id>/processed_*.jpg" gibi relative yollar.
-        Bunları gerçek dosya yoluna çevirip kopyalar.
+        Dosyalar kopyalanmaz: gerçek yollar bir manifest'e yazılır ve
+        /download/<package_name>.zip isteğinde doğrudan kaynaktan zip'lenerek akıtılır.
         """
         try:
-            base = self.downloads_dir / package_name
-            if base.exists():
-                shutil.rmtree(base, ignore_errors=True)
-            (base / "processed_images").mkdir(parents=True, exist_ok=True)
-            (base / "reports").mkdir(parents=True, exist_ok=True)
-
+            entries: List[Tuple[Path, str]] = []
             copied = 0
             for rel in processed_paths:
                 rel_path = Path(rel)
@@ -271,7 +408,7 @@ class FileManager:
                         abs_src = self.base_dir / rel_path  # emniyetli fallback
 
                 if abs_src.exists():
-                    shutil.copy2(abs_src, base / "processed_images" / abs_src.name)
+                    entries.append((abs_src, f"processed_images/{abs_src.name}"))
                     copied += 1
 
             if report_files:
@@ -280,16 +417,62 @@ class FileManager:
                     if not fp.is_absolute():
                         fp = self.base_dir / fp
                     if fp.exists():
-                        shutil.copy2(fp, base / "reports" / fp.name)
+                        entries.append((fp, f"reports/{fp.name}"))
 
-            zip_path = self.downloads_dir / f"{package_name}.zip"
-            await self._create_zip_file(base, zip_path)
-
-            return {"success": True, "download_url": f"/download/{package_name}.zip", "files": copied}
+            return self.create_zip_manifest(f"{package_name}.zip", entries, files=copied)
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    async def _create_zip_file(self, folder: Path, zip_path: Path):
-        if zip_path.exists():
-            zip_path.unlink()
-        shutil.make_archive(str(zip_path.with_suffix("")), "zip", root_dir=str(folder))
+    def create_zip_manifest(self, zip_name: str, entries: List[Tuple[Path, str]], **extra) -> Dict[str, Any]:
+        """
+        downloads/<ad>_<zaman>_<uuid>.zip.manifest.json yazar; indirme /download/<o ad> üzerinden
+        akıtılır, kullanıcıya zip_name ile iner. Benzersiz ad: aynı isimli eşzamanlı istekler
+        birbirinin manifest'ini ezmesin.
+        """
+        stem = Path(zip_name).stem
+        stored = f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.zip"
+        write_manifest(self.downloads_dir / stored, entries, download_name=zip_name, ttl_seconds=self.manifest_ttl)
+        return {"success": True, "download_url": f"/download/{stored}", **extra}
+
+    def open_package(self, zip_name: str) -> Optional[Dict[str, Any]]:
+        """Manifest bilgisi; yoksa None. Süresi dolmuşsa "expired": True."""
+        zip_path = self.downloads_dir / Path(zip_name).name
+        if not manifest_path_for(zip_path).exists():
+            return None
+        info = read_manifest_info(zip_path)
+        info["expired"] = manifest_expired(info)
+        return info
+
+    def stream_package(self, zip_name: str, entries: Iterable[Tuple[Path, str]]) -> Iterator[bytes]:
+        """iter_zip; akış sürdükçe kaynaklar pinned_paths()'te kalır (yarıda kesilse de bırakılır)."""
+        with self._stream_lock:
+            self._streaming[zip_name] = self._streaming.get(zip_name, 0) + 1
+        try:
+            yield from iter_zip(entries)
+        finally:
+            with self._stream_lock:
+                left = self._streaming.get(zip_name, 1) - 1
+                if left > 0:
+                    self._streaming[zip_name] = left
+                else:
+                    self._streaming.pop(zip_name, None)
+
+    def pinned_paths(self) -> Set[Path]:
+        """
+        Retention'ın silmemesi gereken yollar: süresi dolmamış ya da şu an akıtılan
+        manifest'ler ve referans verdikleri kaynak dosyalar (rapor cache'i, işlenmiş görseller).
+        """
+        with self._stream_lock:
+            streaming = set(self._streaming)
+        now = time.time()
+        pinned: Set[Path] = set()
+        for mp in self.downloads_dir.glob("*.zip.manifest.json"):
+            zip_name = mp.name[: -len(".manifest.json")]
+            try:
+                info = read_manifest_info(self.downloads_dir / zip_name)
+            except (OSError, ValueError):
+                continue
+            if zip_name in streaming or not manifest_expired(info, now):
+                pinned.add(mp)
+                pinned.update(Path(src) for src, _ in info["entries"])
+        return pinned
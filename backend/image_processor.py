@@ -1,9 +1,11 @@
 import cv2
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import asyncio
 from pathlib import Path
 
+from metrics import stage
+
 class ImageProcessor:
     def __init__(self):
         # Define colors for each defect class (BGR format for OpenCV)
@@ -18,77 +20,103 @@ class ImageProcessor:
     async def draw_detections(
         self, 
         image_path: str, 
-        detections: List[Dict[str, Any]], 
-        output_path: str
+        detections: np.ndarray,
+        output_path: str,
+        timings: Optional[Dict[str, float]] = None,
     ) -> str:
         """Draw bounding boxes and labels on image with proper encoding handling"""
         try:
             # Read file as binary and decode with cv2.imdecode to avoid Unicode path issues
-            with open(image_path, 'rb') as f:
-                file_bytes = np.frombuffer(f.read(), np.uint8)
+            with stage(timings, "draw.read"):
+                with open(image_path, 'rb') as f:
+                    file_bytes = np.frombuffer(f.read(), np.uint8)
+            with stage(timings, "draw.decode"):
                 image = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
             
             if image is None:
                 raise ValueError(f"Could not load image: {image_path}")
+
+            return self._annotate_and_save(image, detections, output_path, timings)
+        except Exception as e:
+            print(f"Error processing image: {str(e)}")
+            raise
+
+    async def draw_detections_image(
+        self,
+        image: np.ndarray,
+        detections: np.ndarray,
+        output_path: str,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> str:
+        """draw_detections ile aynı, ama bellekteki kareden (dosya okumadan)."""
+        return self._annotate_and_save(image, detections, output_path, timings)
+
+    def _annotate_and_save(
+        self,
+        image: np.ndarray,
+        detections: np.ndarray,
+        output_path: str,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> str:
+        try:
+            with stage(timings, "draw.annotate"):
+                # Create a copy for drawing
+                annotated_image = image.copy()
             
-            # Create a copy for drawing
-            annotated_image = image.copy()
-            
-            # Draw each detection
-            for detection in detections:
-                class_id = detection["class_id"]
-                class_name = detection["class_name"]
-                confidence = detection["confidence"]
-                bbox = detection["bbox"]
-                
-                x1, y1, x2, y2 = bbox
-                color = self.class_colors.get(class_id, (128, 128, 128))
+                # Draw each detection (DETECTION_DTYPE dizisi)
+                for class_id, confidence, (x1, y1, x2, y2) in zip(
+                    detections["class_id"].tolist(), detections["confidence"].tolist(), detections["bbox"].tolist()
+                ):
+                    class_name = self.class_names.get(class_id, f"Class_{class_id}")
+                    color = self.class_colors.get(class_id, (128, 128, 128))
                 
-                # Draw bounding box
-                cv2.rectangle(annotated_image, (x1, y1), (x2, y2), color, 2)
+                    # Draw bounding box
+                    cv2.rectangle(annotated_image, (x1, y1), (x2, y2), color, 2)
                 
-                # Prepare label text
-                label = f"{class_name}: {confidence:.2f}"
+                    # Prepare label text
+                    label = f"{class_name}: {confidence:.2f}"
                 
-                # Get text size for background rectangle
-                (text_width, text_height), baseline = cv2.getTextSize(
-                    label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2
-                )
+                    # Get text size for background rectangle
+                    (text_width, text_height), baseline = cv2.getTextSize(
+                        label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2
+                    )
                 
-                # Draw label background
-                cv2.rectangle(
-                    annotated_image,
-                    (x1, y1 - text_height - baseline - 5),
-                    (x1 + text_width, y1),
-                    color,
-                    -1
-                )
+                    # Draw label background
+                    cv2.rectangle(
+                        annotated_image,
+                        (x1, y1 - text_height - baseline - 5),
+                        (x1 + text_width, y1),
+                        color,
+                        -1
+                    )
                 
-                # Draw label text
-                cv2.putText(
-                    annotated_image,
-                    label,
-                    (x1, y1 - baseline - 2),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.6,
-                    (255, 255, 255),
-                    2
-                )
-            
-            # Add summary information
-            self._add_summary_info(annotated_image, detections)
+                    # Draw label text
+                    cv2.putText(
+                        annotated_image,
+                        label,
+                        (x1, y1 - baseline - 2),
+                        cv2.FONT_HERSHEY_SIMPLEX,
+                        0.6,
+                        (255, 255, 255),
+                        2
+                    )
+            
+                # Add summary information
+                self._add_summary_info(annotated_image, detections)
             
             # Save annotated image
             output_dir = Path(output_path).parent
             output_dir.mkdir(parents=True, exist_ok=True)
             
             # Encode image to memory buffer first, then write to file
-            success, encoded_image = cv2.imencode('.jpg', annotated_image)
+            with stage(timings, "draw.encode"):
+                success, encoded_image = cv2.imencode('.jpg', annotated_image)
             if not success:
                 raise RuntimeError(f"Failed to encode image")
             
-            with open(output_path, 'wb') as f:
-                f.write(encoded_image.tobytes())
+            with stage(timings, "draw.write"):
+                with open(output_path, 'wb') as f:
+                    f.write(encoded_image.tobytes())
             
             return output_path
             
@@ -96,20 +124,18 @@ class ImageProcessor:
             print(f"Error processing image: {str(e)}")
             raise
         
-    def _add_summary_info(self, image: np.ndarray, detections: List[Dict[str, Any]]):
+    def _add_summary_info(self, image: np.ndarray, detections: np.ndarray):
         """Add summary information to the image, including mean confidence per class"""
         height, width = image.shape[:2]
 
-        # Count detections + confidence sum
-        class_counts = {name: 0 for name in self.class_names.values()}
-        class_conf_sums = {name: 0.0 for name in self.class_names.values()}
-
-        for detection in detections:
-            class_name = detection["class_name"]
-            confidence = detection["confidence"]
-            if class_name in class_counts:
-                class_counts[class_name] += 1
-                class_conf_sums[class_name] += confidence
+        # Count detections + confidence sum (sınıf başına tek bincount)
+        n_classes = len(self.class_names)
+        class_ids = detections["class_id"].astype(np.int64)
+        known = class_ids < n_classes
+        counts = np.bincount(class_ids[known], minlength=n_classes)
+        conf_sums = np.bincount(class_ids[known], weights=detections["confidence"][known], minlength=n_classes)
+        class_counts = {name: int(counts[cid]) for cid, name in self.class_names.items()}
+        class_conf_sums = {name: float(conf_sums[cid]) for cid, name in self.class_names.items()}
 
         # Prepare summary text
         total_detections = len(detections)
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Tek model süreci: API worker'ları decode edilmiş kareleri paylaşımlı bellek
+halkasına (multiprocessing.shared_memory) yazar, bu süreç modeli bir kez yükler
+ve kompakt tespit dizisi (DETECTION_DTYPE) döner. Böylece uvicorn birden çok
+worker ile çalışırken model her worker'da ayrı ayrı yüklenmez:
+
+    python inference_server.py --address 127.0.0.1:8766 --model best.pt
+    PDA_INFERENCE_SERVER=127.0.0.1:8766 python -m uvicorn main:app --workers 4
+
+Kontrol mesajları (küçük tuple'lar) multiprocessing.connection üzerinden gider;
+piksel verisi kopyalanmadan halkadaki slot üzerinden okunur. Slot'a sığmayan
+kareler mesajın içinde gönderilir.
+
+multiprocessing.connection gelen her mesajı unpickle eder: anahtar bilen her süreç
+model sürecinde kod çalıştırabilir. Anahtar PDA_INFERENCE_AUTHKEY ya da kuruluma özel
+rastgele anahtar dosyasıdır (inference.key, sadece kullanıcıya okunur); sabit bir
+varsayılan yoktur.
+"""
+
+import argparse
+import asyncio
+import atexit
+import concurrent.futures
+import itertools
+import logging
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from detection_store import DETECTION_DTYPE
+from file_manager import BASE_DIR
+from metrics import stage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = "127.0.0.1:8766"
+AUTHKEY_FILE = BASE_DIR / "inference.key"
+MIN_AUTHKEY_LENGTH = 16
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = (value or DEFAULT_ADDRESS).rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def authkey(key_file: Path = AUTHKEY_FILE) -> bytes:
+    """
+    PDA_INFERENCE_AUTHKEY; yoksa kuruluma özel anahtar dosyası (ilk çağıran süreç üretir,
+    aynı kullanıcının sunucu ve API worker'ları paylaşır). Anahtar yoksa / kısaysa hata.
+    """
+    key = os.getenv("PDA_INFERENCE_AUTHKEY", "").strip()
+    if key:
+        if len(key) < MIN_AUTHKEY_LENGTH:
+            raise RuntimeError(f"PDA_INFERENCE_AUTHKEY must be at least {MIN_AUTHKEY_LENGTH} characters")
+        return key.encode()
+    try:
+        if not key_file.exists():
+            key_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = key_file.with_name(f".{key_file.name}.{os.getpid()}.tmp")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            try:
+                os.link(tmp, key_file)  # atomik ve üzerine yazmaz: eşzamanlı başlayan süreçler aynı anahtarı okur
+            except FileExistsError:
+                pass
+            finally:
+                tmp.unlink(missing_ok=True)
+        key = key_file.read_text(encoding="utf-8").strip()
+    except OSError as e:
+        raise RuntimeError(f"Inference auth key unavailable ({key_file}): {e}; set PDA_INFERENCE_AUTHKEY")
+    if len(key) < MIN_AUTHKEY_LENGTH:
+        raise RuntimeError(f"Inference auth key file {key_file} is invalid; delete it or set PDA_INFERENCE_AUTHKEY")
+    return key.encode()
+
+
+class FrameRing:
+    """
+    SharedMemory üzerinde sabit boyutlu slot'lar. Halkayı istemci (API worker)
+    oluşturur ve siler; sunucu adıyla bağlanıp sadece okur.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int, name: Optional[str] = None):
+        self.slots = int(slots)
+        self.slot_bytes = int(slot_bytes)
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            if sys.platform != "win32":
+                # Python < 3.13: bağlanan süreç de resource_tracker'a kaydolur ve çıkışta
+                # segmenti siler; sahibi istemci olduğu için kaydı geri al
+                from multiprocessing import resource_tracker
+                try:
+                    resource_tracker.unregister(self.shm._name, "shared_memory")
+                except Exception:
+                    pass
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def view(self, slot: int, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        return np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def close(self):
+        try:
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+        except Exception:
+            pass
+
+
+# ---------------- Sunucu ----------------
+
+class InferenceServer:
+    """
+    Her istemci bağlantısı bir thread'de okunur; istekler tek bir inference
+    thread'inde sırayla işlenir (model tek kopya, tek sıra).
+    """
+
+    def __init__(self, models_dir: Path, address: Tuple[str, int], input_size: int = 640):
+        from model_handler import YOLOModelHandler
+
+        self.models_dir = Path(models_dir)
+        self.address = address
+        self.authkey = authkey()  # anahtarsız başlamaz
+        self.handler = YOLOModelHandler(input_size=input_size)
+        self.jobs: "queue.Queue" = queue.Queue()
+        self.served = 0
+
+    def load(self, model_name: str):
+        name = Path(model_name).name
+        if not (self.handler.is_model_loaded() and self.handler.current_model == name):
+            if not self.handler.load_model_sync(str(self.models_dir / name)):
+                raise RuntimeError(f"Model load failed: {name}")
+
+    def _infer_loop(self):
+        while True:
+            conn, send_lock, ring, msg = self.jobs.get()
+            kind, req_id = msg[0], msg[1]
+            try:
+                if kind == "load":
+                    self.load(msg[2])
+                    reply = ("ok", req_id, None, {})
+                else:
+                    _, _, slot, shape, payload, model_name, params = msg
+                    self.load(model_name)
+                    if payload is not None:
+                        image = np.frombuffer(payload, np.uint8).reshape(shape)
+                    else:
+                        image = ring.view(slot, shape)
+                    timings: Dict[str, float] = {}
+                    arr = self.handler.predict_array(image, timings=timings, **params)
+                    del image  # slot istemciye geri verilmeden önce referans kalmasın
+                    reply = ("ok", req_id, arr.tobytes(), timings)
+                    self.served += 1
+            except Exception as e:
+                logger.exception("Inference failed")
+                reply = ("error", req_id, str(e), {})
+            try:
+                with send_lock:
+                    conn.send(reply)
+            except (OSError, EOFError):
+                pass
+
+    def _client_loop(self, conn: Connection):
+        send_lock = threading.Lock()
+        ring: Optional[FrameRing] = None
+        try:
+            hello = conn.recv()
+            if hello[0] != "hello":
+                return
+            _, shm_name, slots, slot_bytes = hello
+            ring = FrameRing(slots, slot_bytes, name=shm_name)
+            with send_lock:
+                conn.send(("hello", str(self.handler.device), os.getpid()))
+            while True:
+                self.jobs.put((conn, send_lock, ring, conn.recv()))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            if ring is not None:
+                ring.close()
+
+    def serve_forever(self):
+        threading.Thread(target=self._infer_loop, name="inference", daemon=True).start()
+        with Listener(self.address, authkey=self.authkey) as listener:
+            logger.info(f"Inference server listening on {self.address[0]}:{self.address[1]} (pid {os.getpid()})")
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+
+
+# ---------------- İstemci (API worker) ----------------
+
+class InferenceClient:
+    """
+    API worker tarafı. İlk istekte bağlanır ve halkayı oluşturur; en fazla
+    `slots` kare aynı anda sunucuda olabilir (fazlası slot bekler).
+    Bağlantı koparsa bekleyen istekler hata alır, sonraki istek yeniden bağlanır.
+    Slot sadece cevap gelince ya da bağlantı kopunca boşalır: istek iptal edilse de
+    sunucu o slot'u okuyor olabilir.
+    """
+
+    def __init__(self, address: Tuple[str, int], slots: int = 4, slot_bytes: int = 8 * 1024 * 1024):
+        self.address = address
+        self.slots = max(1, int(slots))
+        self.slot_bytes = int(slot_bytes)
+        self.device = "remote"
+        self.server_pid: Optional[int] = None
+        self._conn: Optional[Connection] = None
+        self._ring: Optional[FrameRing] = None
+        self.authkey = authkey()
+        self._lock = threading.Lock()          # bağlantı kurma + gönderme
+        self._slot_lock = threading.Lock()
+        self._free: List[int] = []
+        self._slot_waiters: Deque[concurrent.futures.Future] = deque()
+        self._pending: Dict[int, concurrent.futures.Future] = {}
+        self._ids = itertools.count(1)
+
+    def _connect(self) -> Connection:
+        # self._lock altında çağrılır
+        if self._conn is not None:
+            return self._conn
+        conn = Client(self.address, authkey=self.authkey)
+        if self._ring is None:
+            self._ring = FrameRing(self.slots, self.slot_bytes)
+            atexit.register(self.close)
+            for i in range(self.slots):
+                self._release_slot(i)
+        conn.send(("hello", self._ring.name, self.slots, self.slot_bytes))
+        _, self.device, self.server_pid = conn.recv()
+        self._conn = conn
+        threading.Thread(target=self._recv_loop, args=(conn,), name="inference-client", daemon=True).start()
+        logger.info(f"Connected to inference server {self.address[0]}:{self.address[1]} (pid {self.server_pid}, {self.device})")
+        return conn
+
+    def _recv_loop(self, conn: Connection):
+        try:
+            while True:
+                status, req_id, body, timings = conn.recv()
+                fut = self._pending.pop(req_id, None)
+                if fut is None:
+                    continue
+                if status == "ok":
+                    fut.set_result((body, timings))
+                else:
+                    fut.set_exception(RuntimeError(f"Inference server: {body}"))
+        except (EOFError, OSError):
+            pass
+        with self._lock:
+            if self._conn is conn:
+                self._conn = None
+        for req_id in list(self._pending):
+            fut = self._pending.pop(req_id, None)
+            if fut is not None and not fut.done():
+                fut.set_exception(ConnectionError("Inference server connection lost"))
+
+    def _connected(self) -> Connection:
+        # self._lock altında çağrılır
+        try:
+            return self._connect()
+        except (OSError, EOFError) as e:
+            raise ConnectionError(f"Inference server unavailable at {self.address[0]}:{self.address[1]}: {e}")
+
+    def _send(self, msg: tuple) -> concurrent.futures.Future:
+        fut: concurrent.futures.Future = concurrent.futures.Future()
+        # RUNNING: bekleyen await iptal edilse de future iptal olmaz, cevap/bağlantı kopması tamamlar
+        fut.set_running_or_notify_cancel()
+        with self._lock:
+            conn = self._connected()
+            self._pending[msg[1]] = fut
+            try:
+                conn.send(msg)
+            except (OSError, EOFError, ValueError) as e:
+                self._pending.pop(msg[1], None)
+                raise ConnectionError(f"Inference server send failed: {e}")
+        return fut
+
+    def _release_slot(self, slot: int):
+        with self._slot_lock:
+            while self._slot_waiters:
+                waiter = self._slot_waiters.popleft()
+                try:
+                    waiter.set_result(slot)
+                    return
+                except concurrent.futures.InvalidStateError:
+                    continue  # iptal edilmiş bekleyen
+            self._free.append(slot)
+
+    async def _acquire_slot(self) -> int:
+        with self._slot_lock:
+            if self._free:
+                return self._free.pop()
+            waiter: concurrent.futures.Future = concurrent.futures.Future()
+            self._slot_waiters.append(waiter)
+        try:
+            return await asyncio.wrap_future(waiter)
+        except asyncio.CancelledError:
+            if not waiter.cancel():
+                # slot iptalle aynı anda verildi: kullanılmadan geri bırak
+                self._release_slot(waiter.result())
+            raise
+
+    def load(self, model_name: str):
+        """Modeli sunucuda yükletir (senkron; warm-up / load_model thread'inden çağrılır)."""
+        self._send(("load", next(self._ids), model_name)).result()
+
+    async def predict(
+        self,
+        image: np.ndarray,
+        model_name: str,
+        params: Dict[str, Any],
+        timings: Optional[Dict[str, float]] = None,
+    ) -> np.ndarray:
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        with self._lock:
+            self._connected()  # halka ilk bağlantıda oluşur
+            ring = self._ring
+        slot = await self._acquire_slot()
+        try:
+            t0 = time.perf_counter()
+            with stage(timings, "predict.transfer"):
+                payload = None
+                if image.nbytes <= ring.slot_bytes:
+                    np.copyto(ring.view(slot, image.shape), image)
+                else:
+                    payload = image.tobytes()
+                fut = self._send(("predict", next(self._ids), slot, image.shape, payload, model_name, params))
+        except BaseException:
+            self._release_slot(slot)  # istek gitmedi: slot kimsede değil
+            raise
+        # cevap gelince ya da bağlantı kopunca (recv döngüsü future'ı tamamlar) boşalır
+        fut.add_done_callback(lambda _f: self._release_slot(slot))
+        body, remote_timings = await asyncio.wrap_future(fut)
+        if timings is not None:
+            timings.update(remote_timings)
+            # gidiş-dönüş süresinin sunucu işleme dışındaki kısmı (kuyruk + IPC)
+            timings["predict.wait"] = max(0.0, time.perf_counter() - t0 - sum(remote_timings.values())
+                                          - timings.get("predict.transfer", 0.0))
+        return np.frombuffer(body, dtype=DETECTION_DTYPE).copy()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            if self._ring is not None:
+                self._ring.close()
+                self._ring = None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--address", default=os.getenv("PDA_INFERENCE_SERVER") or DEFAULT_ADDRESS, help="host:port")
+    ap.add_argument("--models-dir", default=str(Path(__file__).parent / "models"))
+    ap.add_argument("--model", default=os.getenv("PDA_PRELOAD_MODEL", "best.pt"), help="model to load at start ('' = on first request)")
+    ap.add_argument("--imgsz", type=int, default=640)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        server = InferenceServer(Path(args.models_dir), parse_address(args.address), input_size=args.imgsz)
+    except RuntimeError as e:
+        logger.error(str(e))
+        sys.exit(2)
+    if args.model and (server.models_dir / args.model).exists():
+        server.load(args.model)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test against a local backend.
+
+Starts `main:app` with uvicorn on a free port (fresh temporary runtime folder),
+then N simulated operators loop over upload -> analyze -> history ->
+download-results with random think times and a configurable image mix:
+
+    python loadtest.py --operators 4 --duration 120
+    python loadtest.py --operators 8 --mix 2448x2048:3,4096x3000:1 --images 2-6 --think 2
+    python loadtest.py --url http://127.0.0.1:8000 --pid 1234      # existing server
+
+Reports per-step latency percentiles, throughput, error/rejection rates and the
+server's RSS over time; --out writes the same as JSON. Requires `httpx`
+(pip install httpx); RSS uses psutil when installed, /proc otherwise.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - dev tool
+    raise SystemExit("loadtest.py requires httpx: pip install httpx")
+
+BACKEND_DIR = Path(__file__).resolve().parent
+STEPS = ("upload", "analyze", "history", "download")
+
+
+# ---------------- Sunucu ----------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, base_dir: Path, extra_env: Dict[str, str], verbose: bool = False,
+                 workers: int = 1) -> subprocess.Popen:
+    env = {**os.environ, "LOCALAPPDATA": str(base_dir), **extra_env}
+    out = None if verbose else subprocess.DEVNULL
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--workers", str(workers)],
+        cwd=str(BACKEND_DIR),
+        env=env,
+        stdout=out,
+        stderr=out,
+    )
+
+
+async def wait_ready(url: str, proc: Optional[subprocess.Popen], timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if proc is not None and proc.poll() is not None:
+                raise SystemExit(f"server exited with code {proc.returncode}")
+            try:
+                if (await client.get(f"{url}/health", timeout=2)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise SystemExit(f"server not ready after {timeout:.0f}s")
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+async def sample_rss(pid: int, samples: List[Tuple[float, int]], t0: float, interval: float, stop: asyncio.Event):
+    while not stop.is_set():
+        v = rss_bytes(pid)
+        if v is not None:
+            samples.append((round(time.monotonic() - t0, 2), v))
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ---------------- Görsel karışımı ----------------
+
+def parse_mix(spec: str) -> List[Tuple[Tuple[int, int], float]]:
+    """'2448x2048:3,1024x768:1' -> [((2448, 2048), 3.0), ((1024, 768), 1.0)]"""
+    mix = []
+    for part in spec.split(","):
+        res, _, weight = part.partition(":")
+        w, h = (int(v) for v in res.lower().split("x"))
+        mix.append(((w, h), float(weight or 1)))
+    return mix
+
+
+def build_images(mix, fmt: str, density: int) -> Dict[Tuple[int, int], bytes]:
+    """Her çözünürlük için bir sentetik panel (bir kez encode edilip tekrar kullanılır)."""
+    import cv2
+    from benchmark import synthetic_panel
+
+    out = {}
+    for (w, h), _ in mix:
+        img, _ = synthetic_panel(w, h, density, seed=w * 7 + h)
+        ok, buf = cv2.imencode(f".{fmt}", img)
+        if not ok:
+            raise SystemExit(f"encode failed for {w}x{h}.{fmt}")
+        out[(w, h)] = buf.tobytes()
+    return out
+
+
+# ---------------- Operatör ----------------
+
+class Stats:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.ok: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+        self.error_samples: List[str] = []
+        self.flows = 0
+        self.images = 0
+        self.bytes_downloaded = 0
+
+    def record(self, step: str, seconds: float, ok: bool, detail: str = ""):
+        self.latency[step].append(seconds)
+        if ok:
+            self.ok[step] += 1
+        else:
+            self.errors[step] += 1
+            if len(self.error_samples) < 20:
+                self.error_samples.append(f"{step}: {detail}"[:300])
+
+
+async def timed(stats: Stats, step: str, coro):
+    t0 = time.perf_counter()
+    try:
+        r = await coro
+    except httpx.HTTPError as e:
+        stats.record(step, time.perf_counter() - t0, False, repr(e))
+        return None
+    dt = time.perf_counter() - t0
+    if r.status_code in (429, 503):
+        stats.rejected[step] += 1
+        stats.latency[step + ".rejected"].append(dt)
+        return r
+    stats.record(step, dt, r.is_success, f"HTTP {r.status_code} {r.text[:200]}")
+    return r if r.is_success else None
+
+
+async def operator(op: int, url: str, args, images, mix, stats: Stats, deadline: float, rng: random.Random):
+    resolutions = [m[0] for m in mix]
+    weights = [m[1] for m in mix]
+    lo, hi = args.images
+    think = lambda: asyncio.sleep(rng.expovariate(1.0 / args.think) if args.think > 0 else 0)
+    timeout = httpx.Timeout(args.timeout)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+        it = 0
+        while time.monotonic() < deadline and (not args.iterations or it < args.iterations):
+            it += 1
+            n = rng.randint(lo, hi)
+            picks = rng.choices(resolutions, weights=weights, k=n)
+            files = [
+                ("files", (f"op{op:02d}_{it:04d}_{k}.{args.format}", images[res], f"image/{args.format}"))
+                for k, res in enumerate(picks)
+            ]
+
+            r = await timed(stats, "upload", client.post("/upload-images", files=files))
+            if r is None:
+                await think()
+                continue
+            names = [f["filename"] for f in r.json().get("uploaded_files", [])]
+            await think()
+
+            # kuyruk doluysa Retry-After kadar bekleyip tekrar dene
+            run = None
+            for _ in range(args.retries + 1):
+                r = await timed(stats, "analyze", client.post("/analyze", data={
+                    "filenames": json.dumps(names), "run_group": f"load-op{op:02d}",
+                    "model_name": args.model, "confidence": str(args.confidence),
+                }))
+                if r is not None and r.status_code in (429, 503):
+                    await asyncio.sleep(float(r.headers.get("Retry-After", "1")))
+                    continue
+                if r is not None:
+                    run = r.json().get("run")
+                    stats.images += len(names)
+                break
+            if run is None:
+                await think()
+                continue
+            await think()
+
+            await timed(stats, "history", client.get("/history", params={"limit": 50}))
+            await think()
+
+            r = await timed(stats, "download", client.post("/download-results", data={
+                "group_slug": run["group_slug"], "run_id": run["run_id"], "folder_name": f"op{op:02d}_{it:04d}",
+            }))
+            if r is not None and r.json().get("download_path"):
+                t0 = time.perf_counter()
+                try:
+                    async with client.stream("GET", r.json()["download_path"]) as resp:
+                        size = 0
+                        async for chunk in resp.aiter_bytes():
+                            size += len(chunk)
+                    stats.record("download.zip", time.perf_counter() - t0, resp.is_success, f"HTTP {resp.status_code}")
+                    stats.bytes_downloaded += size
+                except httpx.HTTPError as e:
+                    stats.record("download.zip", time.perf_counter() - t0, False, repr(e))
+            stats.flows += 1
+            await think()
+
+
+# ---------------- Rapor ----------------
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    k = (len(sorted_values) - 1) * q
+    f = int(k)
+    c = min(f + 1, len(sorted_values) - 1)
+    return sorted_values[f] + (sorted_values[c] - sorted_values[f]) * (k - f)
+
+
+def summarize(stats: Stats, elapsed: float, rss: List[Tuple[float, int]]) -> Dict[str, Any]:
+    steps = {}
+    for step, values in sorted(stats.latency.items()):
+        v = sorted(values)
+        total = stats.ok.get(step, 0) + stats.errors.get(step, 0)
+        steps[step] = {
+            "count": len(v),
+            "ok": stats.ok.get(step, 0),
+            "errors": stats.errors.get(step, 0),
+            "rejected": stats.rejected.get(step, 0),
+            "error_rate": round(stats.errors.get(step, 0) / total, 4) if total else 0.0,
+            **{f"p{int(q * 100)}_ms": round(percentile(v, q) * 1000, 1) for q in (0.5, 0.9, 0.95, 0.99)},
+            "max_ms": round(v[-1] * 1000, 1) if v else None,
+            "mean_ms": round(sum(v) / len(v) * 1000, 1) if v else None,
+        }
+    rss_mb = [b / (1024 * 1024) for _, b in rss]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "flows": stats.flows,
+        "flows_per_min": round(stats.flows / elapsed * 60, 2) if elapsed else None,
+        "images": stats.images,
+        "images_per_s": round(stats.images / elapsed, 3) if elapsed else None,
+        "downloaded_mb": round(stats.bytes_downloaded / (1024 * 1024), 1),
+        "steps": steps,
+        "server_rss_mb": {
+            "start": round(rss_mb[0], 1), "max": round(max(rss_mb), 1), "end": round(rss_mb[-1], 1),
+            "samples": [[t, round(b / (1024 * 1024), 1)] for t, b in rss],
+        } if rss_mb else None,
+        "error_samples": stats.error_samples,
+    }
+
+
+def print_summary(s: Dict[str, Any]):
+    print(f"\n{s['flows']} flows in {s['elapsed_s']}s  ({s['flows_per_min']} flows/min, {s['images_per_s']} images/s)")
+    print(f"{'step':<18}{'count':>7}{'err%':>7}{'rej':>6}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for step, v in s["steps"].items():
+        print(f"{step:<18}{v['count']:>7}{v['error_rate'] * 100:>7.1f}{v['rejected']:>6}"
+              f"{v['p50_ms']:>10}{v['p90_ms']:>10}{v['p95_ms']:>10}{v['p99_ms']:>10}{v['max_ms']:>10}")
+    if s["server_rss_mb"]:
+        r = s["server_rss_mb"]
+        print(f"server RSS: start {r['start']} MB, max {r['max']} MB, end {r['end']} MB")
+    for e in s["error_samples"][:5]:
+        print(f"  ! {e}")
+
+
+async def run(args) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    images = build_images(mix, args.format, args.density)
+
+    proc, pid, tmp = None, args.pid, None
+    url = args.url
+    if url is None:
+        tmp = Path(args.base_dir) if args.base_dir else Path(tempfile.mkdtemp(prefix="pda_load_"))
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        env = dict(kv.split("=", 1) for kv in args.env)
+        proc = start_server(port, tmp, env, verbose=args.verbose, workers=args.workers)
+        pid = proc.pid
+        print(f"server pid {pid} on {url}, runtime folder {tmp}")
+    url = url.rstrip("/")
+
+    try:
+        await wait_ready(url, proc)
+        stats, stop, rss = Stats(), asyncio.Event(), []
+        t0 = time.monotonic()
+        sampler = asyncio.create_task(sample_rss(pid, rss, t0, args.rss_interval, stop)) if pid else None
+        deadline = t0 + args.duration
+        rng = random.Random(args.seed)
+
+        async def delayed(i):
+            await asyncio.sleep(args.ramp * i / max(1, args.operators))
+            await operator(i, url, args, images, mix, stats, deadline, random.Random(rng.random()))
+
+        await asyncio.gather(*(delayed(i) for i in range(args.operators)))
+        elapsed = time.monotonic() - t0
+        stop.set()
+        if sampler:
+            await sampler
+        summary = summarize(stats, elapsed, rss)
+        summary["config"] = {k: v for k, v in vars(args).items()}
+        summary["timestamp"] = datetime.now().isoformat()
+        return summary
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if tmp is not None and not args.base_dir:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--operators", type=int, default=4, help="simulated concurrent operators")
+    ap.add_argument("--duration", type=float, default=60, help="seconds (operators finish their current flow)")
+    ap.add_argument("--iterations", type=int, default=0, help="max flows per operator (0: until duration)")
+    ap.add_argument("--think", type=float, default=1.0, help="mean think time between steps (s, exponential)")
+    ap.add_argument("--ramp", type=float, default=5.0, help="spread operator start over this many seconds")
+    ap.add_argument("--mix", default="2448x2048:3,1024x768:1", help="resolution:weight list")
+    ap.add_argument("--images", default="1-4", help="images per analysis, e.g. 3 or 1-4")
+    ap.add_argument("--format", default="tif", choices=("tif", "png", "jpg"))
+    ap.add_argument("--density", type=int, default=20, help="synthetic defects per panel")
+    ap.add_argument("--model", default="best.pt")
+    ap.add_argument("--confidence", type=float, default=0.25)
+    ap.add_argument("--retries", type=int, default=3, help="analyze retries after 429/503 (honors Retry-After)")
+    ap.add_argument("--timeout", type=float, default=600)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--url", default=None, help="use an already running server instead of starting one")
+    ap.add_argument("--pid", type=int, default=None, help="server pid for RSS sampling with --url")
+    ap.add_argument("--base-dir", default=None, help="runtime folder (LOCALAPPDATA) for the started server")
+    ap.add_argument("--env", action="append", default=[], help="extra server env, e.g. PDA_MAX_CONCURRENT_ANALYSES=2")
+    ap.add_argument("--rss-interval", type=float, default=0.5)
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started server (RSS: supervisor only)")
+    ap.add_argument("--verbose", action="store_true", help="show the started server's log output")
+    ap.add_argument("--out", default=None, help="write the summary as JSON")
+    args = ap.parse_args()
+    lo, _, hi = args.images.partition("-")
+    args.images = (int(lo), int(hi or lo))
+
+    summary = asyncio.run(run(args))
+    print_summary(summary)
+    if args.out:
+        Path(args.out).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"-> {args.out}")
+    if any(v["errors"] for v in summary["steps"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,72 @@
 # backend/main.py  (TOP OF FILE)
-import os, re, logging
+import os, re, time, shutil, logging, asyncio, sqlite3, multiprocessing, tracemalloc
+
+if __name__ == "__main__":
+    # PyInstaller: PDF worker süreçleri exe'yi yeniden çalıştırır; sunucu başlamadan burada döner
+    multiprocessing.freeze_support()
+
+from collections import deque
+from contextlib import asynccontextmanager
 from pathlib import Path
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from fastapi import Body
-from PIL import Image
+from PIL import Image, ImageDraw
 import io
 import json
+import numpy as np
 from fastapi.responses import JSONResponse
 
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from urllib.parse import quote
 import uvicorn
 
 from model_handler import YOLOModelHandler
 from image_processor import ImageProcessor
 from report_generator import ReportGenerator
+from pdf_report import PdfRenderer
 from file_manager import FileManager
+from admission import AdmissionController, AdmissionRejected
+from run_index import RunIndex
+from uploads_catalog import SORT_COLUMNS as UPLOAD_SORTS, UploadsCatalog
+import spc
+from detection_query import DetectionQueryEngine
+from zip_stream import iter_zip
+from retention import RetentionManager, RetentionPolicy
+from detection_store import (
+    DetectionSet, RunSpool, detection_mask, load_raw_detections, load_run_detections, load_run_results,
+    run_image_count, threshold_sweep,
+)
+from report_cache import ReportCache
+from detection_export import DetectionExporter, EXPORT_FORMATS
+from metrics import Metrics, TimingSummary
+from memory import MB, MemoryBudget, MemoryProbe, estimate_decode_bytes, merge_memory, rss_bytes
+from profiling import ProfileMiddleware, RequestProfiler
+from warmup import Warmup, preload
+from inference_server import InferenceClient, parse_address
+from static_delivery import CachedStaticFiles
 from fastapi import HTTPException
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Paint Defect Analysis API", version="2.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sunucu hemen dinlemeye başlar; indeks / model / rapor kütüphaneleri arka planda (GET /ready)
+    warmup.start()
+    retention_task = asyncio.create_task(retention_loop())
+    yield
+    warmup.cancel()
+    retention_task.cancel()
+    report_generator.pdf_renderer.shutdown()
+    if model_handler.remote is not None:
+        model_handler.remote.close()
+
+app = FastAPI(title="Paint Defect Analysis API", version="2.0.0", lifespan=lifespan)
 
 # --- CORS ---
 frontend = os.environ.get("CLIENT_ORIGIN", "*")
@@ -44,20 +85,198 @@ UPLOADS_DIR    = BASE_DIR / "uploads"
 RESULTS_DIR    = BASE_DIR / "results"
 DOWNLOADS_DIR  = BASE_DIR / "downloads"
 TEMP_DIR       = BASE_DIR / "temp"
+CACHE_DIR      = BASE_DIR / "cache"        # türev çıktılar (rapor cache, thumbnail vb.)
+PROFILES_DIR   = BASE_DIR / "profiles"     # istek profilleri (?profile=1 / X-PDA-Profile)
 MODELS_DIR     = Path(__file__).parent / "models"
 
-for d in [UPLOADS_DIR, RESULTS_DIR, DOWNLOADS_DIR, TEMP_DIR]:
+for d in [UPLOADS_DIR, RESULTS_DIR, DOWNLOADS_DIR, TEMP_DIR, CACHE_DIR]:
     d.mkdir(parents=True, exist_ok=True)
 
-app.mount("/static/results",   StaticFiles(directory=str(RESULTS_DIR)),   name="static_results")
-app.mount("/static/uploads",   StaticFiles(directory=str(UPLOADS_DIR)),   name="static_uploads")
+# İstek bazlı profil: sadece bayraklı /analyze ve rapor isteklerinde (PDA_PROFILING=0 ile tamamen kapanır)
+profiler = RequestProfiler(
+    PROFILES_DIR,
+    enabled=os.getenv("PDA_PROFILING", "1") != "0",
+    keep=int(os.getenv("PDA_PROFILE_KEEP", "20")),
+)
+app.add_middleware(ProfileMiddleware, profiler=profiler)
+
+# Aynı adla üzerine yazılabildikleri için (upload / run overwrite) tarayıcı her seferinde ETag ile doğrular
+app.mount("/static/results",   CachedStaticFiles(directory=str(RESULTS_DIR)),   name="static_results")
+app.mount("/static/uploads",   CachedStaticFiles(directory=str(UPLOADS_DIR)),   name="static_uploads")
 app.mount("/static/downloads", StaticFiles(directory=str(DOWNLOADS_DIR)), name="static_downloads")
 app.mount("/downloads",        StaticFiles(directory=str(DOWNLOADS_DIR)), name="downloads")
 
 model_handler    = YOLOModelHandler(input_size=640)
+# PDA_INFERENCE_SERVER=host:port: model ayrı bir süreçte (inference_server.py), kareler paylaşımlı bellekle gider;
+# uvicorn --workers N ile her worker modeli tekrar yüklemez
+if os.getenv("PDA_INFERENCE_SERVER", "").strip():
+    model_handler.use_remote(InferenceClient(
+        parse_address(os.getenv("PDA_INFERENCE_SERVER")),
+        slots=int(os.getenv("PDA_INFERENCE_SLOTS", "4")),
+        slot_bytes=int(float(os.getenv("PDA_INFERENCE_SLOT_MB", "8")) * 1024 * 1024),
+    ))
 image_processor  = ImageProcessor()
-report_generator = ReportGenerator()
+report_generator = ReportGenerator(
+    results_dir=RESULTS_DIR,
+    pdf_renderer=PdfRenderer(
+        max_workers=int(os.getenv("PDA_PDF_WORKERS", "0")) or None,
+        thumb_long_side=int(os.getenv("PDA_PDF_THUMB_PX", "640")),
+    ),
+)
 file_manager     = FileManager()
+run_index        = RunIndex(BASE_DIR / "index.sqlite3", RESULTS_DIR)
+detection_query  = DetectionQueryEngine(run_index, model_handler.class_names)
+uploads_catalog  = UploadsCatalog(run_index, UPLOADS_DIR)
+detection_exporter = DetectionExporter(RESULTS_DIR, UPLOADS_DIR, model_handler.class_names)
+report_cache     = ReportCache(CACHE_DIR, report_generator)
+
+# Disk kotaları: PDA_RETENTION_<AD>_MAX_MB / _MAX_DAYS (0 = limit yok)
+retention = RetentionManager(
+    [
+        RetentionPolicy.from_env("downloads", DOWNLOADS_DIR, default_mb=2048, default_days=3),
+        RetentionPolicy.from_env("temp",      TEMP_DIR,      default_mb=1024, default_days=1),
+        RetentionPolicy.from_env("cache",     CACHE_DIR,     default_mb=2048, default_days=30),
+        RetentionPolicy.from_env("uploads",   UPLOADS_DIR,   default_mb=0,    default_days=0),
+        RetentionPolicy.from_env("results",   RESULTS_DIR,   default_mb=0,    default_days=0, unit="run"),
+    ],
+    on_run_removed=run_index.delete_run,
+    on_file_removed=lambda policy, path: uploads_catalog.remove(path.name) if policy == "uploads" else None,
+    protected=file_manager.pinned_paths,
+)
+RETENTION_INTERVAL_SECONDS = float(os.getenv("PDA_RETENTION_INTERVAL_MINUTES", "60")) * 60
+
+async def retention_loop():
+    while True:
+        try:
+            await asyncio.to_thread(retention.run_once)
+        except Exception as e:
+            logger.warning(f"Retention run failed: {e}")
+        await asyncio.sleep(RETENTION_INTERVAL_SECONDS)
+
+def build_index():
+    # İndeks yoksa / silindiyse diskteki run'lardan bir kez kur
+    if run_index.ensure_built():
+        logger.info("Run index rebuilt from disk")
+        return "rebuilt"
+
+def sync_uploads():
+    # uploads/ kataloğunu diskle eşitle (kapalıyken eklenen/silinen dosyalar)
+    changes = uploads_catalog.sync(force=True)
+    return changes if any(changes.values()) else None
+
+_index_rebuild: Optional[asyncio.Task] = None
+
+async def _rebuild_index_quietly():
+    try:
+        stats = await asyncio.to_thread(run_index.rebuild)
+        logger.info(f"Run index rebuilt after failed update: {stats}")
+    except Exception as e:
+        logger.warning(f"Run index rebuild failed (POST /history/reindex ile tekrar denenebilir): {e}")
+
+async def sync_index(what: str, fn, *args):
+    """
+    Diskteki değişiklik (silme / yeniden adlandırma) yapıldıktan sonra indeksi günceller.
+    sqlite hatası isteği başarısız yapmaz: uyarı yazılır ve arka planda tek bir rebuild başlatılır
+    (dönüş None). Başarılıysa fn'in sonucu döner.
+    """
+    global _index_rebuild
+    try:
+        return await asyncio.to_thread(fn, *args)
+    except sqlite3.Error as e:
+        logger.warning(f"Index {what} failed, scheduling rebuild: {e}")
+        if _index_rebuild is None or _index_rebuild.done():
+            _index_rebuild = asyncio.create_task(_rebuild_index_quietly())
+        return None
+
+def require_index():
+    """
+    İndeks açılışta (warm-up "index" adımı) kurulurken yarım sonuç yerine 503 + Retry-After döner;
+    istemci kısa süre sonra tekrar dener.
+    """
+    if not warmup.done("index"):
+        raise HTTPException(
+            status_code=503,
+            detail="Run index is being built, retry shortly",
+            headers={"Retry-After": "2"},
+        )
+
+def preload_model():
+    # Varsayılan modeli ilk analizden önce yükle (PDA_PRELOAD_MODEL="" ile kapalı)
+    name = os.getenv("PDA_PRELOAD_MODEL", "best.pt").strip()
+    if not name or not (MODELS_DIR / name).exists():
+        return False
+    if not model_handler.load_model_sync(str(MODELS_DIR / name)):
+        raise RuntimeError(f"Model load failed: {name}")
+    return name
+
+def preload_reports():
+    missing = preload("pandas", "openpyxl", "reportlab.platypus")
+    return f"missing: {', '.join(missing)}" if missing else None
+
+warmup = Warmup()
+warmup.add("index", build_index)
+warmup.add("uploads", sync_uploads)
+warmup.add("libraries", model_handler.preload_libraries)
+warmup.add("model", preload_model)
+warmup.add("reports", preload_reports)
+
+# /analyze eşzamanlılık + kuyruk limiti (ortam değişkenleriyle ayarlanır)
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("PDA_MAX_CONCURRENT_ANALYSES", "1")),
+    max_queue=int(os.getenv("PDA_MAX_QUEUED_ANALYSES", "4")),
+    max_wait_seconds=float(os.getenv("PDA_MAX_QUEUE_WAIT_SECONDS", "300")),
+)
+
+@asynccontextmanager
+async def admitted(cost: int, what: str = "Analyze"):
+    """admission.slot + reddi HTTP'ye çevirir (429/503 + Retry-After, kuyruk durumu)."""
+    try:
+        async with admission.slot(cost=cost) as ticket:
+            yield ticket
+    except AdmissionRejected as e:
+        logger.warning(f"{what} rejected ({e.status_code}): {e.reason}, queue={e.queue_depth}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={"message": e.reason, "retry_after": e.retry_after, "queue": admission.status()},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+# Bellek: run / aşama başına RSS (PDA_TRACEMALLOC=1 ile Python/NumPy tahsis tepeleri de) ve
+# decode paralelliğini süreç RSS'i PDA_MEMORY_BUDGET_MB altında kalacak şekilde daraltan bütçe
+if os.getenv("PDA_TRACEMALLOC", "0") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+memory_probe  = MemoryProbe()
+decode_budget = MemoryBudget(
+    budget_bytes=int(float(os.getenv("PDA_MEMORY_BUDGET_MB", "0")) * MB),
+    max_parallel=int(os.getenv("PDA_DECODE_WORKERS", "0")) or min(4, os.cpu_count() or 1),
+)
+# /analyze yanıtındaki görsel sayısı; gerisi GET /history/<group>/<run>/results ile sayfalanır
+ANALYZE_RESULTS_PAGE = int(os.getenv("PDA_ANALYZE_RESULTS_PAGE", "500"))
+# Tahmin bu tabanla yapılır, ham tespitler run'da saklanır: daha sıkı eşikler yeniden inference
+# olmadan /refilter ve /sweep ile denenir (>= 1: kapalı, sadece run eşiği saklanır)
+RAW_CONFIDENCE_FLOOR = float(os.getenv("PDA_RAW_CONFIDENCE_FLOOR", "0.05"))
+
+# /metrics: aşama süreleri (histogram) + kuyruk / model / rapor cache durumu (okuma anında)
+metrics = Metrics()
+metrics.gauge("pda_analysis_active", "Analyses currently running", lambda: admission.active)
+metrics.gauge("pda_analysis_queued", "Analyses waiting for a slot", lambda: admission.queued)
+metrics.gauge("pda_analysis_queued_images", "Images in queued analyses", lambda: admission.status()["queued_images"])
+metrics.gauge("pda_analysis_estimated_wait_seconds", "Estimated queue wait", admission.estimate_wait)
+metrics.gauge("pda_analysis_seconds_per_image", "Moving average seconds per image", lambda: admission.seconds_per_image)
+metrics.gauge("pda_analysis_rejected_total", "Analyses rejected by admission control", lambda: admission.rejected, "counter")
+metrics.gauge(
+    "pda_model_load_seconds", "Duration of the last model load",
+    lambda: {(("model", model_handler.current_model or ""),): model_handler.load_seconds},
+)
+metrics.gauge("pda_model_loads_total", "Model loads since start", lambda: model_handler.load_count, "counter")
+metrics.gauge("pda_report_cache_hits_total", "Report cache hits", lambda: report_cache.hits, "counter")
+metrics.gauge("pda_report_cache_misses_total", "Report cache misses", lambda: report_cache.misses, "counter")
+metrics.gauge("pda_report_cache_hit_ratio", "Report cache hit ratio", lambda: report_cache.stats()["hit_rate"])
+metrics.gauge("pda_process_resident_memory_bytes", "Resident memory of the server process", rss_bytes)
+metrics.gauge("pda_memory_budget_bytes", "Memory budget for image decoding (0 = none)", lambda: decode_budget.budget_bytes)
+metrics.gauge("pda_decode_inflight", "Images being decoded right now", lambda: decode_budget.inflight)
+metrics.gauge("pda_decode_throttled_total", "Decodes delayed by the memory budget", lambda: decode_budget.throttled, "counter")
+metrics.gauge("pda_report_cache_size_megabytes", "Report cache size on disk", lambda: report_cache.stats()["size_mb"])
 
 def slugify(name: str) -> str:
     name = name.strip().lower()
@@ -65,11 +284,41 @@ def slugify(name: str) -> str:
     name = re.sub(r"[\s_-]+", "-", name, flags=re.UNICODE)
     return name.strip("-") or "run"
 
+def zip_response(entries, filename: str, chunks=None) -> StreamingResponse:
+    """Kaynak dosyalardan doğrudan akan zip (ara klasör / geçici dosya yok). chunks: hazır akış (ör. stream_package)."""
+    return StreamingResponse(
+        iter_zip(entries) if chunks is None else chunks,
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"},
+    )
+
 @app.get("/health")
 def health():
     return {"ok": True}
 
+@app.get("/ready")
+def ready():
+    """Hazırlık durumu: warm-up (indeks, model, rapor kütüphaneleri) bitene kadar 503."""
+    status = warmup.status()
+    if not status["ready"]:
+        return JSONResponse(status, status_code=503, headers={"Retry-After": "1"})
+    return status
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text formatı (scrape edilebilir)."""
+    body = await asyncio.to_thread(metrics.render)
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 async def save_as_jpg(content: bytes, filename: str):
+    # PIL decode + JPEG encode event loop'u bloklamasın
+    stamp = uploads_catalog.stamp()
+    saved = await asyncio.to_thread(_save_as_jpg, content, filename)
+    if saved["success"]:
+        await asyncio.to_thread(uploads_catalog.add, Path(saved["path"]), stamp)
+    return saved
+
+def _save_as_jpg(content: bytes, filename: str):
     try:
         # Pillow ile aç
         img = Image.open(io.BytesIO(content))
@@ -104,7 +353,9 @@ async def delete_upload(filename: str):
         raise HTTPException(status_code=404, detail="File not found")
 
     try:
+        stamp = uploads_catalog.stamp()
         os.remove(file_path)
+        await asyncio.to_thread(uploads_catalog.remove, filename, stamp)
         return JSONResponse({"message": f"{filename} deleted"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete: {e}")
@@ -141,6 +392,9 @@ async def delete_multiple_history(items: list[dict] = Body(...)):
             deleted.append(item)
         except Exception as e:
             errors.append({"item": item, "error": str(e)})
+            continue
+
+        await sync_index(f"delete {group_slug}/{run_id}", run_index.delete_run, group_slug, run_id)
 
     return {"deleted": deleted, "errors": errors}
 
@@ -154,17 +408,12 @@ async def zip_uploads(files: list[str] = Body(...)):
         raise HTTPException(status_code=400, detail="No files selected")
 
     zip_name = f"uploads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-    zip_path = DOWNLOADS_DIR / zip_name
 
     try:
-        import zipfile
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            for fname in files:
-                fpath = UPLOADS_DIR / fname
-                if fpath.exists():
-                    zf.write(fpath, arcname=fname)
-
-        return {"download_url": f"/downloads/{zip_name}"}
+        # dosyalar kopyalanmaz/sıkıştırılmaz: /download/<zip_name> isteğinde akıtılır
+        entries = [(UPLOADS_DIR / Path(fname).name, Path(fname).name) for fname in files]
+        pkg = file_manager.create_zip_manifest(zip_name, [(p, a) for p, a in entries if p.exists()])
+        return {"download_url": pkg["download_url"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -216,25 +465,177 @@ async def analyze_images(
     Yeni kayıt yapısı:
     results/<group-slug>/<run_id>/processed_*.jpg
     temp/* dosyaları analiz sonrası silinir.
+    Eşzamanlı analiz sayısı `admission` ile sınırlıdır; kuyruk doluysa 429/503 + Retry-After.
+    """
+    # 👇 burada daha toleranslı parse edelim
+    if filenames.startswith("[") and filenames.endswith("]"):
+        try:
+            file_list = json.loads(filenames)
+            file_list = [fn.strip('"').strip("'") for fn in file_list]
+
+        except Exception:
+            # fallback: virgül ayrılmışsa split et
+            file_list = [x.strip() for x in filenames.strip("[]").split(",")]
+    else:
+        # tek dosya adı geldiyse listeye çevir
+        file_list = [filenames]
+
+    if not run_group or not run_group.strip():
+        raise HTTPException(status_code=400, detail="run_group (Klasör adı) zorunlu.")
+
+    async with admitted(len(file_list)) as ticket:
+        result = await _run_analysis(
+            file_list, run_group,
+            model_name=model_name, confidence=confidence, iou=iou, max_det=max_det,
+            min_box_area=min_box_area, resize_long_side=resize_long_side, jpg_quality=jpg_quality,
+        )
+        ticket.inferred = result["summary"]["total_images"]
+        return result
+
+
+@app.post("/analyze/upload")
+async def analyze_upload(
+    files: List[UploadFile] = File(...),
+    run_group: str    = Form("Quick Check"),
+    model_name: str   = Form("best.pt"),
+    confidence: float = Form(0.25),
+    iou: float        = Form(0.5),
+    max_det: int      = Form(300),
+    min_box_area: int = Form(50),
+    resize_long_side: int = Form(640),
+    jpg_quality: int  = Form(95),
+    keep_uploads: bool = Form(False),
+):
+    """
+    Tek istekte yükle + analiz et: görseller uploads/'a yazılmadan bellekten işlenir,
+    sadece run'ın ihtiyacı olanlar (processed_*.jpg, run.json, detections.npz) kalıcıdır.
+    keep_uploads=true orijinalleri de uploads/'a kaydeder (kırpım dışa aktarımı ve /analyze ile yeniden işleme için).
+    Yanıt /analyze ile aynıdır; kuyruk limiti de aynı.
     """
+    if not run_group or not run_group.strip():
+        raise HTTPException(status_code=400, detail="run_group (Klasör adı) zorunlu.")
+
+    async with admitted(len(files)) as ticket:
+        result = await _run_analysis(
+            [], run_group,
+            model_name=model_name, confidence=confidence, iou=iou, max_det=max_det,
+            min_box_area=min_box_area, resize_long_side=resize_long_side, jpg_quality=jpg_quality,
+            uploads=files, keep_uploads=keep_uploads,
+        )
+        ticket.inferred = result["summary"]["total_images"]
+        return result
+
+
+@app.get("/analyze/queue")
+def analyze_queue():
+    """Anlık kuyruk derinliği ve tahmini bekleme süresi."""
+    return admission.status()
+
+
+@app.get("/analyze/memory")
+def analyze_memory():
+    """Süreç RSS'i, bellek bütçesi ve süren decode sayısı."""
+    return decode_budget.status()
+
+
+def _write_run_json(path: Path, meta: Dict[str, Any], items) -> None:
+    """run.json'ı yazar; "items" listesi bellekte kurulmadan satır satır eklenir."""
+    head = json.dumps(meta, ensure_ascii=False, indent=2)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(head[:-2] + ',\n  "items": [')
+        for i, item in enumerate(items):
+            f.write(("," if i else "") + "\n    " + json.dumps(item, ensure_ascii=False))
+        f.write("\n  ]\n}")
+    tmp.replace(path)
+
+
+def _retarget_derived(runs, group_slug: str, run_id: Optional[str] = None) -> None:
+    """Yeniden adlandırılan kaynağa işaret eden türetilmiş run'ların run.json'ı (rebuild de doğru kursun)."""
+    for slug, rid in runs or []:
+        meta_file = RESULTS_DIR / slug / rid / "run.json"
+        try:
+            meta = json.loads(meta_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        src = meta.get("derived_from")
+        if not isinstance(src, dict):
+            continue
+        src["group_slug"] = group_slug
+        if run_id is not None:
+            src["run_id"] = run_id
+        _write_run_json(meta_file, meta, meta.pop("items", []))
+
+
+async def _finish_run(spool: RunSpool, run_dir: Path, run_started: float, run_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Spool'dan run.json + detections.npz + indeks; yanıt: özet ve sonuçların ilk sayfası."""
+    group_slug, run_id = run_meta["group_slug"], run_meta["run_id"]
+    item_keys = ("processed_path", "filename", "detection_count", "timings_ms", "memory_mb")
+    await asyncio.to_thread(
+        _write_run_json, run_dir / "run.json", run_meta,
+        ({k: it[k] for k in item_keys} for it in spool.items()),
+    )
+
+    # tüm tespitler kompakt binary olarak (rapor için istemcinin tekrar göndermesi gerekmez)
+    t0 = time.perf_counter()
+    await asyncio.to_thread(spool.finish)
+    metrics.stage_seconds.observe(time.perf_counter() - t0, stage="run.save_detections")
+
+    # indeks: run + görseller + tespitler tek transaction (spool'dan akış halinde)
+    t0 = time.perf_counter()
     try:
-        # 👇 burada daha toleranslı parse edelim
-        if filenames.startswith("[") and filenames.endswith("]"):
-            try:
-                file_list = json.loads(filenames)
-                file_list = [fn.strip('"').strip("'") for fn in file_list]
+        stats = spc.run_stats_from_detections(spool.detections(), spool.n_images)
+        await asyncio.to_thread(run_index.index_run, run_meta, spool.iter_results(), stats)
+    except sqlite3.Error as e:
+        logger.warning(f"Run index update failed (POST /history/reindex ile düzeltilebilir): {e}")
+    metrics.stage_seconds.observe(time.perf_counter() - t0, stage="run.index")
+    metrics.observe_run(time.perf_counter() - run_started, run_meta["summary"]["class_counts"])
+
+    page = ANALYZE_RESULTS_PAGE
+    results = await asyncio.to_thread(
+        load_run_results, run_dir, model_handler.class_names, UPLOADS_DIR, 0, page,
+    )
+    return {
+        "message": "Analysis completed successfully",
+        "results": results or [],
+        "results_page": _results_page(group_slug, run_id, 0, page, spool.n_images),
+        "summary": run_meta["summary"],
+        "timings": run_meta["timings"],
+        "memory": {k: v for k, v in run_meta["memory"].items() if k != "stages"},
+        "run": {"group_slug": group_slug, "group_name": run_meta["group_name"], "run_id": run_id},
+    }
 
-            except Exception:
-                # fallback: virgül ayrılmışsa split et
-                file_list = [x.strip() for x in filenames.strip("[]").split(",")]
-        else:
-            # tek dosya adı geldiyse listeye çevir
-            file_list = [filenames]
 
-        if not run_group or not run_group.strip():
-            raise HTTPException(status_code=400, detail="run_group (Klasör adı) zorunlu.")
+def _results_page(group_slug: str, run_id: str, offset: int, limit: int, total: int) -> Dict[str, Any]:
+    nxt = offset + limit
+    return {
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "next": f"/history/{group_slug}/{run_id}/results?offset={nxt}&limit={limit}" if nxt < total else None,
+    }
+
 
-        logger.info(f"Received file list: {file_list}")
+async def _run_analysis(
+    file_list: List[str],
+    run_group: str,
+    model_name: str,
+    confidence: float,
+    iou: float,
+    max_det: int,
+    min_box_area: int,
+    resize_long_side: int,
+    jpg_quality: int,
+    uploads: Optional[List[UploadFile]] = None,
+    keep_uploads: bool = False,
+) -> Dict[str, Any]:
+    """
+    file_list: uploads/ klasöründeki dosyalar; uploads: istek gövdesindeki dosyalar
+    (diske yazılmadan bellekte işlenir, keep_uploads ise orijinaller uploads/'a kaydedilir).
+    """
+    try:
+        logger.info(f"Received file list: {file_list or [f.filename for f in uploads or []]}")
+        run_started = time.perf_counter()
         group_slug = slugify(run_group)
         run_id     = datetime.now().strftime("%Y%m%d_%H%M%S")
 
@@ -251,99 +652,174 @@ async def analyze_images(
             if not ok:
                 raise HTTPException(status_code=500, detail=f"Model load failed: {model_name}")
 
-        results_out: List[Dict[str, Any]] = []
-        total_dets = 0
-
-        for fn in file_list:
-            src_path = UPLOADS_DIR / fn
-            if not src_path.exists():
-                logger.warning(f"File not found: {src_path}")
-                continue
-
-            # 1) TIFF->JPG + resize -> temp
-            conv = await file_manager.convert_to_jpg_resized(
-                str(src_path),
-                dst_dir=str(TEMP_DIR),
-                long_side=int(resize_long_side),
-                quality=int(jpg_quality),
-            )
-            if not conv.get("success", False):
-                logger.error(f"Convert failed: {fn} -> {conv.get('error')}")
-               
-                continue
-
-            pred_input = conv["path"]  # TEMP_DIR/...jpg
-
-            # 2) YOLO inference
-            dets = await model_handler.predict(
-                pred_input,
-                confidence_threshold=float(confidence),
-                iou=float(iou),
-                max_det=int(max_det),
-                min_box_area=int(min_box_area),
-            )
-
-            # 3) processed kaydet: RESULTS_DIR/<group>/<run_id>/processed_<name>.jpg
-            processed_filename = "processed_" + Path(pred_input).name
-            processed_path_fs  = run_dir / processed_filename
-            await image_processor.draw_detections(pred_input, dets, str(processed_path_fs))
-
-            total_dets += len(dets)
-
-            # frontend'in image src'si: `${API}/static/${processed_path}`
-            processed_rel_for_static = str(Path("results") / group_slug / run_id / processed_filename)
-
-            results_out.append({
-                "id": f"result_{len(results_out)}",
-                "filename": Path(pred_input).name,     # görüntülenen isim
-                "original_path": str(src_path),        # bilgi amaçlı
-                "processed_path": processed_rel_for_static,
-                "detections": dets,
-                "detection_count": len(dets),
-            })
+        # görsel başına sonuçlar run klasörüne yazılır (spool); bellekte sadece özetler.
+        # Tahmin taban eşikte yapılır; run'ın tespitleri confidence / min_box_area ile süzülür
+        raw_confidence = min(float(confidence), RAW_CONFIDENCE_FLOOR)
+        raw_floor = (raw_confidence, 0) if (raw_confidence < float(confidence) or min_box_area > 0) else None
+        spool = RunSpool(run_dir, raw_floor=raw_floor)
+        class_totals = np.zeros(len(model_handler.class_names), dtype=np.int64)
+        run_timings = TimingSummary()
+        run_memory_stages: Dict[str, Dict[str, float]] = {}
+        decode_levels = {"n": 0, "sum": 0, "max": 0}
+
+        async def convert(name: str, src_path: Optional[Path], upload: Optional[UploadFile],
+                          timings: Dict[str, float], mem: Dict[str, Dict[str, float]]):
+            # bellek bütçesi izin verdiği kadar görsel aynı anda decode edilir
+            need = await asyncio.to_thread(estimate_decode_bytes, src_path if upload is None else upload.file)
+            async with decode_budget.reserve(need) as level:
+                decode_levels["n"] += 1
+                decode_levels["sum"] += level
+                decode_levels["max"] = max(decode_levels["max"], level)
+                with memory_probe.stage(mem, "convert"):
+                    if upload is None:
+                        return await file_manager.convert_to_jpg_resized(
+                            str(src_path),
+                            dst_dir=str(TEMP_DIR),
+                            long_side=int(resize_long_side),
+                            quality=int(jpg_quality),
+                            timings=timings,
+                        )
+                    content = await upload.read()
+                    keep_path = stamp = None
+                    if keep_uploads:
+                        # /upload-images ile aynı biçimde (uploads/<ad>.jpg); kareyle aynı decode'dan, thread'de
+                        keep_path = UPLOADS_DIR / f"{Path(name).stem}.jpg"
+                        stamp = uploads_catalog.stamp()
+                    conv = await file_manager.frame_from_bytes(
+                        content, long_side=int(resize_long_side), quality=int(jpg_quality), timings=timings,
+                        keep_path=keep_path,
+                    )
+                    conv["original_path"] = conv.pop("kept_path", "")
+                    if conv["original_path"]:
+                        await asyncio.to_thread(uploads_catalog.add, keep_path, stamp)
+                    return conv
+
+        # 1) TIFF->JPG + resize (temp/ ya da bellek): sıradaki görseller inference sürerken ön-okunur
+        pending: deque = deque()
+        remaining = iter(
+            [(fn, UPLOADS_DIR / fn, None) for fn in file_list]
+            # adsız yüklemeler birbirinin upload'ını / processed görselini ezmesin
+            + [(Path(f.filename).name if f.filename else f"image_{i + 1}", None, f) for i, f in enumerate(uploads or [])]
+        )
 
-            # 4) temizlik: temp + uploads
+        def schedule():
+            while len(pending) < decode_budget.max_parallel:
+                fn, src_path, upload = next(remaining, (None, None, None))
+                if fn is None:
+                    return
+                if upload is None and not src_path.exists():
+                    logger.warning(f"File not found: {src_path}")
+                    continue
+                # aşama süreleri (convert.* / predict.* / draw.*), saniye; bellek: convert / predict / draw
+                timings: Dict[str, float] = {}
+                mem: Dict[str, Dict[str, float]] = {}
+                task = asyncio.create_task(convert(fn, src_path, upload, timings, mem))
+                pending.append((fn, src_path, timings, mem, task))
+
+        with memory_probe.run() as run_memory:
             try:
-                Path(pred_input).unlink(missing_ok=True)
-              #  src_path.unlink(missing_ok=True)
-            except Exception as e:
-                logger.warning(f"Cleanup warning: {e}")
-
-        # Özet ve metadata
-        class_counts: Dict[str, int] = {"Krater": 0, "Tanecik": 0, "Pinhol": 0}
-        for r in results_out:
-            for d in r["detections"]:
-                class_counts[d["class_name"]] = class_counts.get(d["class_name"], 0) + 1
-
-        run_meta = {
-            "group_name": run_group,
-            "group_slug": group_slug,
-            "run_id": run_id,
-            "created_at": datetime.now().isoformat(),
-            "params": {"model_name": model_name, "confidence": confidence, "iou": iou, "max_det": max_det},
-            "summary": {
-                "total_images": len(results_out),
-                "total_detections": total_dets,
-                "class_counts": class_counts,
-            },
-            "items": [
-                {
-                    "processed_path": r["processed_path"],
-                    "filename": r["filename"],
-                    "detection_count": r["detection_count"],
-                }
-                for r in results_out
-            ],
-        }
-        with open(run_dir / "run.json", "w", encoding="utf-8") as f:
-            json.dump(run_meta, f, ensure_ascii=False, indent=2)
-
-        return {
-            "message": "Analysis completed successfully",
-            "results": results_out,
-            "summary": run_meta["summary"],
-            "run": {"group_slug": group_slug, "group_name": run_group, "run_id": run_id},
-        }
+                schedule()
+                while pending:
+                    fn, src_path, timings, mem, task = pending.popleft()
+                    conv = await task
+                    schedule()
+                    if not conv.get("success", False):
+                        logger.error(f"Convert failed: {fn} -> {conv.get('error')}")
+                        continue
+
+                    frame = conv.get("image")  # bellekten gelen kare (yoksa temp/ dosyası)
+                    pred_input = conv.get("path") or str(TEMP_DIR / f"{Path(fn).stem}.jpg")  # TEMP_DIR/...jpg
+                    predict_params = dict(
+                        confidence_threshold=raw_confidence,
+                        iou=float(iou),
+                        max_det=int(max_det),
+                        min_box_area=0,
+                        timings=timings,
+                    )
+
+                    # 2) YOLO inference
+                    with memory_probe.stage(mem, "predict"):
+                        if frame is not None:
+                            raw = await model_handler.predict_image(frame, **predict_params)
+                        else:
+                            raw = await model_handler.predict(pred_input, **predict_params)
+                        dets = raw[detection_mask(raw, confidence, min_box_area)]
+
+                    # 3) processed kaydet: RESULTS_DIR/<group>/<run_id>/processed_<name>.jpg
+                    processed_filename = "processed_" + Path(pred_input).name
+                    processed_path_fs  = run_dir / processed_filename
+                    with memory_probe.stage(mem, "draw"):
+                        if frame is not None:
+                            await image_processor.draw_detections_image(frame, dets, str(processed_path_fs), timings=timings)
+                        else:
+                            await image_processor.draw_detections(pred_input, dets, str(processed_path_fs), timings=timings)
+                    del frame
+
+                    class_totals += np.bincount(dets["class_id"], minlength=len(class_totals))[:len(class_totals)]
+
+                    # frontend'in image src'si: `${API}/static/${processed_path}`
+                    processed_rel_for_static = str(Path("results") / group_slug / run_id / processed_filename)
+
+                    spool.add(dets, {
+                        "filename": Path(pred_input).name,     # görüntülenen isim
+                        "original_path": str(src_path) if src_path else conv.get("original_path", ""),  # bilgi amaçlı
+                        "processed_path": processed_rel_for_static,
+                        "timings_ms": {k: round(v * 1000, 2) for k, v in timings.items()},
+                        "memory_mb": mem,
+                    }, raw=raw)
+                    run_timings.add(timings)
+                    merge_memory(run_memory_stages, mem)
+                    metrics.observe_image(timings)
+
+                    # 4) temizlik: temp + uploads
+                    try:
+                        if frame_from_disk := conv.get("path"):
+                            Path(frame_from_disk).unlink(missing_ok=True)
+                      #  src_path.unlink(missing_ok=True)
+                    except Exception as e:
+                        logger.warning(f"Cleanup warning: {e}")
+            finally:
+                for *_, task in pending:
+                    task.cancel()
+
+        try:
+            return await _finish_run(
+                spool, run_dir, run_started,
+                run_meta={
+                    "group_name": run_group,
+                    "group_slug": group_slug,
+                    "run_id": run_id,
+                    "created_at": datetime.now().isoformat(),
+                    "params": {
+                        "model_name": model_name, "confidence": confidence, "iou": iou, "max_det": max_det,
+                        "min_box_area": min_box_area, "resize_long_side": resize_long_side, "jpg_quality": jpg_quality,
+                        "raw_confidence_floor": raw_confidence if spool.n_raw > spool.n_detections else None,
+                    },
+                    "summary": {
+                        "total_images": spool.n_images,
+                        "total_detections": spool.n_detections,
+                        "class_counts": {
+                            name: int(class_totals[cid]) for cid, name in model_handler.class_names.items()
+                        },
+                    },
+                    "timings": {
+                        "wall_ms": round((time.perf_counter() - run_started) * 1000, 2),
+                        "stages": run_timings.summary(),
+                    },
+                    "memory": {
+                        **run_memory,
+                        "budget_mb": round(decode_budget.budget_bytes / MB, 1) if decode_budget.budget_bytes else None,
+                        "decode_parallelism": {
+                            "limit": decode_budget.max_parallel,
+                            "max": decode_levels["max"],
+                            "mean": round(decode_levels["sum"] / decode_levels["n"], 2) if decode_levels["n"] else 0,
+                        },
+                        "stages": run_memory_stages,
+                    },
+                },
+            )
+        finally:
+            spool.close()
 
     except HTTPException:
         raise
@@ -354,8 +830,155 @@ async def analyze_images(
 # --- geçmiş / history API'leri ---
 
 @app.get("/history")
-async def history_list(q: Optional[str] = Query(None, description="Arama (grup veya run_id)")):
-    return await file_manager.list_history(query=q)
+async def history_list(
+    q: Optional[str] = Query(None, description="Arama (grup veya run_id)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Sayfa boyutu (boşsa hepsi)"),
+    offset: int = Query(0, ge=0),
+):
+    if not warmup.done("index"):
+        # İndeks kurulurken boş liste yerine diskten tara (sayfalama yok, tüm liste)
+        return await file_manager.list_history(query=q)
+    try:
+        return await asyncio.to_thread(run_index.list_history, q, limit, offset)
+    except sqlite3.Error as e:
+        logger.warning(f"Run index query failed, falling back to disk scan: {e}")
+        return await file_manager.list_history(query=q)
+
+@app.post("/history/reindex")
+async def history_reindex():
+    """SQLite indeksini results klasöründen yeniden kurar."""
+    stats = await asyncio.to_thread(run_index.rebuild)
+    return {"success": True, **stats}
+
+@app.get("/detections/query")
+async def detections_query(
+    class_name: Optional[List[str]] = Query(None, description="Kusur türü (tekrarlanabilir): Krater, Tanecik, Pinhol"),
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    max_confidence: Optional[float] = Query(None, ge=0, le=1),
+    min_area: Optional[int] = Query(None, ge=0, description="piksel²"),
+    max_area: Optional[int] = Query(None, ge=0, description="piksel²"),
+    region: Optional[str] = Query(None, description="x1,y1,x2,y2 (işlenmiş görsel pikselleri)"),
+    region_mode: str = Query("intersects", pattern="^(intersects|within)$"),
+    group: Optional[List[str]] = Query(None, description="group_slug (tekrarlanabilir)"),
+    run_id: Optional[str] = Query(None),
+    date_from: Optional[str] = Query(None, description="ISO tarih, ör. 2025-01-01"),
+    date_to: Optional[str] = Query(None, description="ISO tarih (dahil)"),
+    sort: str = Query("confidence", pattern="^(confidence|area|created_at)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(100, ge=1, le=5000),
+    offset: int = Query(0, ge=0),
+):
+    """Tüm kayıtlı tespitler üzerinde filtreli sorgu (sütun dizileri + uzamsal grid)."""
+    require_index()
+    box = None
+    if region:
+        try:
+            box = tuple(int(float(v)) for v in region.split(","))
+            if len(box) != 4:
+                raise ValueError
+        except ValueError:
+            raise HTTPException(status_code=400, detail="region must be x1,y1,x2,y2")
+
+    try:
+        return await asyncio.to_thread(
+            detection_query.query,
+            class_names=class_name, min_confidence=min_confidence, max_confidence=max_confidence,
+            min_area=min_area, max_area=max_area, region=box, region_mode=region_mode,
+            groups=group, run_id=run_id, date_from=date_from, date_to=date_to,
+            sort=sort, descending=(order == "desc"), limit=limit, offset=offset,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/export/detections")
+async def export_detections(
+    format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    run: Optional[List[str]] = Query(None, description="<group_slug>/<run_id> (tekrarlanabilir)"),
+    group: Optional[List[str]] = Query(None, description="group_slug: gruptaki tüm run'lar (tekrarlanabilir)"),
+    class_name: Optional[List[str]] = Query(None, description="Kusur türü (tekrarlanabilir)"),
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    crops: bool = Query(False, description="Kusur kırpıntılarını (crops/) zip'e ekle"),
+):
+    """
+    Kayıtlı tespitleri akış halinde dışa aktarır: csv | ndjson | coco | yolo (zip).
+    crops=true ile çıktı zip olur: detections.<ext> + crops/<group>/<run>/*.jpg
+    """
+    runs = []
+    for r in run or []:
+        group_slug, _, run_id = r.partition("/")
+        if not group_slug or not run_id:
+            raise HTTPException(status_code=400, detail=f"Invalid run: {r}")
+        runs.append((group_slug, run_id))
+    if group:
+        require_index()
+        runs.extend(await asyncio.to_thread(run_index.group_runs, group))
+    if not runs:
+        raise HTTPException(status_code=400, detail="run or group is required")
+    missing = [f"{g}/{r}" for g, r in runs if not (RESULTS_DIR / g / r).is_dir()]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Run not found: {', '.join(missing)}")
+
+    class_ids = None
+    if class_name:
+        wanted = {n.lower() for n in class_name}
+        class_ids = [i for i, n in model_handler.class_names.items() if n.lower() in wanted]
+        if not class_ids:
+            raise HTTPException(status_code=400, detail=f"Unknown class_name: {', '.join(class_name)}")
+
+    body, media_type, filename = detection_exporter.export(
+        format, list(dict.fromkeys(runs)), crops=crops, class_ids=class_ids, min_confidence=min_confidence
+    )
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"},
+    )
+
+# --- profiller ---
+
+@app.get("/profiles")
+def profiles_list():
+    """Son alınan istek profilleri (en yeni önce)."""
+    return {"enabled": profiler.enabled, "items": profiler.list()}
+
+@app.get("/profiles/{filename}")
+def profiles_download(filename: str):
+    p = profiler.path_for(filename)
+    if p is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(p, filename=p.name, media_type="application/octet-stream")
+
+# --- SPC / trend izleme ---
+
+@app.get("/spc/groups")
+async def spc_groups():
+    """Grup başına artımlı SPC toplamları (görsel başına kusur ortalaması/varyansı, sınıf histogramı)."""
+    require_index()
+    return {"groups": await asyncio.to_thread(run_index.spc_groups, model_handler.class_names)}
+
+@app.get("/spc/{group_slug}/trend")
+async def spc_trend(
+    group_slug: str,
+    class_name: Optional[str] = Query(None, description="Tek kusur türü (boşsa tüm kusurlar)"),
+    date_from: Optional[str] = Query(None, description="ISO tarih, ör. 2025-01-01"),
+    date_to: Optional[str] = Query(None, description="ISO tarih (dahil)"),
+    sigma: float = Query(3.0, gt=0, le=6),
+):
+    """Run başına kusur trendi + X̄ kartı kontrol sınırları (özet tablolarından, tespit taraması yok)."""
+    require_index()
+    class_id = None
+    if class_name:
+        ids = [i for i, n in model_handler.class_names.items() if n.lower() == class_name.lower()]
+        if not ids:
+            raise HTTPException(status_code=400, detail=f"Unknown class_name: {class_name}")
+        class_id = ids[0]
+
+    data = await asyncio.to_thread(
+        run_index.spc_trend, group_slug, model_handler.class_names, class_id, date_from, date_to, sigma
+    )
+    if data is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return data
 
 @app.get("/history/{group_slug}/{run_id}")
 async def history_details(group_slug: str, run_id: str):
@@ -364,6 +987,244 @@ async def history_details(group_slug: str, run_id: str):
         raise HTTPException(status_code=404, detail="Run not found")
     return data
 
+@app.get("/history/{group_slug}/{run_id}/results")
+async def history_results(
+    group_slug: str,
+    run_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=5000),
+):
+    """Run'ın görsel başına sonuçları (/analyze 'results' formatı), sayfa sayfa."""
+    run_dir = RESULTS_DIR / group_slug / run_id
+    total = await asyncio.to_thread(run_image_count, run_dir)
+    if total is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    results = await asyncio.to_thread(
+        load_run_results, run_dir, model_handler.class_names, UPLOADS_DIR, offset, limit,
+    )
+    return {"results": results, **_results_page(group_slug, run_id, offset, limit, total)}
+
+
+def _raw_source(group_slug: str, run_id: str):
+    """Yeniden eşikleme kaynağı: (run klasörü, run.json, ham DetectionSet, (taban güven, taban alan))."""
+    run_dir = RESULTS_DIR / group_slug / run_id
+    meta_file = run_dir / "run.json"
+    loaded = load_raw_detections(run_dir, UPLOADS_DIR)
+    if loaded is None or not meta_file.exists():
+        return None
+    meta = json.loads(meta_file.read_text(encoding="utf-8"))
+    meta.pop("items", None)
+    raw, floor = loaded
+    if floor is None:
+        # ham küme saklanmamış: taban run'ın kendi eşiği
+        params = meta.get("params") or {}
+        floor = (float(params.get("confidence", 0.0)), int(params.get("min_box_area") or 0))
+    return run_dir, meta, raw, floor
+
+
+def _check_floor(floor, confidence: float, min_box_area: int):
+    if confidence < floor[0] or min_box_area < floor[1]:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Run stores detections down to confidence {floor[0]} / min_box_area {floor[1]}; "
+                "looser thresholds need a new /analyze"
+            ),
+        )
+
+
+@app.get("/history/{group_slug}/{run_id}/sweep")
+async def history_sweep(
+    group_slug: str,
+    run_id: str,
+    thresholds: Optional[str] = Query(None, description="Virgülle ayrılmış güven eşikleri (boşsa start/stop/step)"),
+    start: Optional[float] = Query(None, ge=0, le=1, description="Varsayılan: run'ın taban eşiği"),
+    stop: float = Query(0.95, ge=0, le=1),
+    step: float = Query(0.05, gt=0, le=1),
+    min_box_area: Optional[int] = Query(None, ge=0, description="Varsayılan: run'ın min_box_area'sı"),
+):
+    """Eşik ızgarası boyunca sınıf başına tespit sayısı (saklanan ham tespitlerden, inference yok)."""
+    src = await asyncio.to_thread(_raw_source, group_slug, run_id)
+    if src is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    _, meta, raw, floor = src
+    if min_box_area is None:
+        min_box_area = max(int((meta.get("params") or {}).get("min_box_area") or 0), floor[1])
+
+    if thresholds:
+        try:
+            grid = sorted({float(t) for t in thresholds.split(",") if t.strip()})
+        except ValueError:
+            raise HTTPException(status_code=400, detail="thresholds must be comma separated numbers")
+    else:
+        lo = floor[0] if start is None else start
+        grid = [round(float(t), 6) for t in np.arange(lo, stop + step / 2, step)]
+    if not grid or len(grid) > 1000 or grid[-1] > 1:
+        raise HTTPException(status_code=400, detail="Need 1-1000 thresholds in [floor, 1]")
+    _check_floor(floor, grid[0], min_box_area)
+
+    sweep = await asyncio.to_thread(
+        threshold_sweep, raw.dets, grid, len(model_handler.class_names), len(raw), min_box_area,
+    )
+    counts = sweep["class_counts"]
+    return {
+        "run": {"group_slug": group_slug, "run_id": run_id},
+        "floor": {"confidence": floor[0], "min_box_area": floor[1]},
+        "min_box_area": min_box_area,
+        "total_images": len(raw),
+        "thresholds": grid,
+        "class_counts": {name: counts[cid].tolist() for cid, name in model_handler.class_names.items()},
+        "total_detections": counts.sum(axis=0).tolist(),
+        "images_with_detections": sweep["images_with_detections"].tolist(),
+    }
+
+
+@app.post("/history/{group_slug}/{run_id}/refilter")
+async def history_refilter(
+    group_slug: str,
+    run_id: str,
+    confidence: float = Form(...),
+    min_box_area: Optional[int] = Form(None),
+    run_group: Optional[str] = Form(None),
+):
+    """
+    Saklanan ham tespitlerden daha sıkı eşikle yeni (türetilmiş) run: sayımlar, işaretli
+    görseller, run.json / detections.npz / indeks; raporlar diğer run'lar gibi üretilir.
+    Model kullanılmaz. Görseller uploads/'taki orijinalden yeniden çizilir; orijinal
+    silinmişse kaynak görselle aynı boyutta boş kare üzerine yeni kutular çizilir
+    (kaynağın işaretli görseli eski eşikle çizildiği için kullanılmaz).
+    """
+    src = await asyncio.to_thread(_raw_source, group_slug, run_id)
+    if src is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    src_dir, src_meta, raw, floor = src
+    params = dict(src_meta.get("params") or {})
+    if min_box_area is None:
+        min_box_area = int(params.get("min_box_area") or 0)
+    if not 0 <= confidence <= 1 or min_box_area < 0:
+        raise HTTPException(status_code=400, detail="confidence must be in [0, 1], min_box_area >= 0")
+    _check_floor(floor, confidence, min_box_area)
+
+    # ticket.inferred boş kalır: çıkarım yok, görsel başı süre tahminine katılmaz
+    async with admitted(len(raw), "Refilter"):
+        return await _refilter_run(
+            src_dir, src_meta, raw, floor, confidence, min_box_area,
+            run_group or src_meta.get("group_name") or group_slug,
+        )
+
+
+def _placeholder_frame(like: Path) -> Optional[np.ndarray]:
+    """Orijinali olmayan görsel için, işaretli görselle aynı boyutta gri kare + not."""
+    try:
+        with Image.open(like) as im:
+            width, height = im.size
+    except (OSError, ValueError):
+        return None
+    blank = Image.new("RGB", (width, height), (96, 96, 96))
+    ImageDraw.Draw(blank).text((10, max(0, height - 20)), "original image unavailable", fill=(230, 230, 230))
+    return np.asarray(blank)[:, :, ::-1].copy()  # BGR (cv2 çizimi)
+
+
+async def _refilter_run(
+    src_dir: Path,
+    src_meta: Dict[str, Any],
+    raw: DetectionSet,
+    floor,
+    confidence: float,
+    min_box_area: int,
+    run_group: str,
+) -> Dict[str, Any]:
+    run_started = time.perf_counter()
+    params = dict(src_meta.get("params") or {})
+    group_slug = slugify(run_group)
+    # aynı saniyede birden çok türetme olabilir: kaynak ya da önceki türetmenin üzerine yazma
+    base_id = run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    n = 2
+    while (RESULTS_DIR / group_slug / run_id).exists():
+        run_id, n = f"{base_id}-{n}", n + 1
+    run_dir = RESULTS_DIR / group_slug / run_id
+    run_dir.mkdir(parents=True)
+
+    filtered = raw.filter(confidence, min_box_area)
+    long_side = int(params.get("resize_long_side") or 640)
+    quality = int(params.get("jpg_quality") or 95)
+    spool = RunSpool(run_dir, raw_floor=floor)
+    run_timings = TimingSummary()
+    missing: List[str] = []
+    try:
+        with memory_probe.run() as run_memory:
+            for i in range(len(raw)):
+                timings: Dict[str, float] = {}
+                dets = filtered.image(i)
+                processed_name = Path(raw.processed_paths[i]).name
+                out_path = run_dir / processed_name
+                original = raw.original_paths[i]
+                conv = (
+                    await file_manager.frame_from_file(original, long_side=long_side, quality=quality, timings=timings)
+                    if original and Path(original).is_file() else {"success": False}
+                )
+                if conv["success"]:
+                    await image_processor.draw_detections_image(conv["image"], dets, str(out_path), timings=timings)
+                else:
+                    # orijinal yok: kaynak görsel eski eşikle çizildi, yeni tespitlerle çelişir;
+                    # aynı boyutta boş kareye yeni kutular (görsel de yoksa atlanır)
+                    missing.append(raw.filenames[i])
+                    blank = await asyncio.to_thread(_placeholder_frame, src_dir / processed_name)
+                    if blank is not None:
+                        await image_processor.draw_detections_image(blank, dets, str(out_path), timings=timings)
+                del conv
+
+                spool.add(dets, {
+                    "filename": raw.filenames[i],
+                    "original_path": original,
+                    "processed_path": str(Path("results") / group_slug / run_id / processed_name),
+                    "timings_ms": {k: round(v * 1000, 2) for k, v in timings.items()},
+                    "memory_mb": {},
+                }, raw=raw.image(i))
+                run_timings.add(timings)
+
+        class_totals = np.bincount(filtered.dets["class_id"], minlength=len(model_handler.class_names))
+        response = await _finish_run(
+            spool, run_dir, run_started,
+            run_meta={
+                "group_name": run_group,
+                "group_slug": group_slug,
+                "run_id": run_id,
+                "created_at": datetime.now().isoformat(),
+                "params": {
+                    **params,
+                    "confidence": confidence,
+                    "min_box_area": min_box_area,
+                    "raw_confidence_floor": floor[0] if spool.n_raw > spool.n_detections else None,
+                },
+                "derived_from": {
+                    "group_slug": src_dir.parent.name,
+                    "run_id": src_dir.name,
+                    "missing_originals": len(missing),
+                },
+                "summary": {
+                    "total_images": spool.n_images,
+                    "total_detections": spool.n_detections,
+                    "class_counts": {
+                        name: int(class_totals[cid]) for cid, name in model_handler.class_names.items()
+                    },
+                },
+                "timings": {
+                    "wall_ms": round((time.perf_counter() - run_started) * 1000, 2),
+                    "stages": run_timings.summary(),
+                },
+                "memory": run_memory,
+            },
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Refilter error")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        spool.close()
+    return {**response, "derived_from": {"group_slug": src_dir.parent.name, "run_id": src_dir.name}, "missing_originals": missing}
+
 @app.post("/history/{group_slug}/{run_id}/zip")
 async def history_zip(group_slug: str, run_id: str):
     z = await file_manager.zip_run(group_slug, run_id)
@@ -371,19 +1232,69 @@ async def history_zip(group_slug: str, run_id: str):
         raise HTTPException(status_code=500, detail=z.get("error", "zip failed"))
     return {"download_url": z["download_url"]}
 
+@app.get("/history/{group_slug}/{run_id}/zip")
+async def history_zip_stream(group_slug: str, run_id: str):
+    entries = file_manager.run_zip_entries(group_slug, run_id)
+    if entries is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return zip_response(entries, f"{group_slug}__{run_id}.zip")
+
+@app.get("/history/zip")
+async def history_zip_multiple_stream(run: List[str] = Query(..., description="<group_slug>/<run_id> (tekrarlanabilir)")):
+    """Birden çok run tek zip akışında: <group>__<run_id>/processed_images/..."""
+    runs = []
+    for r in run:
+        group_slug, _, run_id = r.partition("/")
+        if not group_slug or not run_id:
+            raise HTTPException(status_code=400, detail=f"Invalid run: {r}")
+        runs.append((group_slug, run_id))
+    return zip_response(file_manager.runs_zip_entries(runs), f"history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip")
+
+@app.post("/history/zip-multiple")
+async def history_zip_multiple(items: list[dict] = Body(...)):
+    """Seçili run'lar için indirme adresi döner (GET /history/zip?run=...)."""
+    runs = [f"{i.get('group_slug')}/{i.get('run_id')}" for i in items if i.get("group_slug") and i.get("run_id")]
+    if not runs:
+        raise HTTPException(status_code=400, detail="No runs selected")
+    return {"download_url": "/history/zip?" + "&".join(f"run={quote(r)}" for r in runs)}
+
 @app.delete("/history/{group_slug}/{run_id}")
 async def history_delete(group_slug: str, run_id: str):
     ok = await file_manager.delete_run(group_slug, run_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Run not found or cannot delete")
+    await sync_index(f"delete {group_slug}/{run_id}", run_index.delete_run, group_slug, run_id)
     return {"success": True}
 
+@app.post("/history/{group_slug}/{run_id}/pin")
+async def history_pin(group_slug: str, run_id: str):
+    if not await file_manager.set_pinned(group_slug, run_id, True):
+        raise HTTPException(status_code=404, detail="Run not found")
+    return {"success": True, "pinned": True}
+
+@app.delete("/history/{group_slug}/{run_id}/pin")
+async def history_unpin(group_slug: str, run_id: str):
+    if not await file_manager.set_pinned(group_slug, run_id, False):
+        raise HTTPException(status_code=404, detail="Run not found")
+    return {"success": True, "pinned": False}
+
+@app.get("/maintenance/retention")
+def retention_status():
+    return retention.status()
+
+@app.post("/maintenance/retention/run")
+async def retention_run(dry_run: bool = Query(False)):
+    """Kotaları hemen uygular; dönen rapor kazanılan alanı içerir."""
+    return await asyncio.to_thread(retention.run_once, dry_run)
+
 @app.post("/history/rename-group")
 async def history_rename_group(old_group_slug: str = Form(...), new_group_name: str = Form(...)):
     new_slug = slugify(new_group_name)
     ok = await file_manager.rename_group(old_group_slug, new_slug, new_group_name)
     if not ok:
         raise HTTPException(status_code=404, detail="Group not found or cannot rename")
+    derived = await sync_index(f"rename {old_group_slug}", run_index.rename_group, old_group_slug, new_slug, new_group_name)
+    await asyncio.to_thread(_retarget_derived, derived, new_slug)
     return {"success": True, "group_slug": new_slug, "group_name": new_group_name}
 
 @app.post("/history/{group_slug}/{run_id}/rename")
@@ -392,76 +1303,161 @@ async def history_rename_run(group_slug: str, run_id: str, new_run_id: str = For
     ok = await file_manager.rename_run(group_slug, run_id, new_run_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Run not found or cannot rename")
+    derived = await sync_index(f"rename {group_slug}/{run_id}", run_index.rename_run, group_slug, run_id, new_run_id)
+    await asyncio.to_thread(_retarget_derived, derived, group_slug, new_run_id)
     return {"success": True, "run_id": new_run_id}
 
 @app.get("/uploads")
-def list_uploads():
+def list_uploads(
+    q: Optional[str] = Query(None, description="Dosya adında geçen metin"),
+    analyzed: Optional[bool] = Query(None, description="true: bir run'da analiz edilmiş, false: hiç analiz edilmemiş"),
+    date_from: Optional[str] = Query(None, description="ISO tarih (mtime >=)"),
+    date_to: Optional[str] = Query(None, description="ISO tarih (mtime <=; sadece tarih ise gün sonu)"),
+    min_size: Optional[int] = Query(None, ge=0),
+    max_size: Optional[int] = Query(None, ge=0),
+    sort: str = Query("name"),
+    order: str = Query("asc"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Verilmezse tüm liste (eski davranış)"),
+    offset: int = Query(0, ge=0),
+):
+    if sort not in UPLOAD_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(UPLOAD_SORTS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
     try:
-        files = []
-        for p in sorted(UPLOADS_DIR.iterdir()):
-            if p.is_file():
-                st = p.stat()
-                files.append({
-                    "name": p.name,
-                    "size": st.st_size,            # bytes
-                    "mtime": int(st.st_mtime),     # unix seconds
-                    "url": f"/static/uploads/{p.name}",
-                })
-        return {"files": files}
+        return uploads_catalog.list(
+            q=q, analyzed=analyzed, date_from=date_from, date_to=date_to,
+            min_size=min_size, max_size=max_size,
+            sort=sort, descending=order == "desc", limit=limit, offset=offset,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/uploads/reindex")
+async def reindex_uploads():
+    """Kataloğu uploads/ klasörüyle zorla eşitler (dışarıdan üzerine yazılan dosyalar için)."""
+    return {"success": True, **(await asyncio.to_thread(uploads_catalog.sync, True))}
+
+
+async def build_download_package(
+    results_data: Optional[DetectionSet],
+    package_name: str,
+    include_pdf: bool = False,
+) -> Dict[str, Any]:
+    """Excel + JSON (+PDF) raporlarını cache'ten alır/üretir ve processed görsellerle indirme paketi hazırlar."""
+    # Aynı içerik için raporlar yeniden üretilmez (cache/report_<özet>)
+    formats = ("excel", "json", "pdf") if include_pdf else ("excel", "json")
+    report_info = await report_cache.get_or_create(results_data, formats=formats)
+    report_files = [report_info[f"{f}_path"] for f in formats if report_info.get(f"{f}_path")]
+
+    # processed dosyaları results_data içindeki processed_path'lerden toparla
+    processed_paths = [p for p in (results_data.processed_paths if results_data else []) if p]
+
+    package = await file_manager.create_package_for_results(
+        package_name=package_name,
+        processed_paths=processed_paths,
+        report_files=report_files
+    )
+    if not package["success"]:
+        raise RuntimeError(package.get("error", "package failed"))
+
+    return {
+        "message": "Download package created",
+        "download_path": package.get("download_url"),
+        "package_info": package,
+        "reports": report_info
+    }
+
+def load_stored_results(group_slug: str, run_id: str) -> Optional[DetectionSet]:
+    return load_run_detections(RESULTS_DIR / group_slug / run_id, uploads_dir=UPLOADS_DIR)
 
 # (İstersen halen rapor üret + paketle için bu endpointi de koruyalım)
 @app.post("/download-results")
 async def download_results(folder_name: Optional[str] = Form(None),
-                           results_json: Optional[str] = Form(None)):
+                           results_json: Optional[str] = Form(None),
+                           group_slug: Optional[str] = Form(None),
+                           run_id: Optional[str] = Form(None),
+                           include_pdf: bool = Form(False)):
+    """
+    group_slug + run_id verilirse her zaman run'ın kayıtlı tespitleri kullanılır
+    (istemcinin elindeki results sadece ilk sayfa olabilir); results_json sadece run yoksa.
+    """
     try:
         results_data = None
-        if results_json:
+        if group_slug and run_id:
+            results_data = await asyncio.to_thread(load_stored_results, group_slug, run_id)
+            if results_data is None:
+                raise HTTPException(status_code=404, detail="No stored detections for this run")
+        elif results_json:
             try:
                 parsed = json.loads(results_json)
-                results_data = parsed.get("results", parsed) if isinstance(parsed, dict) else parsed
+                parsed = parsed.get("results", parsed) if isinstance(parsed, dict) else parsed
+                # istemci JSON'u sadece burada kompakt diziye çevrilir
+                results_data = DetectionSet.from_results(
+                    parsed, class_ids={name: cid for cid, name in model_handler.class_names.items()},
+                )
             except Exception as e:
                 logger.warning(f"results_json parse edilemedi: {e}")
 
-        # Rapor üretimini AppData downloads altına yaz
-        report_info = await report_generator.generate_reports(
-            results_data=results_data,
-            base_name=folder_name or "Analiz_Sonuclari",
-            out_root=str(DOWNLOADS_DIR)
-        )
-        excel_path = report_info["excel_path"]
-        json_path  = report_info["json_path"]
-
-        # processed dosyaları results_data içindeki processed_path'lerden toparla
-        processed_paths = [r.get("processed_path") for r in (results_data or []) if r.get("processed_path")]
-
-        package = await file_manager.create_package_for_results(
-            package_name=(folder_name or "Analiz_Sonuclari"),
-            processed_paths=processed_paths,
-            report_files=[excel_path, json_path]
-        )
-        if not package["success"]:
-            raise RuntimeError(package.get("error", "package failed"))
-
-        return {
-            "message": "Download package created",
-            "download_path": package.get("download_url"),
-            "package_info": package,
-            "reports": report_info
-        }
+        return await build_download_package(results_data, folder_name or "Analiz_Sonuclari", include_pdf)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating download package: {e}")
         raise HTTPException(status_code=500, detail=f"Error creating download package: {e}")
 
+@app.post("/history/{group_slug}/{run_id}/report")
+async def history_report(group_slug: str, run_id: str, include_pdf: bool = Query(False)):
+    """Kayıtlı tespitlerden (detections.npz) rapor + paket; istemci verisi gerekmez."""
+    results_data = await asyncio.to_thread(load_stored_results, group_slug, run_id)
+    if results_data is None:
+        raise HTTPException(status_code=404, detail="No stored detections for this run")
+    try:
+        return await build_download_package(results_data, f"{group_slug}__{run_id}", include_pdf)
+    except Exception as e:
+        logger.error(f"Error creating report for {group_slug}/{run_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error creating report: {e}")
+
+@app.get("/history/{group_slug}/{run_id}/report.pdf")
+async def history_report_pdf(group_slug: str, run_id: str):
+    """Görsel başına sayfalı PDF rapor (worker süreçlerinde çizilir, içerik anahtarıyla cache'lenir)."""
+    results_data = await asyncio.to_thread(load_stored_results, group_slug, run_id)
+    if results_data is None:
+        raise HTTPException(status_code=404, detail="No stored detections for this run")
+    try:
+        report_info = await report_cache.get_or_create(results_data, formats=("pdf",))
+    except Exception as e:
+        logger.error(f"Error creating PDF report for {group_slug}/{run_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error creating PDF report: {e}")
+    return FileResponse(
+        path=report_info["pdf_path"],
+        media_type="application/pdf",
+        filename=f"{group_slug}__{run_id}.pdf",
+    )
+
+@app.get("/reports/cache")
+def report_cache_status():
+    """Rapor cache'i isabet oranı ve disk kullanımı."""
+    return report_cache.stats()
+
 @app.get("/download/{filename}")
 async def download_file(filename: str):
-    file_path = DOWNLOADS_DIR / filename
-    if not file_path.exists():
+    file_path = DOWNLOADS_DIR / Path(filename).name
+    if file_path.exists():
+        return FileResponse(path=file_path, filename=filename, media_type="application/zip")
+    # manifest'li paket: kaynaklardan anlık zip akışı (akış sürerken kaynaklar retention'dan korunur)
+    package = file_manager.open_package(file_path.name)
+    if package is None:
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path=file_path, filename=filename, media_type="application/zip")
+    if package["expired"]:
+        raise HTTPException(status_code=410, detail="Download link expired")
+    return zip_response(
+        package["entries"], package["download_name"],
+        chunks=file_manager.stream_package(file_path.name, package["entries"]),
+    )
 
 @app.get("/models")
 async def list_models():
@@ -480,12 +1476,12 @@ async def list_models():
     return {"models": models}
 
 
-from pathlib import Path
-from fastapi.staticfiles import StaticFiles
-
 FRONTEND_DIR = Path(__file__).parent / "frontend_out"
 if FRONTEND_DIR.exists():
-    app.mount("/", StaticFiles(directory=str(FRONTEND_DIR), html=True), name="frontend")
+    # _next/static içerik hash'li: immutable; .gz/.br kopyaları `python static_delivery.py frontend_out` ile
+    app.mount("/", CachedStaticFiles(
+        directory=str(FRONTEND_DIR), html=True, immutable_dirs=["_next/static"], precompressed=True,
+    ), name="frontend")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,311 @@
+# backend/memory.py
+import asyncio
+import ctypes
+import os
+import sys
+import threading
+import tracemalloc
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Union
+
+MB = 1024 * 1024
+
+# Decode sırasında görsel başına tahmini bellek: okunan dosya + BGR piksel tamponu
+# (+ yeniden boyutlandırma / 16-bit TIFF ara tamponları için pay)
+DECODE_OVERHEAD = 1.5
+
+
+try:
+    import psutil  # opsiyonel
+    _PROC = psutil.Process()
+except Exception:  # pragma: no cover - psutil yoksa /proc ya da Win32 API
+    _PROC = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _win_rss() -> Optional[int]:
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", ctypes.c_ulong),
+            ("PageFaultCount", ctypes.c_ulong),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return None
+    return int(counters.WorkingSetSize)
+
+
+def rss_bytes() -> Optional[int]:
+    """Bu sürecin anlık RSS'i (psutil > /proc > Win32); ölçülemezse None."""
+    try:
+        if _PROC is not None:
+            return _PROC.memory_info().rss
+        if sys.platform == "win32":
+            return _win_rss()
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except Exception:
+        return None
+
+
+def estimate_decode_bytes(source: Union[Path, BinaryIO]) -> int:
+    """
+    Görseli açmadan (sadece başlık) decode belleğini tahmin eder; kaynak dosya
+    yolu ya da okunabilir/seek edilebilir bir dosya nesnesi (yüklenen dosya) olabilir.
+    Boyut okunamazsa dosya boyutunun 10 katı varsayılır (sıkıştırılmış TIFF/PNG).
+    """
+    try:
+        if isinstance(source, (str, Path)):
+            source = Path(source)
+            file_size = source.stat().st_size
+        else:
+            file_size = source.seek(0, os.SEEK_END)
+            source.seek(0)
+    except OSError:
+        return 0
+    try:
+        from PIL import Image
+
+        with Image.open(source) as im:
+            w, h = im.size
+        return int(file_size + w * h * 3 * DECODE_OVERHEAD)
+    except Exception:
+        return file_size * 10
+    finally:
+        if not isinstance(source, Path):
+            source.seek(0)
+
+
+def _mb(v: Optional[float]) -> Optional[float]:
+    return None if v is None else round(v / MB, 1)
+
+
+class _Window:
+    __slots__ = ("rss_peak", "traced_peak")
+
+    def __init__(self, rss: Optional[int], traced: Optional[int]):
+        self.rss_peak = rss
+        self.traced_peak = traced
+
+
+class MemoryProbe:
+    """
+    Arka plan thread'i ile RSS (ve tracemalloc açıksa Python/NumPy tahsisleri)
+    örnekler; `stage()` pencereleri örneklenen tepe değerleri toplar.
+    Aşamalar paralel çalışabildiği için (decode ön-okuma) aşama tepeleri o anda
+    süren diğer işleri de içerir; delta'lar aşamanın başı/sonu arasındaki farktır.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = float(interval)
+        self._windows: set = set()
+        self._lock = threading.Lock()
+        self._users = 0
+        self._stop: Optional[threading.Event] = None
+
+    @staticmethod
+    def traced() -> Optional[int]:
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+    def _sample(self):
+        rss, traced = rss_bytes(), self.traced()
+        with self._lock:
+            windows = list(self._windows)
+        for w in windows:
+            if rss is not None:
+                w.rss_peak = max(w.rss_peak or 0, rss)
+            if traced is not None:
+                w.traced_peak = max(w.traced_peak or 0, traced)
+
+    def _loop(self, stop: threading.Event):
+        while not stop.wait(self.interval):
+            self._sample()
+
+    def _acquire(self):
+        # Sampler sadece izlenen bir run varken çalışır
+        with self._lock:
+            self._users += 1
+            if self._users == 1:
+                self._stop = threading.Event()
+                threading.Thread(target=self._loop, args=(self._stop,), name="memory-probe", daemon=True).start()
+
+    def _release(self):
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and self._stop is not None:
+                self._stop.set()
+                self._stop = None
+
+    @contextmanager
+    def window(self) -> Iterator[_Window]:
+        w = _Window(rss_bytes(), self.traced())
+        with self._lock:
+            self._windows.add(w)
+        try:
+            yield w
+        finally:
+            with self._lock:
+                self._windows.discard(w)
+            self._sample_into(w)
+
+    def _sample_into(self, w: _Window):
+        rss, traced = rss_bytes(), self.traced()
+        if rss is not None:
+            w.rss_peak = max(w.rss_peak or 0, rss)
+        if traced is not None:
+            w.traced_peak = max(w.traced_peak or 0, traced)
+
+    @contextmanager
+    def stage(self, mem: Optional[Dict[str, Dict[str, float]]], name: str) -> Iterator[None]:
+        """
+        mem verilmişse mem[name] = {rss_delta_mb, rss_peak_mb[, traced_delta_mb, traced_peak_mb]}
+        (metrics.stage ile aynı kullanım; None ise maliyetsiz).
+        """
+        if mem is None:
+            yield
+            return
+        rss0, traced0 = rss_bytes(), self.traced()
+        with self.window() as w:
+            yield
+        rss1, traced1 = rss_bytes(), self.traced()
+        rec: Dict[str, float] = {}
+        if rss0 is not None and rss1 is not None:
+            rec["rss_delta_mb"] = _mb(rss1 - rss0)
+            rec["rss_peak_mb"] = _mb(w.rss_peak)
+        if traced0 is not None and traced1 is not None:
+            rec["traced_delta_mb"] = _mb(traced1 - traced0)
+            rec["traced_peak_mb"] = _mb(w.traced_peak)
+        mem[name] = rec
+
+    @contextmanager
+    def run(self) -> Iterator[Dict[str, Any]]:
+        """
+        Run boyunca RSS başlangıç / bitiş / tepe; tracemalloc açıksa tepe tahsis.
+        Yield edilen dict çıkışta doldurulur (run.json "memory" alanı).
+        """
+        out: Dict[str, Any] = {}
+        self._acquire()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        rss0 = rss_bytes()
+        try:
+            with self.window() as w:
+                yield out
+        finally:
+            self._release()
+            rss1 = rss_bytes()
+            out.update({
+                "rss_start_mb": _mb(rss0),
+                "rss_end_mb": _mb(rss1),
+                "rss_peak_mb": _mb(w.rss_peak),
+            })
+            if tracemalloc.is_tracing():
+                out["tracemalloc_peak_mb"] = _mb(tracemalloc.get_traced_memory()[1])
+
+
+class MemoryBudget:
+    """
+    Decode (TIFF->JPG dönüşümü) paralelliği için bellek bütçesi.
+    Bir dönüşüm, tahmini decode belleği kadar yer ayırır; süreç RSS'i + ayrılmış
+    bellek bütçeyi aşacaksa başlamaz ve mevcut dönüşümlerin bitmesini bekler:
+    böylece paralellik max_parallel'den 1'e kadar kendiliğinden düşer. Hiç
+    dönüşüm yoksa tek görsel her zaman başlar (bütçeden büyük görsel de işlenir).
+    budget_bytes=0: sadece max_parallel sınırı.
+    """
+
+    def __init__(self, budget_bytes: int = 0, max_parallel: int = 2):
+        self.budget_bytes = max(0, int(budget_bytes))
+        self.max_parallel = max(1, int(max_parallel))
+        self._cond: Optional[asyncio.Condition] = None
+
+        self.inflight = 0
+        self.reserved_bytes = 0
+        self.throttled = 0          # bütçe yüzünden bekletilen dönüşüm sayısı
+        self.over_budget_runs = 0   # tek başına bütçeyi aşan görseller
+
+    def _condition(self) -> asyncio.Condition:
+        # Event loop içinde ilk kullanımda oluştur
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def _fits(self, nbytes: int) -> bool:
+        if self.inflight == 0:
+            return True
+        if self.inflight >= self.max_parallel:
+            return False
+        if not self.budget_bytes:
+            return True
+        rss = rss_bytes() or 0
+        return rss + self.reserved_bytes + nbytes <= self.budget_bytes
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int):
+        """Yield edilen değer, bu dönüşümle birlikte süren dönüşüm sayısıdır."""
+        cond = self._condition()
+        nbytes = max(0, int(nbytes))
+        async with cond:
+            waited = False
+            while not self._fits(nbytes):
+                if not waited and self.inflight < self.max_parallel:
+                    self.throttled += 1
+                    waited = True
+                try:
+                    # RSS bildirimsiz de düşebilir (GC, başka istekler): periyodik tekrar kontrol
+                    await asyncio.wait_for(cond.wait(), timeout=0.25)
+                except asyncio.TimeoutError:
+                    pass
+            if self.budget_bytes and self.inflight == 0 and (rss_bytes() or 0) + nbytes > self.budget_bytes:
+                self.over_budget_runs += 1
+            self.inflight += 1
+            self.reserved_bytes += nbytes
+            level = self.inflight
+        try:
+            yield level
+        finally:
+            async with cond:
+                self.inflight -= 1
+                self.reserved_bytes -= nbytes
+                cond.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "budget_mb": _mb(self.budget_bytes) if self.budget_bytes else None,
+            "max_parallel_decodes": self.max_parallel,
+            "inflight_decodes": self.inflight,
+            "reserved_mb": _mb(self.reserved_bytes),
+            "rss_mb": _mb(rss_bytes()),
+            "throttled": self.throttled,
+            "over_budget": self.over_budget_runs,
+        }
+
+
+def summarize_memory(per_image: list) -> Dict[str, Dict[str, float]]:
+    """run.json için aşama başına en büyük RSS artışı / tepe (MB; tracemalloc açıksa tahsis de)."""
+    stages: Dict[str, Dict[str, float]] = {}
+    for mem in per_image:
+        merge_memory(stages, mem)
+    return stages
+
+
+def merge_memory(stages: Dict[str, Dict[str, float]], mem: Dict[str, Dict[str, float]]) -> None:
+    """summarize_memory'nin artımlı adımı: bir görselin aşama kayıtlarını özete katar."""
+    for name, rec in mem.items():
+        agg = stages.setdefault(name, {})
+        for key, v in rec.items():
+            if v is not None:
+                out = key.replace("_mb", "_max_mb") if key.endswith("delta_mb") else key
+                agg[out] = max(agg.get(out, v), v)
@@ -0,0 +1,194 @@
+# backend/metrics.py
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Aşama süreleri (saniye): decode/resize ms mertebesinde, predict CPU'da saniyeler
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RUN_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@contextmanager
+def stage(timings: Optional[Dict[str, float]], name: str) -> Iterator[None]:
+    """timings verilmişse bloğun süresini timings[name]'e ekler (None ise maliyetsiz)."""
+    if timings is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - t0
+
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return "NaN"
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in sorted(values.items())]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name, self.help = name, help
+        self.buckets = tuple(sorted(buckets))
+        # etiket -> [bucket sayıları..., toplam, adet]
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, s in sorted(series.items()):
+            for b, n in zip(self.buckets, s):
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', _fmt_value(float(b))))} {n}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', '+Inf'))} {s[-1]}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(s[-2])}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {s[-1]}")
+        return lines
+
+
+class Gauge:
+    """
+    Değeri render anında okunan metrik: fn() -> sayı ya da {((etiket, değer), ...): sayı}.
+    Başka bir nesnenin tuttuğu sayaçlar (örn. cache isabetleri) kind="counter" ile yayınlanır.
+    """
+
+    def __init__(self, name: str, help: str, fn: Callable[[], object], kind: str = "gauge"):
+        self.name, self.help, self.fn, self.kind = name, help, fn, kind
+
+    def render(self) -> List[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if isinstance(value, dict):
+            lines += [f"{self.name}{_fmt_labels(tuple(sorted(k)))} {_fmt_value(v)}" for k, v in value.items() if v is not None]
+        elif value is not None:
+            lines.append(f"{self.name} {_fmt_value(value)}")
+        return lines
+
+
+class Metrics:
+    """
+    Uygulama metrikleri (Prometheus text exposition 0.0.4, harici bağımlılık yok).
+    Sayaçlar/histogramlar süreç içinde tutulur; gauge'lar /metrics isteğinde okunur.
+    """
+
+    def __init__(self):
+        self.stage_seconds = Histogram(
+            "pda_stage_seconds", "Processing time by stage (seconds); run.* stages are per run, others per image", STAGE_BUCKETS
+        )
+        self.image_seconds = Histogram(
+            "pda_image_seconds", "Total processing time per image (seconds)", STAGE_BUCKETS
+        )
+        self.run_seconds = Histogram("pda_run_seconds", "Wall time per analysis run (seconds)", RUN_BUCKETS)
+        self.runs = Counter("pda_runs_total", "Completed analysis runs")
+        self.images = Counter("pda_images_total", "Images processed")
+        self.detections = Counter("pda_detections_total", "Detections produced, by class")
+        self._gauges: List[Gauge] = []
+        self._started = time.time()
+        self.gauge("pda_uptime_seconds", "Process uptime (seconds)", lambda: time.time() - self._started)
+
+    def gauge(self, name: str, help: str, fn: Callable[[], object], kind: str = "gauge") -> Gauge:
+        g = Gauge(name, help, fn, kind)
+        self._gauges.append(g)
+        return g
+
+    def observe_image(self, timings: Dict[str, float]):
+        for name, seconds in timings.items():
+            self.stage_seconds.observe(seconds, stage=name)
+        self.image_seconds.observe(sum(timings.values()))
+        self.images.inc()
+
+    def observe_run(self, seconds: float, class_counts: Dict[str, int]):
+        self.run_seconds.observe(seconds)
+        self.runs.inc()
+        for name, n in class_counts.items():
+            if n:
+                self.detections.inc(n, class_name=name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in (self.stage_seconds, self.image_seconds, self.run_seconds, self.runs, self.images,
+                  self.detections, *self._gauges):
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+
+class TimingSummary:
+    """summarize_timings'in artımlı hali: görsel başına süreler saklanmadan (adet, toplam, en büyük)."""
+
+    def __init__(self):
+        self._stages: Dict[str, List[float]] = {}
+
+    def add(self, timings: Dict[str, float]):
+        for name, seconds in timings.items():
+            agg = self._stages.setdefault(name, [0, 0.0, 0.0])
+            agg[0] += 1
+            agg[1] += seconds
+            agg[2] = max(agg[2], seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "total_ms": round(total * 1000, 2),
+                "mean_ms": round(total / count * 1000, 2),
+                "max_ms": round(peak * 1000, 2),
+            }
+            for name, (count, total, peak) in self._stages.items()
+        }
+
+
+def summarize_timings(per_image: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """run.json için aşama başına toplam / ortalama / en büyük süre (ms)."""
+    agg = TimingSummary()
+    for t in per_image:
+        agg.add(t)
+    return agg.summary()
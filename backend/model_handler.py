@@ -1,8 +1,10 @@
 import os
+import time
+import asyncio
+import threading
 import cv2
-import torch
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 import logging
 
@@ -11,7 +13,13 @@ os.environ.setdefault("WANDB_DISABLED", "true")
 os.environ.setdefault("YOLO_VERBOSE", "0")
 os.environ.setdefault("ULTRALYTICS_HUB", "0")
 
-from ultralytics import YOLO
+from detection_store import DETECTION_DTYPE, detection_dicts
+from metrics import stage
+from warmup import LazyModule
+
+# torch / ultralytics birkaç saniyelik import: ilk kullanımda (ya da warm-up'ta) yüklenir
+torch = LazyModule("torch")
+ultralytics = LazyModule("ultralytics")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,10 +36,36 @@ class YOLOModelHandler:
     def __init__(self, input_size: int = 640):
         self.model = None
         self.current_model: str | None = None
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self._device = None
+        self._load_lock = threading.Lock()
         self.input_size = int(input_size)
         self.class_names = {0: "Krater", 1: "Tanecik", 2: "Pinhol"}
-        logger.info(f"Initialized YOLO handler (Ultralytics) with device: {self.device}")
+        # son model yüklemesinin süresi (saniye) ve toplam yükleme sayısı (/metrics)
+        self.load_seconds: Optional[float] = None
+        self.load_count = 0
+        # PDA_INFERENCE_SERVER: model ayrı süreçte (inference_server.InferenceClient)
+        self.remote = None
+
+    def use_remote(self, client):
+        """Inference'ı paylaşımlı bellek üzerinden tek model sürecine yönlendirir."""
+        self.remote = client
+
+    @property
+    def device(self):
+        if self.remote is not None:
+            return self.remote.device
+        # torch.cuda sorgusu torch import'u gerektirir: ilk ihtiyaçta
+        if self._device is None:
+            self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            logger.info(f"YOLO handler (Ultralytics) device: {self._device}")
+        return self._device
+
+    def preload_libraries(self) -> str:
+        """torch + ultralytics import'u ve cihaz seçimi (warm-up adımı; uzak modda gerekmez)."""
+        if self.remote is not None:
+            return False
+        _ = ultralytics.YOLO  # import tetiklenir
+        return str(self.device)
 
     def is_model_loaded(self) -> bool:
         return self.model is not None
@@ -40,8 +74,18 @@ class YOLOModelHandler:
         return 0 if self.device.type == "cuda" else "cpu"
 
     async def load_model(self, model_path: str) -> bool:
+        """Yükleme thread'de yapılır (event loop bloklanmaz); aynı anda tek yükleme."""
+        return await asyncio.to_thread(self.load_model_sync, model_path)
+
+    def load_model_sync(self, model_path: str) -> bool:
+        with self._load_lock:
+            # warm-up aynı modeli bu arada yüklediyse tekrar yükleme
+            if self.model is not None and self.current_model == Path(str(model_path)).name:
+                return True
+            return self._load_model(str(model_path))
+
+    def _load_model(self, model_path: str) -> bool:
         try:
-            model_path = str(model_path)
             logger.info(f"Loading Ultralytics model from: {model_path}")
 
             if not model_path.lower().endswith(".pt"):
@@ -50,14 +94,22 @@ class YOLOModelHandler:
             if not os.path.exists(model_path):
                 raise FileNotFoundError(f"Model bulunamadı: {model_path}")
 
-            self.model = YOLO(model_path)
-            try:
-                self.model.to(self._device_arg())
-            except Exception as e:
-                logger.warning(f"Modeli {self.device} cihaza taşıma sırasında uyarı: {e}")
+            t0 = time.perf_counter()
+            if self.remote is not None:
+                # model inference sürecinde yüklenir; burada sadece adı tutulur
+                self.remote.load(Path(model_path).name)
+                self.model = self.remote
+            else:
+                self.model = ultralytics.YOLO(model_path)
+                try:
+                    self.model.to(self._device_arg())
+                except Exception as e:
+                    logger.warning(f"Modeli {self.device} cihaza taşıma sırasında uyarı: {e}")
 
             self.current_model = Path(model_path).name
-            logger.info(f"Model loaded successfully: {self.current_model}")
+            self.load_seconds = time.perf_counter() - t0
+            self.load_count += 1
+            logger.info(f"Model loaded successfully: {self.current_model} ({self.load_seconds:.2f}s)")
             return True
 
         except Exception as e:
@@ -73,13 +125,17 @@ class YOLOModelHandler:
         iou: float = 0.5,
         max_det: int = 300,
         min_box_area: int = 0,
-    ) -> List[Dict[str, Any]]:
+        timings: Optional[Dict[str, float]] = None,
+    ) -> np.ndarray:
+        """Görsel dosyası -> DETECTION_DTYPE dizisi (JSON'a detections_from_array ile)."""
         if not self.is_model_loaded():
             raise RuntimeError("No model loaded")
 
         # Unicode path güvenli okuma
-        with open(image_path, "rb") as f:
-            file_bytes = np.frombuffer(f.read(), np.uint8)
+        with stage(timings, "predict.read"):
+            with open(image_path, "rb") as f:
+                file_bytes = np.frombuffer(f.read(), np.uint8)
+        with stage(timings, "predict.decode"):
             image = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
 
         if image is None:
@@ -88,42 +144,76 @@ class YOLOModelHandler:
         logger.info(
             f"YOLO predict -> file={Path(image_path).name}, conf={confidence_threshold}, iou={iou}, max_det={max_det}"
         )
-
-        results = self.model.predict(
-            source=image,
-            imgsz=self.input_size,
-            conf=float(confidence_threshold),
-            iou=float(iou),
-            max_det=int(max_det),
-            device=self._device_arg(),
-            agnostic_nms=False,
-            verbose=False,
+        return await self.predict_image(
+            image, confidence_threshold=confidence_threshold, iou=iou, max_det=max_det,
+            min_box_area=min_box_area, timings=timings,
         )
 
-        r = results[0]
-        dets: List[Dict[str, Any]] = []
-
-        if r.boxes is None or len(r.boxes) == 0:
-            return dets
-
-        for b in r.boxes:
-            x1, y1, x2, y2 = [int(v) for v in b.xyxy[0].tolist()]
-            conf = float(b.conf[0])
-            cls = int(b.cls[0])
+    async def predict_image(
+        self,
+        image: np.ndarray,
+        confidence_threshold: float = 0.25,
+        iou: float = 0.5,
+        max_det: int = 300,
+        min_box_area: int = 0,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> np.ndarray:
+        """Bellekteki BGR kare üzerinde tahmin (dosya okumadan)."""
+        if not self.is_model_loaded():
+            raise RuntimeError("No model loaded")
 
-            if min_box_area > 0 and (x2 - x1) * (y2 - y1) < int(min_box_area):
-                continue
+        params = {
+            "confidence_threshold": float(confidence_threshold),
+            "iou": float(iou),
+            "max_det": int(max_det),
+            "min_box_area": int(min_box_area),
+        }
+        if self.remote is not None:
+            return await self.remote.predict(image, self.current_model, params, timings=timings)
+        return self.predict_array(image, timings=timings, **params)
 
-            dets.append(
-                {
-                    "class_id": cls,
-                    "class_name": self.class_names.get(cls, f"Class_{cls}"),
-                    "confidence": conf,
-                    "bbox": [x1, y1, x2, y2],
-                }
+    def predict_array(
+        self,
+        image: np.ndarray,
+        confidence_threshold: float = 0.25,
+        iou: float = 0.5,
+        max_det: int = 300,
+        min_box_area: int = 0,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> np.ndarray:
+        """Decode edilmiş BGR kare -> DETECTION_DTYPE dizisi (image alanı 0)."""
+        with stage(timings, "predict.inference"):
+            results = self.model.predict(
+                source=image,
+                imgsz=self.input_size,
+                conf=float(confidence_threshold),
+                iou=float(iou),
+                max_det=int(max_det),
+                device=self._device_arg(),
+                agnostic_nms=False,
+                verbose=False,
             )
 
-        return dets
+        with stage(timings, "predict.postprocess"):
+            boxes = results[0].boxes
+            if boxes is None or len(boxes) == 0:
+                return np.zeros(0, dtype=DETECTION_DTYPE)
+
+            xyxy = boxes.xyxy.cpu().numpy().astype(np.int32)
+            if min_box_area > 0:
+                keep = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1]) >= int(min_box_area)
+            else:
+                keep = np.ones(len(xyxy), dtype=bool)
+
+            arr = np.zeros(int(keep.sum()), dtype=DETECTION_DTYPE)
+            arr["class_id"] = boxes.cls.cpu().numpy()[keep]
+            arr["confidence"] = boxes.conf.cpu().numpy()[keep]
+            arr["bbox"] = xyxy[keep]
+        return arr
+
+    def detections_from_array(self, arr: np.ndarray) -> List[Dict[str, Any]]:
+        """HTTP yanıtları için JSON dict listesi."""
+        return detection_dicts(arr, self.class_names)
 
     def get_model_info(self) -> Dict[str, Any]:
         if not self.is_model_loaded():
@@ -0,0 +1,219 @@
+# backend/pdf_report.py
+import asyncio
+import importlib.util
+import io
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# opsiyonel: parça PDF'leri birleştirmek için (import'u ilk birleştirmede, açılışı yavaşlatmasın)
+HAS_PYPDF = importlib.util.find_spec("pypdf") is not None
+
+# Sayfa başına gösterilecek en fazla tespit satırı (kalanı "+N" olarak özetlenir)
+MAX_ROWS_PER_PAGE = 30
+
+
+def _thumbnail(path: str, long_side: int, quality: int) -> Optional[tuple]:
+    """İşlenmiş görseli küçültüp JPEG olarak bellekte döner: (BytesIO, w, h)."""
+    from PIL import Image as PILImage
+
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with PILImage.open(path) as im:
+            # JPEG: hedef boyuta en yakın 1/2^n ölçekte decode et (tam çözünürlük açılmaz)
+            r = min(long_side / im.width, long_side / im.height, 1.0)
+            im.draft("RGB", (int(im.width * r), int(im.height * r)))
+            im = im.convert("RGB")
+            im.thumbnail((long_side, long_side), reducing_gap=2.0)
+            buf = io.BytesIO()
+            im.save(buf, format="JPEG", quality=quality, optimize=True)
+            buf.seek(0)
+            return buf, im.width, im.height
+    except Exception:
+        return None
+
+
+def _table_style(header_bg, body_bg, font_size: int):
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), header_bg),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), body_bg),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ])
+
+
+def render_pdf_part(
+    output_path: str,
+    summary: Optional[Dict[str, Any]],
+    pages: List[Dict[str, Any]],
+    thumb_long_side: int = 640,
+    jpeg_quality: int = 70,
+) -> str:
+    """
+    Worker sürecinde çalışır (picklable argümanlar). summary verilirse başlık +
+    yönetici özeti + ilk detay tablosu, ardından her görsel için bir sayfa:
+    küçültülmüş işlenmiş görsel + tespit tablosu.
+    """
+    from reportlab import rl_config
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak, Image
+
+    # JPEG'ler ASCII85'e çevrilmeden ikili gömülür (saf Python encode çok yavaş, dosya %25 büyük)
+    rl_config.useA85 = 0
+
+    doc = SimpleDocTemplate(output_path, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+
+    if summary:
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=1  # Center alignment
+        )
+        story.append(Paragraph("Boya Kusurları Analiz Raporu", title_style))
+        story.append(Spacer(1, 20))
+
+        story.append(Paragraph("Yönetici Özeti", styles['Heading2']))
+        summary_table = Table(
+            [["Metrik", "Değer", "Açıklama"]] + summary["summary_rows"],
+            colWidths=[2*inch, 1*inch, 3*inch],
+        )
+        summary_table.setStyle(_table_style(colors.grey, colors.beige, 10))
+        story.append(summary_table)
+        story.append(PageBreak())
+
+        if summary.get("detail_rows"):
+            story.append(Paragraph("Detaylı Sonuçlar", styles['Heading2']))
+            detail_table = Table(
+                [["Dosya", "Kusur Türü", "Güven", "Kritiklik"]] + summary["detail_rows"],
+                colWidths=[2*inch, 1.5*inch, 1*inch, 1.5*inch],
+            )
+            detail_table.setStyle(_table_style(colors.grey, colors.lightgrey, 10))
+            story.append(detail_table)
+            if pages:
+                story.append(PageBreak())
+
+    max_w, max_h = doc.width, doc.height * 0.55
+    for n, page in enumerate(pages):
+        story.append(Paragraph(f"{page['index']}. {page['filename']}", styles['Heading2']))
+        story.append(Paragraph(f"Tespit sayısı: {len(page['rows'])}", styles['Normal']))
+        story.append(Spacer(1, 8))
+
+        thumb = _thumbnail(page.get("image_path"), thumb_long_side, jpeg_quality)
+        if thumb:
+            buf, w, h = thumb
+            scale = min(max_w / w, max_h / h)
+            story.append(Image(buf, width=w * scale, height=h * scale))
+            story.append(Spacer(1, 10))
+
+        if page["rows"]:
+            rows = page["rows"][:MAX_ROWS_PER_PAGE]
+            table = Table(
+                [["#", "Kusur Türü", "Güven", "Konum (X1, Y1, X2, Y2)", "Alan", "Kritiklik"]] + rows,
+                colWidths=[0.4*inch, 1.1*inch, 0.7*inch, 2.2*inch, 0.8*inch, 0.9*inch],
+                repeatRows=1,
+            )
+            table.setStyle(_table_style(colors.grey, colors.whitesmoke, 8))
+            story.append(table)
+            if len(page["rows"]) > MAX_ROWS_PER_PAGE:
+                story.append(Paragraph(f"+{len(page['rows']) - MAX_ROWS_PER_PAGE} tespit daha", styles['Normal']))
+        else:
+            story.append(Paragraph("Kusur bulunamadı.", styles['Normal']))
+
+        if n < len(pages) - 1:
+            story.append(PageBreak())
+
+    doc.build(story)
+    return output_path
+
+
+def concat_pdfs(parts: List[str], output_path: str) -> str:
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(part)
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    writer.close()
+    return output_path
+
+
+class PdfRenderer:
+    """
+    PDF üretimini event loop dışına, ayrı süreçlere taşır.
+    Görsel sayfaları parçalara bölünüp paralel çizilir, pypdf ile birleştirilir;
+    pypdf yoksa tüm belge tek worker'da çizilir.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        pages_per_chunk: int = 100,
+        thumb_long_side: int = 640,
+        jpeg_quality: int = 70,
+    ):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.pages_per_chunk = max(1, int(pages_per_chunk))
+        self.thumb_long_side = int(thumb_long_side)
+        self.jpeg_quality = int(jpeg_quality)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: torch/uvicorn thread'leri olan süreci fork etmekten kaçın
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _chunks(self, pages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        if not pages:
+            return [[]]
+        size = min(self.pages_per_chunk, max(10, math.ceil(len(pages) / self.max_workers)))
+        return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+    async def render(self, output_path: str, summary: Dict[str, Any], pages: List[Dict[str, Any]]) -> str:
+        loop = asyncio.get_running_loop()
+        pool = self._executor()
+        opts = (self.thumb_long_side, self.jpeg_quality)
+
+        chunks = self._chunks(pages)
+        if not HAS_PYPDF or len(chunks) == 1:
+            return await loop.run_in_executor(pool, render_pdf_part, output_path, summary, pages, *opts)
+
+        tmp_dir = Path(tempfile.mkdtemp(prefix="pdf_", dir=str(Path(output_path).parent)))
+        try:
+            parts = [str(tmp_dir / f"part_{i:04d}.pdf") for i in range(len(chunks))]
+            await asyncio.gather(*(
+                loop.run_in_executor(pool, render_pdf_part, part, summary if i == 0 else None, chunk, *opts)
+                for i, (part, chunk) in enumerate(zip(parts, chunks))
+            ))
+            return await loop.run_in_executor(pool, concat_pdfs, parts, output_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
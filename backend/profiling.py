@@ -0,0 +1,167 @@
+# backend/profiling.py
+import contextlib
+import cProfile
+import io
+import logging
+import pstats
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-PDA-Profile"
+PROFILE_QUERY = "profile"
+# İstek bayrağı değerleri: "1"/"cprofile" -> sadece cProfile, "torch" -> cProfile + torch profiler
+MODES = {"1": "cprofile", "true": "cprofile", "cprofile": "cprofile", "torch": "torch"}
+
+# Profil alınabilen uçlar: analiz ve rapor üretimi
+PROFILABLE_PATHS = re.compile(
+    r"^/(analyze|download-results|export/detections|history/[^/]+/[^/]+/report(\.pdf)?)$"
+)
+PROFILE_NAME = re.compile(r"^[\w.-]+\.(prof|txt|json)$")
+
+
+class RequestProfiler:
+    """
+    İstek başına isteğe bağlı profil: X-PDA-Profile başlığı ya da ?profile= ile
+    açılır, varsayılan kapalıdır (ek maliyet yok). cProfile event loop thread'ini
+    izler (analiz ve rapor kodu orada çalışır; aynı anda işlenen diğer istekler de
+    profile girebilir). Aynı anda tek profil alınır; meşgulse istek profilsiz geçer.
+    Çıktılar: <ad>.prof (pstats / snakeviz), <ad>.txt (özet), torch için <ad>.trace.json.
+    """
+
+    def __init__(self, profiles_dir: Path, enabled: bool = True, keep: int = 20, top: int = 60):
+        self.profiles_dir = Path(profiles_dir)
+        self.enabled = enabled
+        self.keep = max(1, int(keep))
+        self.top = int(top)
+        self._busy = threading.Lock()
+
+    def requested_mode(self, path: str, headers: Any, query: Any) -> Optional[str]:
+        if not self.enabled or not PROFILABLE_PATHS.match(path):
+            return None
+        flag = headers.get(PROFILE_HEADER) or query.get(PROFILE_QUERY)
+        return MODES.get(str(flag).strip().lower()) if flag else None
+
+    @contextlib.contextmanager
+    def _torch_profile(self, base: Path) -> Iterator[None]:
+        try:
+            import torch
+            from torch.profiler import ProfilerActivity, profile
+        except ImportError:
+            logger.warning("torch profiler unavailable; recording cProfile only")
+            yield
+            return
+
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+        with profile(activities=activities) as prof:
+            yield
+        prof.export_chrome_trace(str(base.with_suffix(".trace.json")))
+
+    @contextlib.asynccontextmanager
+    async def profile(self, mode: str, label: str):
+        """
+        Bloğu profiller; yield edilen değer profil adıdır (başlığa yazılır), meşgulse None.
+        """
+        if not self._busy.acquire(blocking=False):
+            yield None
+            return
+        try:
+            self.profiles_dir.mkdir(parents=True, exist_ok=True)
+            slug = re.sub(r"[^\w]+", "-", label).strip("-") or "request"
+            name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{slug}_{uuid.uuid4().hex[:6]}"
+            base = self.profiles_dir / name
+
+            prof = cProfile.Profile()
+            t0 = time.perf_counter()
+            with (self._torch_profile(base) if mode == "torch" else contextlib.nullcontext()):
+                prof.enable()
+                try:
+                    yield name
+                finally:
+                    prof.disable()
+            wall = time.perf_counter() - t0
+
+            prof.dump_stats(str(base.with_suffix(".prof")))
+            out = io.StringIO()
+            out.write(f"{label}  mode={mode}  wall={wall:.3f}s\n\n")
+            pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(self.top)
+            base.with_suffix(".txt").write_text(out.getvalue(), encoding="utf-8")
+            logger.info(f"Profile written: {base.with_suffix('.prof')} ({wall:.2f}s)")
+            self._prune()
+        finally:
+            self._busy.release()
+
+    def _prune(self):
+        """En yeni `keep` profil kalır (bir profilin tüm dosyaları birlikte silinir)."""
+        groups: Dict[str, List[Path]] = {}
+        for p in self.profiles_dir.iterdir():
+            if p.is_file():
+                groups.setdefault(p.name.split(".", 1)[0], []).append(p)
+        for stem in sorted(groups, reverse=True)[self.keep:]:
+            for p in groups[stem]:
+                p.unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not self.profiles_dir.exists():
+            return []
+        items: Dict[str, Dict[str, Any]] = {}
+        for p in self.profiles_dir.iterdir():
+            if not p.is_file() or not PROFILE_NAME.match(p.name):
+                continue
+            stem = p.name.split(".", 1)[0]
+            st = p.stat()
+            item = items.setdefault(stem, {"name": stem, "created_at": None, "files": {}})
+            item["files"][p.name.split(".", 1)[1]] = {
+                "name": p.name,
+                "size_bytes": st.st_size,
+                "download_url": f"/profiles/{p.name}",
+            }
+            created = datetime.fromtimestamp(st.st_mtime).isoformat()
+            item["created_at"] = max(item["created_at"] or created, created)
+        return sorted(items.values(), key=lambda i: i["name"], reverse=True)
+
+    def path_for(self, filename: str) -> Optional[Path]:
+        if not PROFILE_NAME.match(filename):
+            return None
+        p = self.profiles_dir / filename
+        return p if p.is_file() else None
+
+
+class ProfileMiddleware:
+    """
+    Saf ASGI middleware: sadece bayraklı isteklerde devreye girer (diğer isteklere
+    dokunmaz). Profil, yanıt gövdesinin akışını da kapsar; profil adı yanıtın
+    X-PDA-Profile başlığında döner ("busy": başka bir profil sürüyordu).
+    """
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        mode = self.profiler.requested_mode(
+            scope["path"], Headers(scope=scope), QueryParams(scope.get("query_string", b""))
+        )
+        if mode is None:
+            return await self.app(scope, receive, send)
+
+        async with self.profiler.profile(mode, f"{scope['method']} {scope['path']}") as name:
+            async def send_with_header(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append(PROFILE_HEADER, name or "busy")
+                await send(message)
+
+            await self.app(scope, receive, send_with_header)
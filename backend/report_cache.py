@@ -0,0 +1,164 @@
+# backend/report_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from detection_store import DetectionSet
+from report_generator import ReportGenerator
+
+# Rapor içeriğini değiştiren bir kod değişikliğinde artırın (eski cache girdileri geçersiz olur)
+REPORT_CACHE_VERSION = 2
+ENTRY_PREFIX = "report_"
+META_FILE = "meta.json"
+
+
+def results_digest(results_data: DetectionSet, options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Rapor girdisinin içerik özeti: tespitler + görsel yolları + rapor seçenekleri.
+    Run'ın tespitleri ya da adı (processed_path) değişirse özet de değişir.
+    Tespit dizisi ham baytlarıyla özetlenir (dict'lere çevrilmeden).
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(
+        {"v": REPORT_CACHE_VERSION, "options": options or {}},
+        sort_keys=True, ensure_ascii=False, default=str,
+    ).encode("utf-8"))
+    h.update(results_data.dets.tobytes())
+    h.update(results_data.offsets.tobytes())
+    h.update(json.dumps(
+        [results_data.filenames, results_data.original_paths, results_data.processed_paths],
+        ensure_ascii=False,
+    ).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ReportCache:
+    """
+    Üretilmiş rapor dosyalarının (Excel/JSON/PDF) içerik anahtarlı cache'i.
+    - Girdi: cache/report_<özet>/ altında format başına bir dosya + meta.json
+    - Aynı özet için eksik formatlar sonradan eklenir (örn. önce Excel+JSON, sonra PDF)
+    - İsabette dosyaların zamanı tazelenir; silme/kota RetentionManager'ın "cache"
+      politikasıyla LRU sırasında yapılır. Run silinince/yeniden adlandırılınca ayrıca
+      temizlenmez: özet değiştiği için eski girdi bir daha kullanılmaz, LRU ile düşer.
+    """
+
+    def __init__(self, cache_dir: Path, report_generator: ReportGenerator):
+        self.cache_dir = Path(cache_dir)
+        self.report_generator = report_generator
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        # özet -> [kilit, bekleyen+tutan sayısı]; son kullanıcı çıkınca silinir (sözlük büyümez)
+        self._locks: Dict[str, List[Any]] = {}
+
+    def entry_dir(self, key: str) -> Path:
+        return self.cache_dir / f"{ENTRY_PREFIX}{key[:32]}"
+
+    @asynccontextmanager
+    async def _locked(self, key: str):
+        """Aynı özet için tek üretim; kilit sadece kullanılırken sözlükte durur (tek event loop)."""
+        slot = self._locks.get(key)
+        if slot is None:
+            slot = self._locks[key] = [asyncio.Lock(), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self._locks[key]
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _touch(entry: Path):
+        # LRU için: noatime/relatime'a güvenmeden erişim zamanını tazele
+        for p in [entry, *entry.iterdir()]:
+            try:
+                os.utime(p)
+            except OSError:
+                pass
+
+    async def get_or_create(
+        self,
+        results_data: Union[DetectionSet, List[Dict[str, Any]]],
+        formats: Sequence[str] = ("excel", "json"),
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """generate_reports ile aynı yapıda bilgi döner (+ 'cache': hit|miss, 'cache_key')."""
+        if results_data is not None and not isinstance(results_data, DetectionSet):
+            results_data = DetectionSet.from_results(results_data)
+        if not results_data:
+            return await self.report_generator.generate_reports(results_data=results_data)
+
+        key = await asyncio.to_thread(results_digest, results_data, options)
+        entry = self.entry_dir(key)
+        files = ReportGenerator.REPORT_FILES
+
+        async with self._locked(key):
+            missing = [f for f in formats if not (entry / files[f]).exists()]
+            if missing:
+                # eksik formatları geçici klasörde üret, sonra tek tek yerine taşı
+                tmp = self.cache_dir / f".tmp_{uuid.uuid4().hex}"
+                try:
+                    await self.report_generator.generate_reports(
+                        results_data=results_data,
+                        report_dir=str(tmp),
+                        formats=missing,
+                    )
+                    entry.mkdir(parents=True, exist_ok=True)
+                    for f in missing:
+                        os.replace(tmp / files[f], entry / files[f])
+                    (entry / META_FILE).write_text(json.dumps({
+                        "key": key,
+                        "created_at": datetime.now().isoformat(),
+                        "formats": sorted(f for f in files if (entry / files[f]).exists()),
+                        "options": options or {},
+                    }, ensure_ascii=False), encoding="utf-8")
+                finally:
+                    shutil.rmtree(tmp, ignore_errors=True)
+            else:
+                await asyncio.to_thread(self._touch, entry)
+            self._count(hit=not missing)
+
+        return {
+            "status": "ok",
+            "folder_name": entry.name,
+            "reports_dir": str(entry),
+            **{f"{f}_path": str(entry / files[f]) for f in formats},
+            "total_images": len(results_data),
+            "total_detections": results_data.n_detections,
+            "cache": "miss" if missing else "hit",
+            "cache_key": key,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = 0, 0
+        if self.cache_dir.exists():
+            for entry in self.cache_dir.glob(f"{ENTRY_PREFIX}*"):
+                entries += 1
+                size += sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else None,
+            "entries": entries,
+            "size_mb": round(size / (1024 * 1024), 2),
+        }
@@ -1,14 +1,25 @@
-import pandas as pd
+from __future__ import annotations
+
+import numpy as np
 from datetime import datetime
 from pathlib import Path
 import json
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
 import asyncio
 import base64
 import io
 
+from detection_store import DetectionSet
+from pdf_report import PdfRenderer
+from warmup import LazyModule
+
+# pandas ilk rapor isteğinde (ya da açılıştaki warm-up'ta) yüklenir
+pd = LazyModule("pandas")
+
 class ReportGenerator:
-    def __init__(self):
+    def __init__(self, results_dir: Optional[Path] = None, pdf_renderer: Optional[PdfRenderer] = None):
+        self.results_dir = Path(results_dir) if results_dir else None
+        self.pdf_renderer = pdf_renderer or PdfRenderer()
         self.class_names = {0: "Krater", 1: "Tanecik", 2: "Pinhol"}
         self.class_colors = {
             "Krater": "#FF6B6B",    # Red
@@ -19,294 +30,253 @@ class ReportGenerator:
     # ---------------------------
     # ÜST SEVİYE: Toplu rapor üret
     # ---------------------------
+    REPORT_FILES = {
+        "excel": "analiz_raporu.xlsx",
+        "json": "analiz_raporu.json",
+        "pdf": "analiz_raporu.pdf",
+    }
+
     async def generate_reports(
         self,
-        results_data: Optional[List[Dict[str, Any]]] = None,
+        results_data: Union[DetectionSet, List[Dict[str, Any]], None] = None,
         base_name: str = "Analiz_Sonuclari",
-        out_root: str = "downloads"
+        out_root: str = "downloads",
+        report_dir: Optional[str] = None,
+        formats: Sequence[str] = ("excel", "json"),
     ) -> Dict[str, Any]:
         """
-        Excel + JSON raporlarını 'downloads/<base_name>_<timestamp>/reports' altına üretir.
-        results_data verilmezse sırasıyla:
-          - results/analysis_results.json
-          - downloads/latest_results.json
-        dosyalarını okumayı dener. Hiçbiri yoksa 'skipped' döner.
+        Excel + JSON (isteğe bağlı PDF) raporlarını 'downloads/<base_name>_<timestamp>/reports'
+        altına üretir; report_dir verilirse doğrudan oraya yazar (rapor cache'i).
+        results_data, run'ın kayıtlı tespitleri (detection_store.DetectionSet) ya da
+        /analyze 'results' formatında dict listesi olabilir; boşsa 'skipped' döner.
         """
-        # 1) results_data yoksa dosyadan bulmayı dene
-        if results_data is None:
-            results_data = self._load_results_fallback()
-
+        # 1) veri yoksa rapor yok (çalışma dizininden tahmin yürütülmez)
         if not results_data:
             return {
                 "status": "skipped",
-                "reason": "No results_data provided and no cached results found."
+                "reason": "No results_data provided."
             }
 
         # 2) Klasörleri hazırla
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        folder_name = f"{base_name}_{timestamp}"
-        report_dir = Path(out_root) / folder_name / "reports"
-        report_dir.mkdir(parents=True, exist_ok=True)
-
-        # 3) Excel + JSON raporlarını üret
-        excel_path = str(report_dir / "analiz_raporu.xlsx")
-        json_path  = str(report_dir / "analiz_raporu.json")
-
-        # results_data içindeki tespitlerde center/size yoksa bbox'tan türet
-        normalized = self._normalize_results(results_data)
-
-        await self.generate_excel_report(normalized, excel_path)
-        await self.generate_json_report(normalized, json_path)
+        if report_dir:
+            report_path = Path(report_dir)
+            folder_name = report_path.name
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            folder_name = f"{base_name}_{timestamp}"
+            report_path = Path(out_root) / folder_name / "reports"
+        report_path.mkdir(parents=True, exist_ok=True)
+
+        # dict listesi geldiyse bir kez kompakt diziye çevrilir (CPU işi thread'de)
+        ds = await asyncio.to_thread(self._detection_set, results_data)
+
+        # 3) Raporları üret; tespit tablosu bir kez kurulur, hepsi aynı tablodan beslenir
+        tables = await asyncio.to_thread(self._build_tables, ds)
+        info: Dict[str, Any] = {}
+        writers = {
+            "excel": self.generate_excel_report,
+            "json": self.generate_json_report,
+            "pdf": self.generate_pdf_report,
+        }
+        for fmt in formats:
+            out = str(report_path / self.REPORT_FILES[fmt])
+            await writers[fmt](ds, out, tables=tables)
+            info[f"{fmt}_path"] = out
 
         return {
             "status": "ok",
             "folder_name": folder_name,
-            "reports_dir": str(report_dir),
-            "excel_path": excel_path,
-            "json_path": json_path,
-            "total_images": len(normalized),
-            "total_detections": sum(len(r.get("detections", [])) for r in normalized),
+            "reports_dir": str(report_path),
+            **info,
+            "total_images": len(ds),
+            "total_detections": len(tables["det"]),
         }
 
-    # ---------------------------
-    # Yardımcı: Sonuçları diskten bul
-    # ---------------------------
-    def _load_results_fallback(self) -> Optional[List[Dict[str, Any]]]:
-        """
-        results_data yoksa, standart yerlerden sonuçları okumayı dener.
-        Sıra:
-          1) results/analysis_results.json
-          2) downloads/latest_results.json
-        """
-        candidates = [
-            Path("results") / "analysis_results.json",
-            Path("downloads") / "latest_results.json",
-        ]
-        for p in candidates:
-            if p.exists():
-                try:
-                    with open(p, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    # Beklenen format: {"results":[...]} veya doğrudan [...]
-                    if isinstance(data, dict) and "results" in data:
-                        return data["results"]
-                    if isinstance(data, list):
-                        return data
-                except Exception:
-                    pass
-        return None
+    def _detection_set(self, results_data: Union[DetectionSet, List[Dict[str, Any]]]) -> DetectionSet:
+        if isinstance(results_data, DetectionSet):
+            return results_data
+        return DetectionSet.from_results(
+            results_data, class_ids={name: cid for cid, name in self.class_names.items()},
+        )
 
     # ---------------------------
-    # Yardımcı: center/size'ı garanti et
+    # Ortak tablo: tespitler tek seferde DataFrame'e
     # ---------------------------
-    def _normalize_results(self, results_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _build_tables(self, ds: DetectionSet) -> Dict[str, Any]:
         """
-        Her detection için:
-          - bbox -> (x1,y1,x2,y2)
-          - center -> (cx,cy) yoksa bbox'tan hesaplanır
-          - size   -> (w,h)   yoksa bbox'tan hesaplanır
+        Tüm tespitleri DetectionSet dizilerinden vektörel olarak sütunlara döker; sayfalar
+        ve istatistikler bu tablolardan (groupby / histogram) türetilir.
+          det: her satır bir tespit (image, det_no, class_name, confidence, x1..y2, w, h, cx, cy, area)
+          img: her satır bir görsel (image, filename, count)
+        center/size bbox'tan türetilir.
         """
-        norm = []
-        for r in results_data:
-            detections = []
-            for d in r.get("detections", []):
-                bbox = d.get("bbox") or d.get("box") or d.get("xyxy")
-                if bbox and len(bbox) == 4:
-                    x1, y1, x2, y2 = bbox
-                    w = max(0, int(x2) - int(x1))
-                    h = max(0, int(y2) - int(y1))
-                    cx = int(x1 + w / 2)
-                    cy = int(y1 + h / 2)
-                else:
-                    # bbox yoksa sıfırla
-                    x1 = y1 = x2 = y2 = w = h = cx = cy = 0
-
-                d2 = dict(d)  # kopya
-                d2["bbox"] = [int(x1), int(y1), int(x2), int(y2)]
-                d2.setdefault("size", [int(w), int(h)])
-                d2.setdefault("center", [int(cx), int(cy)])
-                # class_name yoksa class_id'den doldur
-                if "class_name" not in d2:
-                    cid = d2.get("class_id", 0)
-                    d2["class_name"] = self.class_names.get(cid, f"Class_{cid}")
-                detections.append(d2)
-
-            norm.append({
-                "filename": r.get("filename") or r.get("name") or r.get("file") or "",
-                "original_path": r.get("original_path", ""),
-                "processed_path": r.get("processed_path", ""),
-                "detections": detections
-            })
-        return norm
+        dets, counts = ds.dets, ds.counts().astype(np.int64)
+        image = np.repeat(np.arange(len(ds), dtype=np.int64), counts)
+        x1, y1, x2, y2 = dets["bbox"].astype(np.int64).T.reshape(4, -1)
+        w, h = np.maximum(0, x2 - x1), np.maximum(0, y2 - y1)
+
+        uniq, inv = np.unique(dets["class_id"], return_inverse=True)
+        names = np.array([self.class_names.get(int(c), "Bilinmeyen") for c in uniq], dtype=object)
+
+        det = pd.DataFrame({
+            "image": image,
+            "det_no": np.arange(len(dets), dtype=np.int64) - np.repeat(ds.offsets[:-1], counts) + 1,
+            "class_name": names[inv.reshape(-1)] if len(dets) else np.empty(0, dtype=object),
+            "confidence": dets["confidence"].astype(np.float64),
+            "x1": x1, "y1": y1, "x2": x2, "y2": y2,
+            "w": w, "h": h,
+            "cx": (x1 + w / 2).astype(np.int64), "cy": (y1 + h / 2).astype(np.int64),
+        })
+        det["area"] = det["w"] * det["h"]
+        img = pd.DataFrame({
+            "image": np.arange(len(ds), dtype=np.int64),
+            "filename": [f or f"image_{i}" for i, f in enumerate(ds.filenames)],
+            "count": counts,
+        })
+        return {"det": det, "img": img, "generated_at": datetime.now()}
+
+    def _class_counts(self, t: Dict[str, Any]) -> Dict[str, int]:
+        """Bilinen sınıflar sabit sırayla (tanımsız sınıflar sayılmaz)."""
+        vc = t["det"]["class_name"].value_counts()
+        return {name: int(vc.get(name, 0)) for name in self.class_names.values()}
+
+    def _per_image_class_counts(self, t: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Görsel başına sınıf adetleri (bilinen sınıflar), tek bincount ile."""
+        det, n = t["det"], len(t["img"])
+        names = list(self.class_names.values())
+        code = pd.Categorical(det["class_name"], categories=names).codes.astype(np.int64)
+        known = code >= 0
+        flat = np.bincount(det["image"].to_numpy()[known] * len(names) + code[known], minlength=n * len(names))
+        table = flat.reshape(n, len(names))
+        return {name: table[:, k] for k, name in enumerate(names)}
 
     # ---------------------------
     # EXISTING: Excel report
     # ---------------------------
-    async def generate_excel_report(self, results_data: List[Dict[str, Any]], output_path: str) -> str:
+    async def generate_excel_report(
+        self,
+        results_data: Union[DetectionSet, List[Dict[str, Any]]],
+        output_path: str,
+        tables: Optional[Dict[str, Any]] = None,
+    ) -> str:
         """Generate comprehensive Excel report with multiple sheets and charts"""
+        # pandas/openpyxl işi saniyeler-dakikalar sürebilir: event loop'ta değil thread'de
+        return await asyncio.to_thread(self._write_excel_report, results_data, output_path, tables)
+
+    def _write_excel_report(
+        self,
+        results_data: Union[DetectionSet, List[Dict[str, Any]]],
+        output_path: str,
+        tables: Optional[Dict[str, Any]] = None,
+    ) -> str:
         try:
+            results_data = self._detection_set(results_data)
+            t = tables or self._build_tables(results_data)
+
             # Prepare all data
-            report_data = self._prepare_detailed_data(results_data)
-            summary_data = self._prepare_summary_data(results_data)
-            statistics_data = self._prepare_statistics_data(results_data)
-            image_analysis_data = self._prepare_image_analysis_data(results_data)
+            df_details = self._prepare_detailed_data(t)
+            df_summary = pd.DataFrame(self._prepare_summary_data(t))
+            df_stats = pd.DataFrame(self._prepare_statistics_data(t))
+            df_images = self._prepare_image_analysis_data(t)
+            df_quality = pd.DataFrame(self._prepare_quality_control_data(t))
 
             # Create output directory if it doesn't exist
             output_dir = Path(output_path).parent
             output_dir.mkdir(parents=True, exist_ok=True)
 
-            # Write to Excel with multiple sheets
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                # 1. sheetleri yaz
-                df_summary = pd.DataFrame(summary_data)
-                df_summary.to_excel(writer, sheet_name='Yönetici Özeti', index=False)
-
-                df_details = pd.DataFrame(report_data)
-                df_details.to_excel(writer, sheet_name='Detaylı Sonuçlar', index=False)
-
-                df_stats = pd.DataFrame(statistics_data)
-                df_stats.to_excel(writer, sheet_name='İstatistikler', index=False)
-
-                df_images = pd.DataFrame(image_analysis_data)
-                df_images.to_excel(writer, sheet_name='Görsel Analizi', index=False)
-
-                df_quality = pd.DataFrame(self._prepare_quality_control_data(results_data))
-                df_quality.to_excel(writer, sheet_name='Kalite Kontrol', index=False)
-
-                # flush için save() ekle
-                writer.book.save(output_path)
-
-            # with bloğu kapandıktan sonra workbook yeniden açılabilir
-            from openpyxl import load_workbook
-            wb = load_workbook(output_path)
-            await self._format_excel_workbook(wb, {
+            # Write-only workbook: satırlar stilleriyle birlikte tek geçişte diske akar,
+            # workbook bellekte tutulmaz / yeniden açılmaz
+            from openpyxl import Workbook
+            wb = Workbook(write_only=True)
+            sheets = {
                 'Yönetici Özeti': df_summary,
                 'Detaylı Sonuçlar': df_details,
                 'İstatistikler': df_stats,
                 'Görsel Analizi': df_images,
                 'Kalite Kontrol': df_quality
-            })
+            }
+            styles = self._excel_styles(wb)
+            for sheet_name, df in sheets.items():
+                self._write_sheet(wb, sheet_name, df, styles)
             wb.save(output_path)
 
+            return output_path
+
         except Exception as e:
             print(f"Error generating Excel report: {str(e)}")
             raise
 
     # ---------------------------
-    # EXISTING helpers (bazıları ufakça sağlamlaştırıldı)
+    # Sayfa verileri (vektörel)
     # ---------------------------
-    def _prepare_detailed_data(self, results_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _prepare_detailed_data(self, t: Dict[str, Any]) -> pd.DataFrame:
         """Prepare detailed detection data"""
-        report_data = []
-
-        for i, result in enumerate(results_data):
-            filename = result.get("filename", f"image_{i}")
-            detections = result.get("detections", [])
-
-            if not detections:
-                report_data.append({
-                    "Fotoğraf ID": i + 1,
-                    "Dosya Adı": filename,
-                    "Kusur ID": "N/A",
-                    "Kusur Türü": "Kusur Bulunamadı",
-                    "Güven Skoru": 0.0,
-                    "Güven Seviyesi": "N/A",
-                    "Konum (X1, Y1, X2, Y2)": "N/A",
-                    "Merkez Nokta (X, Y)": "N/A",
-                    "Boyut (Genişlik x Yükseklik)": "N/A",
-                    "Alan (piksel²)": 0,
-                    "Kusur Yoğunluğu": "Düşük",
-                    "Kritiklik Seviyesi": "Düşük",
-                    "Analiz Tarihi": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "Durum": "Temiz"
-                })
-            else:
-                for j, detection in enumerate(detections):
-                    bbox = detection.get('bbox', [0, 0, 0, 0])
-                    center = detection.get('center')
-                    size = detection.get('size')
-
-                    # Merkez ve boyut yoksa bbox'tan hesapla
-                    if not center or not size:
-                        x1, y1, x2, y2 = bbox
-                        w = max(0, int(x2) - int(x1))
-                        h = max(0, int(y2) - int(y1))
-                        cx = int(x1 + w / 2)
-                        cy = int(y1 + h / 2)
-                        center = [cx, cy]
-                        size = [w, h]
-
-                    area = size[0] * size[1]
-                    confidence = float(detection.get("confidence", 0.0))
-
-                    # Determine confidence level
-                    if confidence >= 0.9:
-                        conf_level = "Çok Yüksek"
-                    elif confidence >= 0.8:
-                        conf_level = "Yüksek"
-                    elif confidence >= 0.7:
-                        conf_level = "Orta"
-                    else:
-                        conf_level = "Düşük"
-
-                    # Determine criticality based on defect type and size
-                    cls_name = detection.get("class_name") or self.class_names.get(detection.get("class_id", 0), "Bilinmeyen")
-                    criticality = self._determine_criticality(cls_name, area, confidence)
-
-                    # Determine defect density
-                    density = "Yüksek" if len(detections) > 3 else "Orta" if len(detections) > 1 else "Düşük"
-
-                    report_data.append({
-                        "Fotoğraf ID": i + 1,
-                        "Dosya Adı": filename,
-                        "Kusur ID": j + 1,
-                        "Kusur Türü": cls_name,
-                        "Güven Skoru": round(confidence, 3),
-                        "Güven Seviyesi": conf_level,
-                        "Konum (X1, Y1, X2, Y2)": f"({bbox[0]}, {bbox[1]}, {bbox[2]}, {bbox[3]})",
-                        "Merkez Nokta (X, Y)": f"({center[0]}, {center[1]})",
-                        "Boyut (Genişlik x Yükseklik)": f"{size[0]} x {size[1]}",
-                        "Alan (piksel²)": int(area),
-                        "Kusur Yoğunluğu": density,
-                        "Kritiklik Seviyesi": criticality,
-                        "Analiz Tarihi": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "Durum": "Kusurlu"
-                    })
-
-        return report_data
-
-    def _prepare_summary_data(self, results_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        det, img = t["det"], t["img"]
+        stamp = t["generated_at"].strftime("%Y-%m-%d %H:%M:%S")
+
+        conf = det["confidence"].to_numpy()
+        counts = img["count"].to_numpy()[det["image"].to_numpy()]
+        x1, y1, x2, y2, cx, cy, w, h = (det[c].tolist() for c in ("x1", "y1", "x2", "y2", "cx", "cy", "w", "h"))
+
+        defects = pd.DataFrame({
+            "Fotoğraf ID": det["image"] + 1,
+            "Dosya Adı": img["filename"].to_numpy()[det["image"].to_numpy()],
+            "Kusur ID": det["det_no"].astype(object),
+            "Kusur Türü": det["class_name"],
+            "Güven Skoru": det["confidence"].round(3),
+            "Güven Seviyesi": np.select(
+                [conf >= 0.9, conf >= 0.8, conf >= 0.7], ["Çok Yüksek", "Yüksek", "Orta"], default="Düşük"
+            ),
+            "Konum (X1, Y1, X2, Y2)": [f"({a}, {b}, {c}, {d})" for a, b, c, d in zip(x1, y1, x2, y2)],
+            "Merkez Nokta (X, Y)": [f"({a}, {b})" for a, b in zip(cx, cy)],
+            "Boyut (Genişlik x Yükseklik)": [f"{a} x {b}" for a, b in zip(w, h)],
+            "Alan (piksel²)": det["area"],
+            "Kusur Yoğunluğu": np.select([counts > 3, counts > 1], ["Yüksek", "Orta"], default="Düşük"),
+            "Kritiklik Seviyesi": self._determine_criticality(det["class_name"], det["area"], det["confidence"]),
+            "Analiz Tarihi": stamp,
+            "Durum": "Kusurlu",
+        })
+
+        clean = img[img["count"] == 0]
+        clean_rows = pd.DataFrame({
+            "Fotoğraf ID": clean["image"] + 1,
+            "Dosya Adı": clean["filename"],
+            "Kusur ID": "N/A",
+            "Kusur Türü": "Kusur Bulunamadı",
+            "Güven Skoru": 0.0,
+            "Güven Seviyesi": "N/A",
+            "Konum (X1, Y1, X2, Y2)": "N/A",
+            "Merkez Nokta (X, Y)": "N/A",
+            "Boyut (Genişlik x Yükseklik)": "N/A",
+            "Alan (piksel²)": 0,
+            "Kusur Yoğunluğu": "Düşük",
+            "Kritiklik Seviyesi": "Düşük",
+            "Analiz Tarihi": stamp,
+            "Durum": "Temiz",
+        })
+
+        if clean_rows.empty:
+            return defects.reset_index(drop=True)
+        if defects.empty:
+            return clean_rows.reset_index(drop=True)
+        # görsel sırası korunur (temiz görseller kendi yerinde)
+        out = pd.concat([defects, clean_rows], ignore_index=True)
+        return out.sort_values("Fotoğraf ID", kind="stable").reset_index(drop=True)
+
+    def _prepare_summary_data(self, t: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Prepare executive summary data"""
-        total_images = len(results_data)
-        total_detections = sum(len(result.get("detections", [])) for result in results_data)
-
-        # Count by class
-        class_counts = {name: 0 for name in self.class_names.values()}
-        confidence_scores = []
-        areas = []
-
-        for result in results_data:
-            for detection in result.get("detections", []):
-                class_name = detection.get("class_name") or self.class_names.get(detection.get("class_id", 0), "Bilinmeyen")
-                if class_name in class_counts:
-                    class_counts[class_name] += 1
-                confidence_scores.append(float(detection.get("confidence", 0.0)))
-                # Alanı bbox'tan veya size'dan hesapla
-                area = 0
-                if 'size' in detection and detection['size']:
-                    area = detection['size'][0] * detection['size'][1]
-                elif 'bbox' in detection and detection['bbox']:
-                    x1, y1, x2, y2 = detection['bbox']
-                    area = max(0, int(x2) - int(x1)) * max(0, int(y2) - int(y1))
-                areas.append(area)
+        det, img = t["det"], t["img"]
+        total_images = len(img)
+        total_detections = len(det)
+        class_counts = self._class_counts(t)
 
         # Calculate statistics
-        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
+        avg_confidence = float(det["confidence"].mean()) if total_detections else 0
         avg_detections_per_image = total_detections / max(total_images, 1)
-        avg_area = sum(areas) / len(areas) if areas else 0
+        avg_area = float(det["area"].mean()) if total_detections else 0
 
         # Quality assessment
-        images_with_defects = sum(1 for result in results_data if result.get("detections"))
+        images_with_defects = int((img["count"] > 0).sum())
         defect_rate = (images_with_defects / max(total_images, 1)) * 100
 
         quality_status = "İyi" if defect_rate < 20 else "Orta" if defect_rate < 50 else "Kötü"
@@ -341,60 +311,33 @@ class ReportGenerator:
             {"Metrik": "", "Değer": "", "Açıklama": ""},
             {"Metrik": "🏆 KALİTE DEĞERLENDİRMESİ", "Değer": "", "Açıklama": ""},
             {"Metrik": "Genel Kalite Durumu", "Değer": quality_status, "Açıklama": "Kusur oranına göre genel kalite değerlendirmesi"},
-            {"Metrik": "Analiz Tarihi", "Değer": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "Açıklama": "Raporun oluşturulma tarihi ve saati"},
+            {"Metrik": "Analiz Tarihi", "Değer": t["generated_at"].strftime("%Y-%m-%d %H:%M:%S"), "Açıklama": "Raporun oluşturulma tarihi ve saati"},
         ])
 
         return summary_data
 
-    def _prepare_statistics_data(self, results_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Güven aralıkları: [0.5,0.6) ... [0.9,1.0] (son aralık 1.0 dahil, np.histogram ile aynı)
+    CONFIDENCE_EDGES = [0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+    CONFIDENCE_LABELS = ["0.5-0.6", "0.6-0.7", "0.7-0.8", "0.8-0.9", "0.9-1.0"]
+
+    def _confidence_histogram(self, t: Dict[str, Any]) -> Dict[str, int]:
+        counts, _ = np.histogram(t["det"]["confidence"].to_numpy(), bins=self.CONFIDENCE_EDGES)
+        return {label: int(c) for label, c in zip(self.CONFIDENCE_LABELS, counts)}
+
+    def _size_histogram(self, t: Dict[str, Any]) -> List[int]:
+        """[küçük (<1000), orta (<5000), büyük] adetleri"""
+        bins = np.searchsorted([1000, 5000], t["det"]["area"].to_numpy(), side="right")
+        return [int(c) for c in np.bincount(bins, minlength=3)]
+
+    def _prepare_statistics_data(self, t: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Prepare detailed statistics data"""
         stats_data = []
-
-        # Confidence distribution
-        confidence_ranges = {"0.5-0.6": 0, "0.6-0.7": 0, "0.7-0.8": 0, "0.8-0.9": 0, "0.9-1.0": 0}
-
-        # Size distribution
-        size_ranges = {"Küçük (0-1000)": 0, "Orta (1000-5000)": 0, "Büyük (5000+)": 0}
-
-        # Process all detections
-        all_detections = []
-        for result in results_data:
-            all_detections.extend(result.get("detections", []))
-
-        for detection in all_detections:
-            confidence = float(detection.get("confidence", 0.0))
-            # Alan
-            if 'size' in detection and detection['size']:
-                area = detection['size'][0] * detection['size'][1]
-            elif 'bbox' in detection and detection['bbox']:
-                x1, y1, x2, y2 = detection['bbox']
-                area = max(0, int(x2) - int(x1)) * max(0, int(y2) - int(y1))
-            else:
-                area = 0
-
-            # Confidence distribution
-            if 0.5 <= confidence < 0.6:
-                confidence_ranges["0.5-0.6"] += 1
-            elif 0.6 <= confidence < 0.7:
-                confidence_ranges["0.6-0.7"] += 1
-            elif 0.7 <= confidence < 0.8:
-                confidence_ranges["0.7-0.8"] += 1
-            elif 0.8 <= confidence < 0.9:
-                confidence_ranges["0.8-0.9"] += 1
-            elif 0.9 <= confidence <= 1.0:
-                confidence_ranges["0.9-1.0"] += 1
-
-            # Size distribution
-            if area < 1000:
-                size_ranges["Küçük (0-1000)"] += 1
-            elif area < 5000:
-                size_ranges["Orta (1000-5000)"] += 1
-            else:
-                size_ranges["Büyük (5000+)"] += 1
+        total_detections = len(t["det"])
+        confidence_ranges = self._confidence_histogram(t)
+        size_ranges = dict(zip(["Küçük (0-1000)", "Orta (1000-5000)", "Büyük (5000+)"], self._size_histogram(t)))
 
         # Add confidence statistics
         stats_data.append({"Kategori": "GÜVENİLİRLİK DAĞILIMI", "Alt Kategori": "", "Sayı": "", "Yüzde": ""})
-        total_detections = len(all_detections)
         for range_name, count in confidence_ranges.items():
             percentage = (count / max(total_detections, 1)) * 100
             stats_data.append({
@@ -418,66 +361,43 @@ class ReportGenerator:
 
         return stats_data
 
-    def _prepare_image_analysis_data(self, results_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _prepare_image_analysis_data(self, t: Dict[str, Any]) -> pd.DataFrame:
         """Prepare per-image analysis data"""
-        image_data = []
-
-        for i, result in enumerate(results_data):
-            filename = result.get("filename", f"image_{i}")
-            detections = result.get("detections", [])
-
-            # Calculate image-level statistics
-            total_defects = len(detections)
-            avg_confidence = (sum(float(d.get("confidence", 0.0)) for d in detections) / max(total_defects, 1)) if detections else 0
-
-            # Count by type
-            type_counts = {name: 0 for name in self.class_names.values()}
-            total_area = 0
-
-            for detection in detections:
-                class_name = detection.get("class_name") or self.class_names.get(detection.get("class_id", 0), "Bilinmeyen")
-                if class_name in type_counts:
-                    type_counts[class_name] += 1
-
-                if 'size' in detection and detection['size']:
-                    total_area += detection['size'][0] * detection['size'][1]
-                elif 'bbox' in detection and detection['bbox']:
-                    x1, y1, x2, y2 = detection['bbox']
-                    total_area += max(0, int(x2) - int(x1)) * max(0, int(y2) - int(y1))
-
-            # Determine image quality
-            if total_defects == 0:
-                quality = "Mükemmel"
-                risk_level = "Düşük"
-            elif total_defects <= 2 and avg_confidence < 0.8:
-                quality = "İyi"
-                risk_level = "Düşük"
-            elif total_defects <= 5:
-                quality = "Orta"
-                risk_level = "Orta"
-            else:
-                quality = "Kötü"
-                risk_level = "Yüksek"
-
-            image_data.append({
-                "Fotoğraf Adı": filename,
-                "Toplam Kusur": total_defects,
-                "Krater": type_counts.get("Krater", 0),
-                "Tanecik": type_counts.get("Tanecik", 0),
-                "Pinhol": type_counts.get("Pinhol", 0),
-                "Ortalama Güven": f"{avg_confidence * 100:.1f}%" if avg_confidence > 0 else "N/A",
-                "Toplam Kusur Alanı": f"{int(total_area)} piksel²",
-                "Kalite Değerlendirmesi": quality,
-                "Risk Seviyesi": risk_level,
-                "Öneri": self._get_recommendation(total_defects, type_counts, avg_confidence)
-            })
-
-        return image_data
-
-    def _prepare_quality_control_data(self, results_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        det, img = t["det"], t["img"]
+        n = len(img)
+        total = img["count"].to_numpy()
+
+        image = det["image"].to_numpy()
+        conf_sum = np.bincount(image, weights=det["confidence"].to_numpy(), minlength=n)
+        area_sum = np.bincount(image, weights=det["area"].to_numpy(), minlength=n)
+        avg_conf = np.where(total > 0, conf_sum / np.maximum(total, 1), 0.0)
+        by_class = self._per_image_class_counts(t)
+
+        # Determine image quality
+        clean = total == 0
+        minor = (total <= 2) & (avg_conf < 0.8)
+        medium = total <= 5
+        quality = np.select([clean, minor, medium], ["Mükemmel", "İyi", "Orta"], default="Kötü")
+        risk = np.select([clean, minor, medium], ["Düşük", "Düşük", "Orta"], default="Yüksek")
+
+        return pd.DataFrame({
+            "Fotoğraf Adı": img["filename"],
+            "Toplam Kusur": total,
+            "Krater": by_class["Krater"],
+            "Tanecik": by_class["Tanecik"],
+            "Pinhol": by_class["Pinhol"],
+            "Ortalama Güven": [f"{v * 100:.1f}%" if v > 0 else "N/A" for v in avg_conf.tolist()],
+            "Toplam Kusur Alanı": [f"{int(v)} piksel²" for v in area_sum.tolist()],
+            "Kalite Değerlendirmesi": quality,
+            "Risk Seviyesi": risk,
+            "Öneri": self._get_recommendation(total, by_class["Krater"], avg_conf),
+        })
+
+    def _prepare_quality_control_data(self, t: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Prepare quality control checklist data"""
-        total_images = len(results_data)
-        total_detections = sum(len(result.get("detections", [])) for result in results_data)
+        det, img = t["det"], t["img"]
+        total_images = len(img)
+        total_detections = len(det)
 
         # Quality thresholds
         max_defects_per_image = 3
@@ -485,15 +405,10 @@ class ReportGenerator:
         max_defect_rate = 0.3  # 30%
 
         # Calculate metrics
-        images_with_many_defects = sum(1 for result in results_data if len(result.get("detections", [])) > max_defects_per_image)
-        low_confidence_detections = 0
+        images_with_many_defects = int((img["count"] > max_defects_per_image).sum())
+        low_confidence_detections = int((det["confidence"] < min_confidence_threshold).sum())
 
-        for result in results_data:
-            for detection in result.get("detections", []):
-                if float(detection.get("confidence", 0.0)) < min_confidence_threshold:
-                    low_confidence_detections += 1
-
-        defect_rate = (sum(1 for result in results_data if result.get("detections")) / max(total_images, 1))
+        defect_rate = int((img["count"] > 0).sum()) / max(total_images, 1)
 
         quality_data = [
             {
@@ -535,112 +450,111 @@ class ReportGenerator:
 
         return quality_data
 
-    def _determine_criticality(self, defect_type: str, area: int, confidence: float) -> str:
-        """Determine criticality level based on defect characteristics"""
-        # Base criticality by type
-        type_criticality = {
-            "Krater": 3,      # High criticality
-            "Pinhol": 2,      # Medium criticality
-            "Tanecik": 1      # Low criticality
+    def _determine_criticality(self, defect_type: pd.Series, area: pd.Series, confidence: pd.Series) -> np.ndarray:
+        """Determine criticality level based on defect characteristics (vectorized)"""
+        # Base criticality by type: Krater yüksek, Pinhol orta, Tanecik/diğer düşük
+        type_criticality = {"Krater": 3, "Pinhol": 2, "Tanecik": 1}
+        score = defect_type.map(type_criticality).fillna(1).to_numpy(dtype=np.int64)
+
+        # Adjust by size / confidence
+        area = area.to_numpy()
+        score = (
+            score
+            + np.where(area > 5000, 2, np.where(area > 2000, 1, 0))
+            + (confidence.to_numpy() > 0.9).astype(np.int64)
+        )
+
+        return np.select([score >= 5, score >= 3, score >= 2], ["Kritik", "Yüksek", "Orta"], default="Düşük")
+
+    def _get_recommendation(self, total_defects: np.ndarray, krater_counts: np.ndarray, avg_confidence: np.ndarray) -> np.ndarray:
+        """Get recommendation based on analysis results (per image, vectorized)"""
+        return np.select(
+            [
+                total_defects == 0,
+                (total_defects <= 2) & (avg_confidence < 0.8),
+                krater_counts > 0,
+                total_defects > 5,
+            ],
+            [
+                "Kalite standartlarına uygun. Üretim devam edebilir.",
+                "Minör kusurlar mevcut. Kontrol edilmesi önerilir.",
+                "Krater kusuru tespit edildi. Acil müdahale gerekli.",
+                "Yüksek kusur yoğunluğu. Üretim parametreleri gözden geçirilmeli.",
+            ],
+            default="Orta seviye kusurlar. Kalite kontrol süreçleri iyileştirilebilir.",
+        )
+
+    def _excel_styles(self, workbook) -> Dict[str, str]:
+        """
+        Başlık / hücre / alt başlık stillerini workbook'a NamedStyle olarak bir kez
+        kaydeder; hücreler sadece stil adını alır (hücre başına Font/Border yok).
+        """
+        from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment, Border, Side
+
+        thin = Side(style='thin')
+        border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        styles = {
+            "header": NamedStyle(
+                name="pda_header",
+                font=Font(bold=True, size=12, color="FFFFFF"),
+                fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+                alignment=Alignment(horizontal="center", vertical="center"),
+                border=border,
+            ),
+            "subheader": NamedStyle(
+                name="pda_subheader",
+                font=Font(bold=True, size=11, color="2F4F4F"),
+                fill=PatternFill(start_color="E8F4FD", end_color="E8F4FD", fill_type="solid"),
+                border=border,
+            ),
+            "cell": NamedStyle(name="pda_cell", border=border),
         }
-
-        base_score = type_criticality.get(defect_type, 1)
-
-        # Adjust by size
-        if area > 5000:
-            base_score += 2
-        elif area > 2000:
-            base_score += 1
-
-        # Adjust by confidence
-        if confidence > 0.9:
-            base_score += 1
-
-        # Determine final criticality
-        if base_score >= 5:
-            return "Kritik"
-        elif base_score >= 3:
-            return "Yüksek"
-        elif base_score >= 2:
-            return "Orta"
-        else:
-            return "Düşük"
-
-    def _get_recommendation(self, total_defects: int, type_counts: Dict[str, int], avg_confidence: float) -> str:
-        """Get recommendation based on analysis results"""
-        if total_defects == 0:
-            return "Kalite standartlarına uygun. Üretim devam edebilir."
-        elif total_defects <= 2 and avg_confidence < 0.8:
-            return "Minör kusurlar mevcut. Kontrol edilmesi önerilir."
-        elif type_counts.get("Krater", 0) > 0:
-            return "Krater kusuru tespit edildi. Acil müdahale gerekli."
-        elif total_defects > 5:
-            return "Yüksek kusur yoğunluğu. Üretim parametreleri gözden geçirilmeli."
-        else:
-            return "Orta seviye kusurlar. Kalite kontrol süreçleri iyileştirilebilir."
-
-    async def _format_excel_workbook(self, workbook, dataframes: Dict[str, pd.DataFrame]):
-        try:
-            from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-
-            # Define styles
-            header_font = Font(bold=True, size=12, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            subheader_font = Font(bold=True, size=11, color="2F4F4F")
-            subheader_fill = PatternFill(start_color="E8F4FD", end_color="E8F4FD", fill_type="solid")
-
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-
-            # Format each sheet
-            for sheet_name, df in dataframes.items():
-                worksheet = workbook[sheet_name]
-
-                # Format headers
-                for cell in worksheet[1]:
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = Alignment(horizontal="center", vertical="center")
-                    cell.border = border
-
-                # Auto-adjust column widths
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    worksheet.column_dimensions[column_letter].width = min(max_length + 2, 50)
-
-                # Add borders to all cells
-                for row in worksheet.iter_rows():
-                    for cell in row:
-                        cell.border = border
-
-                # Special formatting for summary sheet
-                if sheet_name == 'Yönetici Özeti':
-                    for row in worksheet.iter_rows(min_row=2):
-                        if row[0].value and str(row[0].value).startswith(('📊', '📈', '🎯', '🏆')):
-                            for cell in row:
-                                cell.font = subheader_font
-                                cell.fill = subheader_fill
-
-            # Chart ekleme
-            if 'İstatistikler' in dataframes:
-                await self._add_charts_to_statistics(workbook['İstatistikler'])
-
-        except Exception as e:
-            print(f"Warning: Could not apply advanced formatting: {str(e)}")
-
-
-    async def _add_charts_to_statistics(self, worksheet):
+        for style in styles.values():
+            workbook.add_named_style(style)
+        return {key: style.name for key, style in styles.items()}
+
+    @staticmethod
+    def _column_widths(df: pd.DataFrame) -> List[int]:
+        """Başlık + değerlerin en uzun metin uzunluğu (+2, en fazla 50); satır yazılmadan önce."""
+        widths = []
+        for col in df.columns:
+            values = df[col]
+            longest = int(values.astype(str).str.len().max()) if len(values) else 0
+            widths.append(min(max(longest, len(str(col))) + 2, 50))
+        return widths
+
+    def _write_sheet(self, workbook, sheet_name: str, df: pd.DataFrame, styles: Dict[str, str]):
+        """Tek sayfayı başlık, kenarlık ve sütun genişlikleriyle birlikte akıtır."""
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+
+        worksheet = workbook.create_sheet(sheet_name)
+        for i, width in enumerate(self._column_widths(df), start=1):
+            worksheet.column_dimensions[get_column_letter(i)].width = width
+
+        header = []
+        for name in df.columns:
+            cell = WriteOnlyCell(worksheet, value=str(name))
+            cell.style = styles["header"]
+            header.append(cell)
+        worksheet.append(header)
+
+        subheader = sheet_name == 'Yönetici Özeti'
+        for values in df.itertuples(index=False, name=None):
+            highlight = subheader and str(values[0]).startswith(('📊', '📈', '🎯', '🏆'))
+            style = styles["subheader"] if highlight else styles["cell"]
+            row = []
+            for value in values:
+                cell = WriteOnlyCell(worksheet, value=None if value == "" else value)
+                cell.style = style
+                row.append(cell)
+            worksheet.append(row)
+
+        # Chart ekleme
+        if sheet_name == 'İstatistikler':
+            self._add_charts_to_statistics(worksheet)
+
+    def _add_charts_to_statistics(self, worksheet):
         """Add charts to statistics sheet"""
         try:
             from openpyxl.chart import BarChart, PieChart, Reference
@@ -656,92 +570,26 @@ class ReportGenerator:
         except Exception as e:
             print(f"Warning: Could not add charts: {str(e)}")
 
-    async def generate_pdf_report(self, results_data: List[Dict[str, Any]], output_path: str) -> str:
-        """Generate PDF report as an alternative to Excel"""
+    async def generate_pdf_report(
+        self,
+        results_data: Union[DetectionSet, List[Dict[str, Any]]],
+        output_path: str,
+        tables: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        PDF raporu: yönetici özeti + ilk 20 tespit, ardından her görsel için
+        küçültülmüş işlenmiş görsel ve tespit tablosu. Satırlar thread'de hazırlanır,
+        çizim PdfRenderer ile worker süreçlerinde yapılır (event loop bloklanmaz).
+        """
         try:
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib import colors
-
-            # Create PDF document
-            doc = SimpleDocTemplate(output_path, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-
-            # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=1  # Center alignment
+            summary_rows, detail_rows, pages = await asyncio.to_thread(
+                self._pdf_inputs, results_data, output_path, tables,
+            )
+            await self.pdf_renderer.render(
+                output_path,
+                {"summary_rows": summary_rows, "detail_rows": detail_rows},
+                pages,
             )
-            story.append(Paragraph("Boya Kusurları Analiz Raporu", title_style))
-            story.append(Spacer(1, 20))
-
-            # Summary section
-            summary_data = self._prepare_summary_data(results_data)
-            story.append(Paragraph("Yönetici Özeti", styles['Heading2']))
-
-            # Create summary table
-            summary_table_data = [["Metrik", "Değer", "Açıklama"]]
-            for item in summary_data[:10]:  # First 10 items
-                if item["Metrik"] and not item["Metrik"].startswith(('📊', '📈', '🎯', '🏆')):
-                    summary_table_data.append([
-                        item["Metrik"],
-                        str(item["Değer"]),
-                        item["Açıklama"]
-                    ])
-
-            from reportlab.platypus import Table  # local import safety
-            summary_table = Table(summary_table_data, colWidths=[2*inch, 1*inch, 3*inch])
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-
-            story.append(summary_table)
-            story.append(PageBreak())
-
-            # Detailed results section
-            story.append(Paragraph("Detaylı Sonuçlar", styles['Heading2']))
-
-            detailed_data = self._prepare_detailed_data(results_data)
-            if detailed_data:
-                # Create detailed table (first 20 entries)
-                detail_table_data = [["Dosya", "Kusur Türü", "Güven", "Kritiklik"]]
-                for item in detailed_data[:20]:
-                    detail_table_data.append([
-                        item["Dosya Adı"],
-                        item["Kusur Türü"],
-                        f"{item['Güven Skoru']:.2f}",
-                        item["Kritiklik Seviyesi"]
-                    ])
-
-                detail_table = Table(detail_table_data, colWidths=[2*inch, 1.5*inch, 1*inch, 1.5*inch])
-                detail_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-
-                story.append(detail_table)
-
-            # Build PDF
-            doc.build(story)
 
             print(f"PDF report generated: {output_path}")
             return output_path
@@ -753,27 +601,102 @@ class ReportGenerator:
             print(f"Error generating PDF report: {str(e)}")
             raise
 
-    async def generate_json_report(self, results_data: List[Dict[str, Any]], output_path: str) -> str:
+    def _pdf_inputs(
+        self,
+        results_data: Union[DetectionSet, List[Dict[str, Any]]],
+        output_path: str,
+        tables: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[List[str]], List[List[str]], List[Dict[str, Any]]]:
+        """PDF worker'larına gidecek düz satırlar (tablolar + sayfalar); thread'de hazırlanır."""
+        results_data = self._detection_set(results_data)
+        t = tables or self._build_tables(results_data)
+
+        # Summary section (First 10 items, başlık satırları hariç)
+        summary_rows = [
+            [item["Metrik"], str(item["Değer"]), item["Açıklama"]]
+            for item in self._prepare_summary_data(t)[:10]
+            if item["Metrik"] and not item["Metrik"].startswith(('📊', '📈', '🎯', '🏆'))
+        ]
+        detailed_data = self._prepare_detailed_data(t)
+        detail_rows = [
+            [item["Dosya Adı"], item["Kusur Türü"], f"{item['Güven Skoru']:.2f}", item["Kritiklik Seviyesi"]]
+            for item in detailed_data.head(20).to_dict("records")
+        ]
+
+        output_dir = Path(output_path).parent
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return summary_rows, detail_rows, self._prepare_pdf_pages(t, results_data)
+
+    def _resolve_image(self, rel: Optional[str]) -> Optional[str]:
+        """'results/<group>/<run>/processed_*.jpg' → results_dir altındaki gerçek yol."""
+        if not rel:
+            return None
+        path = Path(rel)
+        if not path.is_absolute() and self.results_dir and path.parts[:1] == ("results",):
+            path = self.results_dir / Path(*path.parts[1:])
+        return str(path)
+
+    def _prepare_pdf_pages(self, t: Dict[str, Any], ds: DetectionSet) -> List[Dict[str, Any]]:
+        """Görsel başına sayfa verisi (worker'a gönderilebilir düz listeler)."""
+        det, img = t["det"], t["img"]
+        criticality = self._determine_criticality(det["class_name"], det["area"], det["confidence"])
+        rows = [
+            [str(no), cls, f"{conf:.2f}", f"({a}, {b}, {c}, {d})", str(area), crit]
+            for no, cls, conf, a, b, c, d, area, crit in zip(
+                det["det_no"].tolist(), det["class_name"].tolist(), det["confidence"].tolist(),
+                det["x1"].tolist(), det["y1"].tolist(), det["x2"].tolist(), det["y2"].tolist(),
+                det["area"].tolist(), criticality.tolist(),
+            )
+        ]
+        # det satırları görsel sırasıyla; ofsetlerle dilimlenir
+        bounds = ds.offsets.tolist()
+        return [
+            {
+                "index": i + 1,
+                "filename": img["filename"].iat[i],
+                "image_path": self._resolve_image(ds.processed_paths[i]),
+                "rows": rows[bounds[i]:bounds[i + 1]],
+            }
+            for i in range(len(img))
+        ]
+
+    async def generate_json_report(
+        self,
+        results_data: Union[DetectionSet, List[Dict[str, Any]]],
+        output_path: str,
+        tables: Optional[Dict[str, Any]] = None,
+    ) -> str:
         """Generate JSON report from analysis results"""
+        return await asyncio.to_thread(self._write_json_report, results_data, output_path, tables)
+
+    def _write_json_report(
+        self,
+        results_data: Union[DetectionSet, List[Dict[str, Any]]],
+        output_path: str,
+        tables: Optional[Dict[str, Any]] = None,
+    ) -> str:
         try:
+            results_data = self._detection_set(results_data)
+            t = tables or self._build_tables(results_data)
+
             # Prepare comprehensive report structure
             report = {
                 "metadata": {
-                    "generated_at": datetime.now().isoformat(),
+                    "generated_at": t["generated_at"].isoformat(),
                     "version": "2.0.0",
                     "report_type": "paint_defect_analysis",
-                    "total_images": len(results_data),
-                    "total_detections": sum(len(result.get("detections", [])) for result in results_data)
+                    "total_images": len(t["img"]),
+                    "total_detections": len(t["det"])
                 },
-                "executive_summary": self._generate_summary_stats(results_data),
-                "detailed_results": results_data,
+                "executive_summary": self._generate_summary_stats(t),
+                "detailed_results": results_data.to_results(self.class_names, geometry=True),
                 "statistics": {
-                    "confidence_distribution": self._calculate_confidence_distribution(results_data),
-                    "size_distribution": self._calculate_size_distribution(results_data),
-                    "defect_type_analysis": self._calculate_defect_type_analysis(results_data)
+                    "confidence_distribution": self._calculate_confidence_distribution(t),
+                    "size_distribution": self._calculate_size_distribution(t),
+                    "defect_type_analysis": self._calculate_defect_type_analysis(t)
                 },
-                "quality_assessment": self._generate_quality_assessment(results_data),
-                "recommendations": self._generate_recommendations(results_data)
+                "quality_assessment": self._generate_quality_assessment(t),
+                "recommendations": self._generate_recommendations(t)
             }
 
             # Create output directory if it doesn't exist
@@ -791,106 +714,52 @@ class ReportGenerator:
             print(f"Error generating JSON report: {str(e)}")
             raise
 
-    def _calculate_confidence_distribution(self, results_data: List[Dict[str, Any]]) -> Dict[str, int]:
+    def _calculate_confidence_distribution(self, t: Dict[str, Any]) -> Dict[str, int]:
         """Calculate confidence score distribution"""
-        distribution = {"0.5-0.6": 0, "0.6-0.7": 0, "0.7-0.8": 0, "0.8-0.9": 0, "0.9-1.0": 0}
-
-        for result in results_data:
-            for detection in result.get("detections", []):
-                confidence = float(detection.get("confidence", 0.0))
-                if 0.5 <= confidence < 0.6:
-                    distribution["0.5-0.6"] += 1
-                elif 0.6 <= confidence < 0.7:
-                    distribution["0.6-0.7"] += 1
-                elif 0.7 <= confidence < 0.8:
-                    distribution["0.7-0.8"] += 1
-                elif 0.8 <= confidence < 0.9:
-                    distribution["0.8-0.9"] += 1
-                elif 0.9 <= confidence <= 1.0:
-                    distribution["0.9-1.0"] += 1
-
-        return distribution
-
-    def _calculate_size_distribution(self, results_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        return self._confidence_histogram(t)
+
+    def _calculate_size_distribution(self, t: Dict[str, Any]) -> Dict[str, int]:
         """Calculate defect size distribution"""
-        distribution = {"small": 0, "medium": 0, "large": 0}
-
-        for result in results_data:
-            for detection in result.get("detections", []):
-                area = 0
-                if 'size' in detection and detection['size']:
-                    area = detection['size'][0] * detection['size'][1]
-                elif 'bbox' in detection and detection['bbox']:
-                    x1, y1, x2, y2 = detection['bbox']
-                    area = max(0, int(x2) - int(x1)) * max(0, int(y2) - int(y1))
-
-                if area < 1000:
-                    distribution["small"] += 1
-                elif area < 5000:
-                    distribution["medium"] += 1
-                else:
-                    distribution["large"] += 1
-
-        return distribution
-
-    def _calculate_defect_type_analysis(self, results_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return dict(zip(["small", "medium", "large"], self._size_histogram(t)))
+
+    def _calculate_defect_type_analysis(self, t: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate detailed defect type analysis"""
-        analysis = {}
+        det = t["det"]
+        levels = ["Düşük", "Orta", "Yüksek", "Kritik"]
 
-        for class_name in self.class_names.values():
-            analysis[class_name] = {
+        analysis = {
+            class_name: {
                 "count": 0,
                 "avg_confidence": 0.0,
                 "avg_size": 0.0,
-                "criticality_distribution": {"Düşük": 0, "Orta": 0, "Yüksek": 0, "Kritik": 0}
+                "criticality_distribution": {level: 0 for level in levels}
+            }
+            for class_name in self.class_names.values()
+        }
+        if det.empty:
+            return analysis
+
+        crit = pd.Series(self._determine_criticality(det["class_name"], det["area"], det["confidence"]), index=det.index)
+        g = det.groupby("class_name", sort=False)
+        agg = g.agg(count=("confidence", "size"), avg_confidence=("confidence", "mean"), avg_size=("area", "mean"))
+        crit_table = pd.crosstab(det["class_name"], crit)
+
+        for cls, row in agg.iterrows():
+            dist = {level: 0 for level in levels}
+            dist.update({k: int(v) for k, v in crit_table.loc[cls].items() if v})
+            analysis[cls] = {
+                "count": int(row["count"]),
+                "avg_confidence": float(row["avg_confidence"]),
+                "avg_size": float(row["avg_size"]),
+                "criticality_distribution": dist,
             }
-
-        # Collect data
-        for result in results_data:
-            for detection in result.get("detections", []):
-                cls = detection.get("class_name") or self.class_names.get(detection.get("class_id", 0), "Bilinmeyen")
-                rec = analysis.setdefault(cls, {
-                    "count": 0, "avg_confidence": 0.0, "avg_size": 0.0,
-                    "criticality_distribution": {"Düşük": 0, "Orta": 0, "Yüksek": 0, "Kritik": 0}
-                })
-                rec["count"] += 1
-
-                # Add confidence
-                rec["avg_confidence"] += float(detection.get("confidence", 0.0))
-
-                # Add size
-                area = 0
-                if 'size' in detection and detection['size']:
-                    area = detection['size'][0] * detection['size'][1]
-                elif 'bbox' in detection and detection['bbox']:
-                    x1, y1, x2, y2 = detection['bbox']
-                    area = max(0, int(x2) - int(x1)) * max(0, int(y2) - int(y1))
-                rec["avg_size"] += float(area)
-
-                # Add criticality
-                criticality = self._determine_criticality(
-                    cls,
-                    area,
-                    float(detection.get("confidence", 0.0))
-                )
-                rec["criticality_distribution"][criticality] = rec["criticality_distribution"].get(criticality, 0) + 1
-
-        # Calculate averages
-        for cls, rec in analysis.items():
-            count = rec["count"]
-            if count > 0:
-                rec["avg_confidence"] = rec["avg_confidence"] / count
-                rec["avg_size"] = rec["avg_size"] / count
-            else:
-                rec["avg_confidence"] = 0.0
-                rec["avg_size"] = 0.0
 
         return analysis
 
-    def _generate_quality_assessment(self, results_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _generate_quality_assessment(self, t: Dict[str, Any]) -> Dict[str, Any]:
         """Generate overall quality assessment"""
-        total_images = len(results_data)
-        images_with_defects = sum(1 for result in results_data if result.get("detections"))
+        total_images = len(t["img"])
+        images_with_defects = int((t["img"]["count"] > 0).sum())
         defect_rate = images_with_defects / max(total_images, 1)
 
         # Determine quality grade
@@ -917,19 +786,13 @@ class ReportGenerator:
             "clean_images": total_images - images_with_defects
         }
 
-    def _generate_recommendations(self, results_data: List[Dict[str, Any]]) -> List[str]:
+    def _generate_recommendations(self, t: Dict[str, Any]) -> List[str]:
         """Generate actionable recommendations"""
         recommendations = []
 
         # Analyze patterns
-        total_detections = sum(len(result.get("detections", [])) for result in results_data)
-        class_counts = {name: 0 for name in self.class_names.values()}
-
-        for result in results_data:
-            for detection in result.get("detections", []):
-                class_name = detection.get("class_name") or self.class_names.get(detection.get("class_id", 0), "Bilinmeyen")
-                if class_name in class_counts:
-                    class_counts[class_name] += 1
+        total_detections = len(t["det"])
+        class_counts = self._class_counts(t)
 
         # Generate specific recommendations
         if total_detections > 0:
@@ -943,7 +806,7 @@ class ReportGenerator:
                 recommendations.append("Tanecik kusurları mevcut. Filtrasyon sistemlerini ve temizlik prosedürlerini iyileştirin.")
 
         # General recommendations
-        defect_rate = sum(1 for result in results_data if result.get("detections")) / max(len(results_data), 1)
+        defect_rate = int((t["img"]["count"] > 0).sum()) / max(len(t["img"]), 1)
 
         if defect_rate > 0.5:
             recommendations.append("Yüksek kusur oranı tespit edildi. Üretim parametrelerinin kapsamlı incelenmesi önerilir.")
@@ -955,32 +818,23 @@ class ReportGenerator:
 
         return recommendations
 
-    def _generate_summary_stats(self, results_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _generate_summary_stats(self, t: Dict[str, Any]) -> Dict[str, Any]:
         """Generate summary statistics"""
-        total_images = len(results_data)
-        total_detections = sum(len(result.get("detections", [])) for result in results_data)
-
-        # Count by class
-        class_counts = {name: 0 for name in self.class_names.values()}
-        confidence_scores = []
-
-        for result in results_data:
-            for detection in result.get("detections", []):
-                class_name = detection.get("class_name") or self.class_names.get(detection.get("class_id", 0), "Bilinmeyen")
-                if class_name in class_counts:
-                    class_counts[class_name] += 1
-                confidence_scores.append(float(detection.get("confidence", 0.0)))
+        det, img = t["det"], t["img"]
+        total_images = len(img)
+        total_detections = len(det)
 
         # Calculate statistics
-        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
+        avg_confidence = float(det["confidence"].mean()) if total_detections else 0.0
         avg_detections_per_image = total_detections / max(total_images, 1)
+        images_with_defects = int((img["count"] > 0).sum())
 
         return {
             "total_images": total_images,
             "total_detections": total_detections,
             "average_detections_per_image": round(avg_detections_per_image, 2),
             "average_confidence": round(avg_confidence, 3),
-            "class_distribution": class_counts,
-            "images_with_defects": sum(1 for result in results_data if result.get("detections")),
-            "images_without_defects": sum(1 for result in results_data if not result.get("detections"))
+            "class_distribution": self._class_counts(t),
+            "images_with_defects": images_with_defects,
+            "images_without_defects": total_images - images_with_defects
         }
@@ -0,0 +1,244 @@
+# backend/retention.py
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class RetentionPolicy:
+    """
+    Tek bir klasör için kota.
+    - max_bytes: toplam boyut limiti (0 = yok)
+    - max_age_days: son erişimden bu yana gün limiti (0 = yok)
+    - unit: "entry" → klasörün birinci seviye girdileri (dosya/klasör) birer birim;
+            "run"   → results/<group>/<run_id> klasörleri birer birim (pinned korunur)
+    """
+
+    def __init__(self, name: str, path: Path, max_bytes: int = 0, max_age_days: float = 0, unit: str = "entry"):
+        self.name = name
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.max_age_days = float(max_age_days)
+        self.unit = unit
+
+    @classmethod
+    def from_env(cls, name: str, path: Path, default_mb: int, default_days: float, unit: str = "entry") -> "RetentionPolicy":
+        key = name.upper()
+        return cls(
+            name,
+            path,
+            max_bytes=int(float(os.getenv(f"PDA_RETENTION_{key}_MAX_MB", default_mb)) * MB),
+            max_age_days=float(os.getenv(f"PDA_RETENTION_{key}_MAX_DAYS", default_days)),
+            unit=unit,
+        )
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "max_mb": round(self.max_bytes / MB, 1),
+            "max_age_days": self.max_age_days,
+            "unit": self.unit,
+        }
+
+
+def _tree_size_and_access(p: Path, use_atime: bool = True):
+    """
+    (toplam bayt, en son erişim/değişim zamanı).
+    use_atime=False: sadece mtime (kendi okumalarımız atime'ı tazelemesin diye).
+    """
+    if p.is_file():
+        st = p.stat()
+        return st.st_size, max(st.st_atime, st.st_mtime) if use_atime else st.st_mtime
+    total, last = 0, p.stat().st_mtime
+    for root, _dirs, files in os.walk(p):
+        for f in files:
+            try:
+                st = os.stat(os.path.join(root, f))
+            except OSError:
+                continue
+            total += st.st_size
+            last = max(last, st.st_atime, st.st_mtime) if use_atime else max(last, st.st_mtime)
+    return total, last
+
+
+def is_pinned(run_dir: Path) -> bool:
+    meta_file = run_dir / "run.json"
+    if not meta_file.exists():
+        return False
+    try:
+        return bool(json.loads(meta_file.read_text(encoding="utf-8")).get("pinned", False))
+    except Exception:
+        return False
+
+
+class RetentionManager:
+    """
+    Kota/yaş temelli temizlik servisi. Türev çıktılar (downloads, temp, cache)
+    LRU sırasıyla silinir; results altında pinned run'lar asla silinmez.
+    protected() → hâlâ ihtiyaç duyulan yollar (ör. indirme manifest'lerinin kaynakları);
+    bunları içeren birimler de pinned sayılır.
+    Çok yeni girdiler (grace_seconds) çalışan işlere ait olabileceği için atlanır.
+    """
+
+    def __init__(
+        self,
+        policies: List[RetentionPolicy],
+        grace_seconds: int = 600,
+        on_run_removed: Optional[Callable[[str, str], None]] = None,
+        on_file_removed: Optional[Callable[[str, Path], None]] = None,
+        protected: Optional[Callable[[], Iterable[Path]]] = None,
+    ):
+        self.policies = policies
+        self.grace_seconds = int(grace_seconds)
+        self.on_run_removed = on_run_removed
+        # (politika adı, silinen yol): run dışı girdileri izleyen kataloglar için (ör. uploads)
+        self.on_file_removed = on_file_removed
+        self.protected = protected
+        self._lock = threading.Lock()
+        self.last_report: Optional[Dict[str, Any]] = None
+        self.total_reclaimed = 0
+
+    def _protected_units(self) -> Set[Path]:
+        """protected() yollarını içeren birimlerin (birinci seviye girdi / run klasörü) yolları."""
+        if not self.protected:
+            return set()
+        units: Set[Path] = set()
+        for p in self.protected():
+            p = Path(p)
+            for policy in self.policies:
+                try:
+                    parts = p.relative_to(policy.path).parts
+                except ValueError:
+                    continue
+                depth = 2 if policy.unit == "run" else 1
+                if len(parts) >= depth:
+                    units.add(policy.path.joinpath(*parts[:depth]))
+        return units
+
+    def _units(self, policy: RetentionPolicy, protected: Set[Path] = frozenset()) -> List[Dict[str, Any]]:
+        units = []
+        if not policy.path.exists():
+            return units
+        if policy.unit == "run":
+            candidates = [
+                (run, (group.name, run.name))
+                for group in policy.path.iterdir() if group.is_dir()
+                for run in group.iterdir() if run.is_dir()
+            ]
+        else:
+            candidates = [(p, None) for p in policy.path.iterdir()]
+
+        for p, run_key in candidates:
+            try:
+                size, last = _tree_size_and_access(p, use_atime=run_key is None)
+            except OSError:
+                continue
+            units.append({
+                "policy": policy.name,
+                "path": p,
+                "size": size,
+                "last_access": last,
+                "run": run_key,
+                "pinned": p in protected or (run_key is not None and is_pinned(p)),
+            })
+        return units
+
+    def _remove(self, unit: Dict[str, Any]):
+        p: Path = unit["path"]
+        if p.is_dir():
+            shutil.rmtree(p, ignore_errors=True)
+        else:
+            p.unlink(missing_ok=True)
+        if unit["run"]:
+            group_dir = p.parent
+            try:
+                if group_dir.exists() and not any(group_dir.iterdir()):
+                    group_dir.rmdir()
+            except OSError:
+                pass
+            if self.on_run_removed:
+                self.on_run_removed(*unit["run"])
+        elif self.on_file_removed:
+            self.on_file_removed(unit["policy"], p)
+
+    def _apply(self, policy: RetentionPolicy, now: float, dry_run: bool, protected: Set[Path] = frozenset()) -> Dict[str, Any]:
+        units = self._units(policy, protected)
+        used = sum(u["size"] for u in units)
+        removable = sorted(
+            (u for u in units if not u["pinned"] and now - u["last_access"] > self.grace_seconds),
+            key=lambda u: u["last_access"],
+        )
+
+        removed, reclaimed = [], 0
+        for u in removable:
+            too_old = policy.max_age_days > 0 and (now - u["last_access"]) > policy.max_age_days * 86400
+            over_quota = policy.max_bytes > 0 and (used - reclaimed) > policy.max_bytes
+            if not (too_old or over_quota):
+                continue
+            if not dry_run:
+                try:
+                    self._remove(u)
+                except Exception as e:
+                    logger.warning(f"Retention: could not remove {u['path']}: {e}")
+                    continue
+            reclaimed += u["size"]
+            removed.append(str(u["path"].relative_to(policy.path)))
+
+        return {
+            **policy.describe(),
+            "used_bytes": used,
+            "reclaimed_bytes": reclaimed,
+            "removed": removed,
+            "pinned_skipped": sum(1 for u in units if u["pinned"]),
+        }
+
+    def run_once(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Tüm politikaları uygular ve kazanılan alanı raporlar (senkron; thread'de çalıştırın)."""
+        with self._lock:
+            now = time.time()
+            try:
+                protected = self._protected_units()
+            except Exception as e:
+                # korunan yollar okunamıyorsa hiçbir şey silme (güvenli taraf)
+                logger.warning(f"Retention: protected paths unavailable, skipping run: {e}")
+                return {
+                    "ran_at": datetime.now().isoformat(),
+                    "dry_run": dry_run,
+                    "reclaimed_bytes": 0,
+                    "reclaimed_mb": 0.0,
+                    "skipped": str(e),
+                }
+            dirs = {p.name: self._apply(p, now, dry_run, protected) for p in self.policies}
+            reclaimed = sum(d["reclaimed_bytes"] for d in dirs.values())
+            if not dry_run:
+                self.total_reclaimed += reclaimed
+            report = {
+                "ran_at": datetime.now().isoformat(),
+                "dry_run": dry_run,
+                "reclaimed_bytes": reclaimed,
+                "reclaimed_mb": round(reclaimed / MB, 2),
+                "total_reclaimed_mb": round(self.total_reclaimed / MB, 2),
+                "directories": dirs,
+            }
+            if not dry_run:
+                self.last_report = report
+            if reclaimed:
+                logger.info(f"Retention reclaimed {report['reclaimed_mb']} MB (dry_run={dry_run})")
+            return report
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "policies": {p.name: p.describe() for p in self.policies},
+            "grace_seconds": self.grace_seconds,
+            "total_reclaimed_mb": round(self.total_reclaimed / MB, 2),
+            "last_report": self.last_report,
+        }
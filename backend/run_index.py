@@ -0,0 +1,614 @@
+# backend/run_index.py
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import spc
+import numpy as np
+
+from detection_store import DETECTION_DTYPE, detections_to_array, load_run_detections, sweep_spools
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    id    INTEGER PRIMARY KEY,
+    slug  TEXT NOT NULL UNIQUE,
+    name  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id               INTEGER PRIMARY KEY,
+    group_id         INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+    run_id           TEXT NOT NULL,
+    created_at       TEXT NOT NULL,
+    total_images     INTEGER NOT NULL DEFAULT 0,
+    total_detections INTEGER NOT NULL DEFAULT 0,
+    params           TEXT,
+    derived_from     TEXT,  -- refilter ile türetilmişse kaynak "<group>/<run_id>"; SPC/sorguya girmez
+    UNIQUE (group_id, run_id)
+);
+CREATE TABLE IF NOT EXISTS images (
+    id              INTEGER PRIMARY KEY,
+    run_pk          INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    idx             INTEGER NOT NULL,
+    filename        TEXT NOT NULL,
+    original_name   TEXT,
+    processed_name  TEXT NOT NULL,
+    detection_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS detections (
+    id         INTEGER PRIMARY KEY,
+    image_id   INTEGER NOT NULL REFERENCES images(id) ON DELETE CASCADE,
+    class_id   INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    x1 INTEGER NOT NULL, y1 INTEGER NOT NULL, x2 INTEGER NOT NULL, y2 INTEGER NOT NULL,
+    area       INTEGER NOT NULL
+);
+-- SPC: run başına ve grup başına artımlı özetler (JSON: n_images, defect_images, series)
+CREATE TABLE IF NOT EXISTS run_stats (
+    run_pk INTEGER PRIMARY KEY REFERENCES runs(id) ON DELETE CASCADE,
+    stats  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS group_stats (
+    group_id INTEGER PRIMARY KEY REFERENCES groups(id) ON DELETE CASCADE,
+    stats    TEXT NOT NULL
+);
+-- değişim sayaçları veritabanında: aynı dosyayı kullanan diğer süreçler (uvicorn --workers) de görür
+CREATE TABLE IF NOT EXISTS index_state (
+    id         INTEGER PRIMARY KEY CHECK (id = 1),
+    version    INTEGER NOT NULL DEFAULT 0,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO index_state(id) VALUES(1);
+CREATE INDEX IF NOT EXISTS ix_runs_group   ON runs(group_id, run_id);
+CREATE INDEX IF NOT EXISTS ix_runs_created ON runs(created_at);
+CREATE INDEX IF NOT EXISTS ix_images_run   ON images(run_pk, idx);
+CREATE INDEX IF NOT EXISTS ix_det_image    ON detections(image_id);
+CREATE INDEX IF NOT EXISTS ix_det_class    ON detections(class_id, confidence);
+"""
+
+
+class RunIndex:
+    """
+    results/<group>/<run_id> yapısının SQLite indeksi (groups → runs → images → detections).
+    - Diskteki run.json'lar asıl kaynaktır; indeks her zaman rebuild() ile yeniden kurulabilir.
+    - Yazmalar tek transaction içinde yapılır; metotlar senkron olduğu için
+      event loop'tan asyncio.to_thread ile çağrılmalıdır.
+    - Türetilmiş run'lar (derived_from, ör. refilter) listelenir ama grup SPC
+      toplamlarına, trendlere ve tespit sorgusuna girmez (aynı görseller iki kez sayılmasın).
+    - version: her commit'te artar; generation: detection silen değişikliklerde
+      (run silme/üzerine yazma, rebuild) artar. İkisi de index_state satırında, commit ile
+      aynı transaction'da tutulur; bellek içi türev indeksler (ör. DetectionQueryEngine)
+      başka bir süreçteki yazmaları da bunlarla görür.
+    """
+
+    def __init__(self, db_path: Path, results_dir: Path):
+        self.db_path = Path(db_path)
+        self.results_dir = Path(results_dir)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._structural = False
+        with self._write_lock:
+            self._conn().executescript(SCHEMA)
+            self._schema_upgraded = self._migrate()
+
+    def _migrate(self) -> bool:
+        """Eski veritabanlarına sonradan eklenen sütunlar; eklendiyse True (ensure_built rebuild eder)."""
+        conn = self._conn()
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+        if "derived_from" in columns:
+            return False
+        conn.execute("ALTER TABLE runs ADD COLUMN derived_from TEXT")
+        conn.commit()
+        return True
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        """Bu thread'in bağlantısı; sadece okuma için (yazmalar transaction() ile)."""
+        return self._conn()
+
+    def add_schema(self, script: str) -> None:
+        """Aynı veritabanındaki ek tablolar (ör. uploads kataloğu); yazar kilidi altında."""
+        with self._write_lock:
+            self._conn().executescript(script)
+
+    def counters(self) -> Tuple[int, int]:
+        """(version, generation); commit'lerle birlikte veritabanında saklanır."""
+        row = self._conn().execute("SELECT version, generation FROM index_state WHERE id = 1").fetchone()
+        return (row["version"], row["generation"]) if row else (0, 0)
+
+    @property
+    def version(self) -> int:
+        return self.counters()[0]
+
+    @property
+    def generation(self) -> int:
+        return self.counters()[1]
+
+    @contextmanager
+    def transaction(self, track_changes: bool = True):
+        """
+        Tek yazar; hata olursa tüm değişiklikler geri alınır.
+        track_changes=False: sayaçlar artmaz (run/tespit içermeyen yazmalar, ör. uploads kataloğu).
+        """
+        with self._write_lock:
+            conn = self._conn()
+            self._structural = False
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                if track_changes:
+                    conn.execute(
+                        "UPDATE index_state SET version = version + 1, generation = generation + ? WHERE id = 1",
+                        (1 if self._structural else 0,),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # ---------------- Yazma ----------------
+
+    def _upsert_group(self, conn: sqlite3.Connection, slug: str, name: str) -> int:
+        conn.execute(
+            "INSERT INTO groups(slug, name) VALUES(?, ?) ON CONFLICT(slug) DO UPDATE SET name=excluded.name",
+            (slug, name),
+        )
+        return conn.execute("SELECT id FROM groups WHERE slug=?", (slug,)).fetchone()[0]
+
+    def _insert_run(
+        self,
+        conn: sqlite3.Connection,
+        meta: Dict[str, Any],
+        results: Iterable[Dict[str, Any]],
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        group_pk = self._upsert_group(conn, meta["group_slug"], meta.get("group_name") or meta["group_slug"])
+        old = conn.execute("SELECT id FROM runs WHERE group_id=? AND run_id=?", (group_pk, meta["run_id"])).fetchone()
+        if old is not None:
+            self._remove_run_stats(conn, group_pk, old["id"])
+            conn.execute("DELETE FROM runs WHERE id=?", (old["id"],))
+            self._structural = True
+
+        summary = meta.get("summary", {})
+        derived = meta.get("derived_from")
+        if isinstance(derived, dict):
+            derived = f"{derived.get('group_slug', '')}/{derived.get('run_id', '')}"
+        cur = conn.execute(
+            "INSERT INTO runs(group_id, run_id, created_at, total_images, total_detections, params, derived_from) "
+            "VALUES(?, ?, ?, ?, ?, ?, ?)",
+            (
+                group_pk,
+                meta["run_id"],
+                meta.get("created_at") or datetime.now().isoformat(),
+                int(summary.get("total_images", 0)),
+                int(summary.get("total_detections", 0)),
+                json.dumps(meta.get("params", {}), ensure_ascii=False),
+                derived or None,
+            ),
+        )
+        run_pk = cur.lastrowid
+
+        for idx, r in enumerate(results):
+            processed_name = Path(r.get("processed_path") or r.get("processed_name") or "").name
+            dets = r.get("detections")
+            if dets is None:
+                dets = np.zeros(0, dtype=DETECTION_DTYPE)
+            elif not isinstance(dets, np.ndarray):
+                dets = detections_to_array([{"detections": dets}])
+            cur = conn.execute(
+                "INSERT INTO images(run_pk, idx, filename, original_name, processed_name, detection_count) "
+                "VALUES(?, ?, ?, ?, ?, ?)",
+                (
+                    run_pk,
+                    idx,
+                    r.get("filename", ""),
+                    Path(r["original_path"]).name if r.get("original_path") else None,
+                    processed_name,
+                    int(r.get("detection_count", len(dets))),
+                ),
+            )
+            image_pk = cur.lastrowid
+            if len(dets):
+                # sütunlar dizi üzerinden (tespit başına dict kurulmaz)
+                b = dets["bbox"].astype(np.int64)
+                area = np.maximum(0, b[:, 2] - b[:, 0]) * np.maximum(0, b[:, 3] - b[:, 1])
+                conn.executemany(
+                    "INSERT INTO detections(image_id, class_id, confidence, x1, y1, x2, y2, area) "
+                    "VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                    zip(
+                        [image_pk] * len(dets),
+                        dets["class_id"].tolist(), dets["confidence"].tolist(),
+                        b[:, 0].tolist(), b[:, 1].tolist(), b[:, 2].tolist(), b[:, 3].tolist(),
+                        area.tolist(),
+                    ),
+                )
+
+        self._add_run_stats(
+            conn, group_pk, run_pk, stats if stats is not None else spc.run_stats(results), in_group=not derived,
+        )
+        return run_pk
+
+    # ---------------- SPC özetleri ----------------
+
+    def _group_stats(self, conn: sqlite3.Connection, group_pk: int) -> Dict[str, Any]:
+        row = conn.execute("SELECT stats FROM group_stats WHERE group_id=?", (group_pk,)).fetchone()
+        return json.loads(row["stats"]) if row else spc.empty_group()
+
+    def _add_run_stats(
+        self, conn: sqlite3.Connection, group_pk: int, run_pk: int, stats: Dict[str, Any], in_group: bool = True,
+    ) -> None:
+        """
+        Run özetini yazar ve grup toplamına Welford/Chan birleştirmesiyle ekler (tarama yok).
+        in_group=False (türetilmiş run): sadece run özeti, grup toplamına eklenmez.
+        """
+        conn.execute("INSERT OR REPLACE INTO run_stats(run_pk, stats) VALUES(?, ?)", (run_pk, json.dumps(stats)))
+        if not in_group:
+            return
+        total = spc.combine(self._group_stats(conn, group_pk), stats, sign=1)
+        conn.execute(
+            "INSERT OR REPLACE INTO group_stats(group_id, stats) VALUES(?, ?)", (group_pk, json.dumps(total))
+        )
+
+    def _remove_run_stats(self, conn: sqlite3.Connection, group_pk: int, run_pk: int) -> None:
+        row = conn.execute(
+            "SELECT s.stats, r.derived_from FROM run_stats s JOIN runs r ON r.id = s.run_pk WHERE s.run_pk=?",
+            (run_pk,),
+        ).fetchone()
+        if row is None or row["derived_from"]:
+            return
+        total = spc.combine(self._group_stats(conn, group_pk), json.loads(row["stats"]), sign=-1)
+        conn.execute(
+            "INSERT OR REPLACE INTO group_stats(group_id, stats) VALUES(?, ?)", (group_pk, json.dumps(total))
+        )
+
+    def _backfill_stats(self) -> int:
+        """Özet tablosu eklenmeden önce indekslenmiş run'lar için özetleri indeksin kendisinden çıkarır."""
+        conn = self._conn()
+        missing = conn.execute(
+            "SELECT r.id, r.group_id, r.derived_from FROM runs r LEFT JOIN run_stats s ON s.run_pk = r.id "
+            "WHERE s.run_pk IS NULL"
+        ).fetchall()
+        if not missing:
+            return 0
+        with self.transaction() as conn:
+            for run in missing:
+                images = conn.execute(
+                    "SELECT id, detection_count FROM images WHERE run_pk=? ORDER BY idx", (run["id"],)
+                ).fetchall()
+                classes: Dict[int, List[Dict[str, int]]] = {}
+                for image_id, class_id in conn.execute(
+                    "SELECT d.image_id, d.class_id FROM detections d JOIN images i ON i.id = d.image_id WHERE i.run_pk=?",
+                    (run["id"],),
+                ):
+                    classes.setdefault(image_id, []).append({"class_id": class_id})
+                results = [
+                    {"detections": classes[img["id"]]} if img["id"] in classes
+                    else {"detection_count": img["detection_count"]}
+                    for img in images
+                ]
+                self._add_run_stats(
+                    conn, run["group_id"], run["id"], spc.run_stats(results), in_group=not run["derived_from"],
+                )
+        return len(missing)
+
+    def index_run(
+        self,
+        meta: Dict[str, Any],
+        results: Iterable[Dict[str, Any]],
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Yeni (veya güncellenen) bir run'ı detection'larıyla birlikte indeksler.
+        stats (spc özeti) verilirse results tek geçişte akış halinde okunabilir (RunSpool).
+        """
+        with self.transaction() as conn:
+            self._insert_run(conn, meta, results, stats)
+
+    def delete_run(self, group_slug: str, run_id: str) -> None:
+        with self.transaction() as conn:
+            self._structural = True
+            row = conn.execute(
+                "SELECT r.id, r.group_id FROM runs r JOIN groups g ON g.id = r.group_id WHERE g.slug=? AND r.run_id=?",
+                (group_slug, run_id),
+            ).fetchone()
+            if row is None:
+                return
+            self._remove_run_stats(conn, row["group_id"], row["id"])
+            conn.execute("DELETE FROM runs WHERE id=?", (row["id"],))
+            conn.execute(
+                "DELETE FROM groups WHERE slug=? AND NOT EXISTS (SELECT 1 FROM runs WHERE runs.group_id=groups.id)",
+                (group_slug,),
+            )
+
+    def _derived_refs(self, conn: sqlite3.Connection, where: str, args: tuple) -> List[Tuple[str, str]]:
+        return [
+            (row["slug"], row["run_id"])
+            for row in conn.execute(
+                f"SELECT g.slug, r.run_id FROM runs r JOIN groups g ON g.id = r.group_id WHERE {where}", args
+            )
+        ]
+
+    def rename_group(self, old_slug: str, new_slug: str, new_name: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Grubu yeniden adlandırır; bu gruptaki run'lardan türetilmiş run'ların derived_from'u da
+        güncellenir. Etkilenen türetilmiş run'lar (group_slug, run_id) döner (run.json'ları için).
+        """
+        old_prefix = f"{old_slug}/"
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE groups SET slug=?, name=? WHERE slug=?",
+                (new_slug, new_name or new_slug, old_slug),
+            )
+            match = "substr(r.derived_from, 1, ?) = ?"
+            refs = self._derived_refs(conn, match, (len(old_prefix), old_prefix))
+            conn.execute(
+                "UPDATE runs SET derived_from = ? || substr(derived_from, ?) WHERE substr(derived_from, 1, ?) = ?",
+                (f"{new_slug}/", len(old_prefix) + 1, len(old_prefix), old_prefix),
+            )
+        return refs
+
+    def rename_run(self, group_slug: str, run_id: str, new_run_id: str) -> List[Tuple[str, str]]:
+        """rename_group gibi: kaynağı bu run olan türetilmiş run'lar güncellenir ve döner."""
+        old_ref, new_ref = f"{group_slug}/{run_id}", f"{group_slug}/{new_run_id}"
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE runs SET run_id=? WHERE run_id=? AND group_id=(SELECT id FROM groups WHERE slug=?)",
+                (new_run_id, run_id, group_slug),
+            )
+            refs = self._derived_refs(conn, "r.derived_from = ?", (old_ref,))
+            conn.execute("UPDATE runs SET derived_from=? WHERE derived_from=?", (new_ref, old_ref))
+        return refs
+
+    # ---------------- Diskten yeniden kurma ----------------
+
+    def _scan_run(self, group_slug: str, run_dir: Path) -> Dict[str, Any]:
+        meta: Dict[str, Any] = {}
+        meta_file = run_dir / "run.json"
+        if meta_file.exists():
+            try:
+                meta = json.loads(meta_file.read_text(encoding="utf-8"))
+            except Exception:
+                meta = {}
+
+        processed = sorted(p.name for p in run_dir.glob("processed_*.jpg"))
+        counts = {Path(it.get("processed_path", "")).name: it.get("detection_count", 0) for it in meta.get("items", [])}
+        results = [
+            {
+                "filename": name[len("processed_"):],
+                "processed_name": name,
+                "detection_count": counts.get(name, 0),
+            }
+            for name in processed
+        ]
+
+        # kayıtlı tespitler varsa (detections.npz) onları da indeksle
+        try:
+            ds = load_run_detections(run_dir)
+        except Exception:
+            ds = None
+        if ds is not None:
+            by_name = {r["processed_name"]: r for r in results}
+            for i, path in enumerate(ds.processed_paths):
+                r = by_name.get(Path(path).name)
+                if r is None:
+                    continue
+                r["original_path"] = ds.original_paths[i] or None
+                r["detections"] = ds.image(i)
+                r["detection_count"] = len(r["detections"])
+
+        summary = dict(meta.get("summary") or {})
+        summary.setdefault("total_images", len(processed))
+        summary.setdefault("total_detections", sum(r["detection_count"] for r in results))
+        return {
+            "meta": {
+                "group_slug": group_slug,
+                "group_name": meta.get("group_name", group_slug),
+                "run_id": run_dir.name,
+                "created_at": meta.get("created_at") or datetime.fromtimestamp(run_dir.stat().st_mtime).isoformat(),
+                "params": meta.get("params", {}),
+                "derived_from": meta.get("derived_from"),
+                "summary": summary,
+            },
+            "results": results,
+        }
+
+    def _run_dirs(self) -> List[Tuple[str, Path]]:
+        if not self.results_dir.exists():
+            return []
+        return [
+            (group.name, run)
+            for group in sorted(d for d in self.results_dir.iterdir() if d.is_dir())
+            for run in sorted(d for d in group.iterdir() if d.is_dir())
+        ]
+
+    @staticmethod
+    def _changed_since(run_dir: Path, ts: float) -> bool:
+        try:
+            return (run_dir / "run.json").stat().st_mtime >= ts
+        except OSError:
+            return False
+
+    def rebuild(self) -> Dict[str, int]:
+        """
+        İndeksi sıfırlayıp results klasöründen yeniden kurar. Tarama yazar kilidi dışında
+        yapılır (uzun sürebilir); tarama sırasında indekslenen ya da değişen run'lar
+        kilit altında yeniden taranır, böylece commit onları silmez.
+        """
+        started = time.time()
+        scanned: Dict[Tuple[str, str], Dict[str, Any]] = {
+            (slug, run.name): self._scan_run(slug, run) for slug, run in self._run_dirs()
+        }
+
+        with self.transaction() as conn:
+            self._structural = True
+            for slug, run in self._run_dirs():
+                key = (slug, run.name)
+                if key not in scanned or self._changed_since(run, started):
+                    scanned[key] = self._scan_run(slug, run)
+            for key in [k for k in scanned if not (self.results_dir / k[0] / k[1]).is_dir()]:
+                del scanned[key]  # tarama sırasında silinmiş
+            conn.execute("DELETE FROM groups")
+            for s in scanned.values():
+                self._insert_run(conn, s["meta"], s["results"])
+
+        return {"runs": len(scanned), "images": sum(len(s["results"]) for s in scanned.values())}
+
+    def ensure_built(self) -> bool:
+        """
+        İndeks boşsa ama diskte run varsa (ilk kurulum / silinmiş db) ya da şema yeni bir
+        sütunla güncellendiyse (eski satırlarda değeri yok) yeniden kurar.
+        Önceki çalışmalardan kalan spool dosyaları da burada temizlenir.
+        """
+        if self.results_dir.exists():
+            sweep_spools(self.results_dir)
+        empty = self._conn().execute("SELECT 1 FROM runs LIMIT 1").fetchone() is None
+        has_runs = self.results_dir.exists() and any(
+            d.is_dir() for g in self.results_dir.iterdir() if g.is_dir() for d in g.iterdir()
+        )
+        if has_runs and (empty or self._schema_upgraded):
+            self.rebuild()
+            self._schema_upgraded = False
+            return True
+        self._backfill_stats()
+        return False
+
+    # ---------------- Sorgular ----------------
+
+    def list_history(self, query: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        where, args = "", []
+        q = (query or "").strip().lower()
+        if q:
+            like = f"%{q}%"
+            where = "WHERE lower(g.slug) LIKE ? OR lower(g.name) LIKE ? OR lower(r.run_id) LIKE ?"
+            args = [like, like, like]
+
+        conn = self._conn()
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM runs r JOIN groups g ON g.id = r.group_id {where}", args
+        ).fetchone()[0]
+
+        page = ""
+        if limit is not None:
+            page = " LIMIT ? OFFSET ?"
+            args = args + [int(limit), int(offset)]
+        elif offset:
+            page = " LIMIT -1 OFFSET ?"
+            args = args + [int(offset)]
+
+        rows = conn.execute(
+            f"""
+            SELECT g.slug, g.name, r.run_id, r.created_at, r.total_images, r.total_detections, r.derived_from,
+                   (SELECT processed_name FROM images i WHERE i.run_pk = r.id ORDER BY i.idx LIMIT 1) AS preview
+            FROM runs r JOIN groups g ON g.id = r.group_id
+            {where}
+            ORDER BY g.slug, r.run_id{page}
+            """,
+            args,
+        ).fetchall()
+
+        groups: List[Dict[str, Any]] = []
+        items: List[Dict[str, Any]] = []
+        for row in rows:
+            record = {
+                "group_slug": row["slug"],
+                "group_name": row["name"],
+                "run_id": row["run_id"],
+                "created_at": row["created_at"],
+                "total_images": row["total_images"],
+                "total_detections": row["total_detections"],
+                "derived_from": row["derived_from"],
+                "preview": f"results/{row['slug']}/{row['run_id']}/{row['preview']}" if row["preview"] else None,
+            }
+            items.append(record)
+            if not groups or groups[-1]["group_slug"] != record["group_slug"]:
+                groups.append({"group_slug": record["group_slug"], "group_name": record["group_name"], "runs": []})
+            groups[-1]["runs"].append(record)
+
+        return {"groups": groups, "items": items, "total": total, "limit": limit, "offset": offset}
+
+    def group_runs(self, group_slugs: List[str]) -> List[tuple]:
+        """Verilen grupların run'ları (group_slug, run_id), eskiden yeniye; türetilmiş run'lar hariç."""
+        if not group_slugs:
+            return []
+        marks = ",".join("?" * len(group_slugs))
+        return [
+            (r["slug"], r["run_id"])
+            for r in self._conn().execute(
+                f"SELECT g.slug, r.run_id FROM runs r JOIN groups g ON g.id = r.group_id "
+                f"WHERE g.slug IN ({marks}) AND r.derived_from IS NULL ORDER BY g.slug, r.created_at, r.run_id",
+                list(group_slugs),
+            )
+        ]
+
+    def spc_groups(self, class_names: Dict[int, str]) -> List[Dict[str, Any]]:
+        """Tüm grupların SPC toplamları (O(grup))."""
+        rows = self._conn().execute(
+            "SELECT g.slug, g.name, s.stats FROM groups g JOIN group_stats s ON s.group_id = g.id ORDER BY g.slug"
+        ).fetchall()
+        return [
+            {"group_slug": r["slug"], "group_name": r["name"], **spc.describe_group(json.loads(r["stats"]), class_names)}
+            for r in rows
+        ]
+
+    def spc_trend(
+        self,
+        group_slug: str,
+        class_names: Dict[int, str],
+        class_id: Optional[int] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sigma: float = 3.0,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Grubun run başına kusur trendi + kontrol sınırları; sadece özet tablolarından
+        okunur (O(run), tespitler taranmaz). class_id None ise tüm kusurlar.
+        """
+        conn = self._conn()
+        group = conn.execute(
+            "SELECT g.id, g.name, s.stats FROM groups g JOIN group_stats s ON s.group_id = g.id WHERE g.slug=?",
+            (group_slug,),
+        ).fetchone()
+        if group is None:
+            return None
+
+        where, args = "", [group["id"]]
+        if date_from:
+            where += " AND r.created_at >= ?"
+            args.append(date_from)
+        if date_to:
+            where += " AND r.created_at <= ?"
+            args.append(date_to + "T23:59:59.999999" if len(date_to) <= 10 else date_to)
+        runs = [
+            {"run_id": r["run_id"], "created_at": r["created_at"], "stats": json.loads(r["stats"])}
+            for r in conn.execute(
+                f"SELECT r.run_id, r.created_at, s.stats FROM runs r JOIN run_stats s ON s.run_pk = r.id "
+                f"WHERE r.group_id=? AND r.derived_from IS NULL{where} ORDER BY r.created_at, r.run_id",
+                args,
+            )
+        ]
+
+        totals = json.loads(group["stats"])
+        key = spc.ALL if class_id is None else str(int(class_id))
+        return {
+            "group_slug": group_slug,
+            "group_name": group["name"],
+            "series": "all" if class_id is None else class_names.get(int(class_id), f"Class_{class_id}"),
+            "sigma": sigma,
+            "aggregate": spc.describe_group(totals, class_names),
+            "points": spc.trend_points(totals, runs, key, sigma),
+        }
@@ -0,0 +1,179 @@
+# backend/spc.py
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Seri anahtarları: "all" (görsel başına toplam kusur) ve sınıf id'leri (str)
+ALL = "all"
+
+
+def _empty() -> Dict[str, float]:
+    return {"sum": 0, "mean": 0.0, "m2": 0.0}
+
+
+def series_stats(values: np.ndarray) -> Dict[str, float]:
+    """Tek bir run içindeki görsel başına sayılar için (toplam, ortalama, M2)."""
+    if not len(values):
+        return _empty()
+    values = values.astype(np.float64)
+    mean = float(values.mean())
+    return {"sum": int(values.sum()), "mean": mean, "m2": float(((values - mean) ** 2).sum())}
+
+
+def run_stats(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Bir run'ın SPC özeti: görsel sayısı, kusurlu görsel sayısı ve her seri için
+    (toplam, ortalama, M2). Run'da hiç görülmeyen sınıflar yazılmaz; birleştirmede
+    n görsellik sıfır seri olarak sayılır.
+    """
+    n = len(results)
+    totals = np.zeros(n, dtype=np.int64)
+    image_idx: List[np.ndarray] = []
+    class_idx: List[np.ndarray] = []
+
+    for i, r in enumerate(results):
+        dets = r.get("detections")
+        if dets is None:
+            # sadece sayı bilinen eski run'lar (detections.npz yok)
+            totals[i] = int(r.get("detection_count", 0))
+            continue
+        totals[i] = len(dets)
+        if isinstance(dets, np.ndarray):
+            classes = dets["class_id"].astype(np.int64)
+        else:
+            classes = np.array([int(d.get("class_id", 0)) for d in dets], dtype=np.int64)
+        image_idx.append(np.full(len(classes), i, dtype=np.int64))
+        class_idx.append(classes)
+
+    empty = np.zeros(0, dtype=np.int64)
+    return _stats(
+        totals,
+        np.concatenate(image_idx) if image_idx else empty,
+        np.concatenate(class_idx) if class_idx else empty,
+    )
+
+
+def run_stats_from_detections(dets: np.ndarray, n_images: int) -> Dict[str, Any]:
+    """run_stats ile aynı özet, doğrudan DETECTION_DTYPE dizisinden (dict listesi kurmadan)."""
+    image_idx = np.asarray(dets["image"], dtype=np.int64)
+    return _stats(np.bincount(image_idx, minlength=n_images), image_idx, np.asarray(dets["class_id"], dtype=np.int64))
+
+
+def _stats(totals: np.ndarray, image_idx: np.ndarray, class_idx: np.ndarray) -> Dict[str, Any]:
+    n = len(totals)
+    series = {ALL: series_stats(totals)}
+    for c in np.unique(class_idx):
+        series[str(int(c))] = series_stats(np.bincount(image_idx[class_idx == c], minlength=n))
+    return {"n_images": n, "defect_images": int((totals > 0).sum()), "series": series}
+
+
+def merge(n_a: int, a: Dict[str, float], n_b: int, b: Dict[str, float]) -> Dict[str, float]:
+    """Chan/Welford birleştirme: iki gruptaki (n, ortalama, M2) tek gruba."""
+    n = n_a + n_b
+    if n == 0:
+        return _empty()
+    delta = b["mean"] - a["mean"]
+    return {
+        "sum": a["sum"] + b["sum"],
+        "mean": a["mean"] + delta * n_b / n,
+        "m2": a["m2"] + b["m2"] + delta * delta * n_a * n_b / n,
+    }
+
+
+def unmerge(n: int, total: Dict[str, float], n_b: int, b: Dict[str, float]) -> Dict[str, float]:
+    """merge'ün tersi: toplamdan bir run'ın katkısını çıkarır (run silme / üzerine yazma)."""
+    n_a = n - n_b
+    if n_a <= 0:
+        return _empty()
+    mean_a = (n * total["mean"] - n_b * b["mean"]) / n_a
+    delta = b["mean"] - mean_a
+    m2 = total["m2"] - b["m2"] - delta * delta * n_a * n_b / n
+    return {"sum": total["sum"] - b["sum"], "mean": mean_a, "m2": max(0.0, m2)}
+
+
+def combine(total: Dict[str, Any], part: Dict[str, Any], sign: int = 1) -> Dict[str, Any]:
+    """Grup toplamına (n_runs, n_images, defect_images, series) bir run ekler (sign=1) ya da çıkarır (-1)."""
+    n, n_b = total["n_images"], part["n_images"]
+    keys = set(total["series"]) | set(part["series"])
+    op = merge if sign > 0 else unmerge
+    return {
+        "n_runs": total["n_runs"] + sign,
+        "n_images": n + sign * n_b,
+        "defect_images": total["defect_images"] + sign * part["defect_images"],
+        "series": {
+            k: op(n, total["series"].get(k, _empty()), n_b, part["series"].get(k, _empty()))
+            for k in keys
+        },
+    }
+
+
+def empty_group() -> Dict[str, Any]:
+    return {"n_runs": 0, "n_images": 0, "defect_images": 0, "series": {}}
+
+
+def variance(s: Dict[str, float], n: int) -> float:
+    return s["m2"] / (n - 1) if n > 1 else 0.0
+
+
+def control_limits(mean: float, var: float, n_subgroup: int, sigma: float = 3.0) -> Dict[str, Optional[float]]:
+    """X̄ kartı: run ortalaması için CL ± sigma·σ/√n (alt sınır 0'ın altına inmez)."""
+    if n_subgroup <= 0:
+        return {"lcl": None, "cl": mean, "ucl": None}
+    half = sigma * math.sqrt(max(var, 0.0) / n_subgroup)
+    return {"lcl": max(0.0, mean - half), "cl": mean, "ucl": mean + half}
+
+
+def _series_summary(s: Dict[str, float], n: int) -> Dict[str, Any]:
+    var = variance(s, n)
+    return {"total": int(s["sum"]), "mean": s["mean"], "variance": var, "std": math.sqrt(var)}
+
+
+def describe_group(stats: Dict[str, Any], class_names: Dict[int, str]) -> Dict[str, Any]:
+    """Grup toplamı: görsel başına kusur (tümü + sınıf bazında) ortalama/varyans ve sınıf histogramı."""
+    n = stats["n_images"]
+    series = stats["series"]
+    classes = sorted((k for k in series if k != ALL), key=int)
+    return {
+        "n_runs": stats["n_runs"],
+        "n_images": n,
+        "defect_images": stats["defect_images"],
+        "defect_rate": stats["defect_images"] / n if n else 0.0,
+        "per_image": _series_summary(series.get(ALL, _empty()), n),
+        "per_class": {class_names.get(int(k), f"Class_{k}"): _series_summary(series[k], n) for k in classes},
+        "class_histogram": {class_names.get(int(k), f"Class_{k}"): int(series[k]["sum"]) for k in classes},
+    }
+
+
+def trend_points(
+    group: Dict[str, Any],
+    runs: List[Dict[str, Any]],
+    key: str = ALL,
+    sigma: float = 3.0,
+) -> List[Dict[str, Any]]:
+    """
+    Run başına nokta: görsel başına kusur ortalaması + grubun toplam varyansından
+    X̄ kartı sınırları (run'ın görsel sayısına göre). runs: run_stats satırları.
+    """
+    n_total = group["n_images"]
+    g = group["series"].get(key, _empty())
+    var = variance(g, n_total)
+
+    points = []
+    for r in runs:
+        s = r["stats"]["series"].get(key, _empty())
+        n = r["stats"]["n_images"]
+        limits = control_limits(g["mean"], var, n, sigma)
+        points.append({
+            "run_id": r["run_id"],
+            "created_at": r["created_at"],
+            "n_images": n,
+            "defects": int(s["sum"]),
+            "mean": s["mean"],
+            "variance": variance(s, n),
+            "defect_rate": r["stats"]["defect_images"] / n if n else 0.0,
+            **limits,
+            "out_of_control": limits["ucl"] is not None
+            and not (limits["lcl"] <= s["mean"] <= limits["ucl"]),
+        })
+    return points
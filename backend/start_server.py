@@ -3,6 +3,7 @@
 Startup script for Paint Defect Analysis Backend Server
 """
 
+import importlib.util
 import os
 import sys
 import subprocess
@@ -10,19 +11,14 @@ import uvicorn
 from pathlib import Path
 
 def check_dependencies():
-    """Check if all required dependencies are installed"""
-    try:
-        import fastapi
-        import torch
-        import cv2
-        import pandas
-        import numpy
-        print("✓ All dependencies are installed")
-        return True
-    except ImportError as e:
-        print(f"✗ Missing dependency: {e}")
+    """Check if all required dependencies are installed (without importing them: torch alone takes seconds)"""
+    missing = [m for m in ("fastapi", "torch", "ultralytics", "cv2", "pandas", "numpy") if importlib.util.find_spec(m) is None]
+    if missing:
+        print(f"✗ Missing dependency: {', '.join(missing)}")
         print("Please install dependencies with: pip install -r requirements.txt")
         return False
+    print("✓ All dependencies are installed")
+    return True
 
 def setup_directories():
     """Create necessary directories"""
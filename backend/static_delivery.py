@@ -0,0 +1,201 @@
+# backend/static_delivery.py
+import gzip
+import mimetypes
+import os
+import sys
+from hashlib import md5
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+import anyio
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli  # opsiyonel: sadece precompress() .br üretmek için
+except Exception:  # pragma: no cover
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # her kullanımda ETag ile doğrula (304), eski kopya gösterme
+
+# Tercih sırası: brotli > gzip
+ENCODINGS: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE = {".html", ".js", ".mjs", ".css", ".txt", ".json", ".map", ".svg", ".xml", ".ico", ".webmanifest"}
+
+
+def accepted_encodings(scope: Scope) -> set:
+    """Accept-Encoding'den q=0 olmayan kodlamalar."""
+    out = set()
+    for part in Headers(scope=scope).get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if token:
+            out.add(token.strip().lower())
+    return out
+
+
+class _Html:
+    __slots__ = ("key", "body", "gz", "etag")
+
+    def __init__(self, key, body: bytes):
+        self.key = key
+        self.body = body
+        gz = gzip.compress(body, 9, mtime=0)
+        self.gz = gz if len(gz) < len(body) else None
+        self.etag = f'"{md5(body, usedforsecurity=False).hexdigest()}"'
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles + önbellek başlıkları:
+    - immutable_dirs altındaki (içerik hash'li, ör. _next/static) dosyalar 1 yıl immutable;
+      diğerleri cache_control (varsayılan no-cache: ETag/Last-Modified ile 304).
+    - precompressed: istemci kabul ediyorsa yanındaki .br / .gz dosyası Content-Encoding ile
+      gönderilir (varlık kontrolü dosyanın mtime'ına göre önbelleklenir, her istekte stat yok).
+    - .html dosyaları (index.html, 404.html) bellekte tutulur (gzip'li kopyasıyla);
+      dosya değişirse (mtime/boyut) yeniden okunur.
+    - spa_fallback: bulunamayan uzantısız yollar index.html ile (200) yanıtlanır.
+    ETag, If-None-Match / If-Modified-Since ve Range (206) FileResponse'tan gelir.
+    """
+
+    def __init__(
+        self,
+        *,
+        directory,
+        html: bool = False,
+        cache_control: str = REVALIDATE,
+        immutable_dirs: Iterable[str] = (),
+        precompressed: bool = False,
+        spa_fallback: bool = False,
+        check_dir: bool = True,
+    ):
+        super().__init__(directory=directory, html=html, check_dir=check_dir)
+        self.cache_control = cache_control
+        root = os.path.realpath(directory)
+        self.immutable_dirs = tuple(os.path.join(root, d.strip("/")) + os.sep for d in immutable_dirs)
+        self.precompressed = precompressed
+        self.spa_fallback = spa_fallback
+        self._variants: Dict[str, Tuple[tuple, Dict[str, Tuple[str, os.stat_result]]]] = {}
+        self._html: Dict[str, _Html] = {}
+
+    def _cache_control_for(self, full_path: str) -> str:
+        if self.immutable_dirs and os.path.realpath(full_path).startswith(self.immutable_dirs):
+            return IMMUTABLE
+        return self.cache_control
+
+    def _encoded_variants(self, full_path: str, stat_result: os.stat_result) -> Dict[str, Tuple[str, os.stat_result]]:
+        key = (stat_result.st_mtime_ns, stat_result.st_size)
+        cached = self._variants.get(full_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        found = {}
+        for encoding, suffix in ENCODINGS:
+            try:
+                st = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            # Orijinalden eski sıkıştırılmış kopya bayattır
+            if st.st_mtime_ns >= stat_result.st_mtime_ns:
+                found[encoding] = (full_path + suffix, st)
+        self._variants[full_path] = (key, found)
+        return found
+
+    def _html_response(self, full_path: str, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        key = (stat_result.st_mtime_ns, stat_result.st_size)
+        page = self._html.get(full_path)
+        if page is None or page.key != key:
+            page = self._html[full_path] = _Html(key, Path(full_path).read_bytes())
+
+        headers = {"ETag": page.etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if status_code == 200 and page.etag in [
+            t.strip(" W/") for t in Headers(scope=scope).get("if-none-match", "").split(",")
+        ]:
+            return NotModifiedResponse(Headers(headers))
+        body = page.body
+        if page.gz is not None and "gzip" in accepted_encodings(scope):
+            body = page.gz
+            headers["Content-Encoding"] = "gzip"
+        return Response(body, status_code=status_code, media_type="text/html", headers=headers)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        if full_path.endswith(".html"):
+            return self._html_response(full_path, stat_result, scope, status_code)
+
+        headers = {"Cache-Control": self._cache_control_for(full_path)}
+        path, st, media_type = full_path, stat_result, None
+        if self.precompressed:
+            variants = self._encoded_variants(full_path, stat_result)
+            if variants:
+                headers["Vary"] = "Accept-Encoding"
+                accepted = accepted_encodings(scope)
+                for encoding, _ in ENCODINGS:
+                    if encoding in variants and encoding in accepted:
+                        path, st = variants[encoding]
+                        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+                        headers["Content-Encoding"] = encoding
+                        break
+
+        response = FileResponse(path, status_code=status_code, stat_result=st, media_type=media_type, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        spa = self.spa_fallback and not Path(path).suffix
+        try:
+            response = await super().get_response(path, scope)
+        except HTTPException as exc:
+            if exc.status_code != 404 or not spa:
+                raise
+            response = None
+        if response is not None and response.status_code != 404:
+            return response
+
+        if spa:
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, "index.html")
+            if stat_result is not None:
+                return self._html_response(full_path, stat_result, scope)
+        # html modunda 404.html: FileResponse yerine bellekteki kopya
+        if isinstance(response, FileResponse):
+            return self._html_response(str(response.path), os.stat(response.path), scope, status_code=404)
+        return response
+
+
+def precompress(directory: Path, min_size: int = 1024, level: int = 9) -> Dict[str, int]:
+    """
+    Build sonrası: metin tabanlı dosyaların yanına .gz (ve brotli kuruluysa .br) yazar.
+    Küçük ya da sıkıştırınca %10'dan az kazanç sağlayan dosyalar atlanır.
+    """
+    stats = {"files": 0, "gzip": 0, "br": 0, "bytes_in": 0, "bytes_gzip": 0}
+    for p in Path(directory).rglob("*"):
+        if not p.is_file() or p.suffix.lower() not in COMPRESSIBLE or p.stat().st_size < min_size:
+            continue
+        data = p.read_bytes()
+        stats["files"] += 1
+        stats["bytes_in"] += len(data)
+        gz = gzip.compress(data, level, mtime=0)
+        if len(gz) < len(data) * 0.9:
+            p.with_name(p.name + ".gz").write_bytes(gz)
+            stats["gzip"] += 1
+            stats["bytes_gzip"] += len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            if len(br) < len(data) * 0.9:
+                p.with_name(p.name + ".br").write_bytes(br)
+                stats["br"] += 1
+    return stats
+
+
+if __name__ == "__main__":
+    # python static_delivery.py frontend_out
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else Path(__file__).parent / "frontend_out")
+    result = precompress(target)
+    print(f"{target}: {result}" + ("" if brotli is not None else " (brotli not installed: gzip only)"))
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Scripted checks for the retention service (no server, no model):
+
+    python test_retention.py          # runs every check, exits 1 if any fails
+    python -m pytest test_retention.py
+
+Each check builds a throw-away runtime folder with backdated files and runs
+RetentionManager.run_once against it: quota / age eviction order, the grace
+period for fresh entries, pinned runs (set via FileManager.set_pinned) and
+sources still referenced by an unexpired download manifest.
+"""
+
+import asyncio
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# file_manager çalışma klasörünü import sırasında LOCALAPPDATA'dan kurar
+_BASE = Path(tempfile.mkdtemp(prefix="pda_retention_"))
+os.environ["LOCALAPPDATA"] = str(_BASE)
+atexit.register(shutil.rmtree, _BASE, True)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from file_manager import FileManager  # noqa: E402
+from retention import MB, RetentionManager, RetentionPolicy  # noqa: E402
+from zip_stream import write_manifest  # noqa: E402
+
+HOUR = 3600
+
+
+def _dir(name: str) -> Path:
+    d = _BASE / "case" / name
+    shutil.rmtree(d, ignore_errors=True)
+    d.mkdir(parents=True)
+    return d
+
+
+def _touch(path: Path, size: int = MB, age: float = 2 * HOUR) -> Path:
+    """size baytlık dosya; atime/mtime = şimdi - age."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\0" * size)
+    ts = time.time() - age
+    os.utime(path, (ts, ts))
+    return path
+
+
+def _run(path: Path, age: float, meta=None) -> Path:
+    """results/<group>/<run> benzeri klasör: run.json + bir işlenmiş görsel, hepsi age kadar eski."""
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "run.json").write_text(json.dumps(meta or {"run_id": path.name}), encoding="utf-8")
+    _touch(path / "processed_a.jpg", age=age)
+    ts = time.time() - age
+    for p in (path / "run.json", path):
+        os.utime(p, (ts, ts))
+    return path
+
+
+def test_quota_evicts_oldest_first():
+    d = _dir("quota")
+    for i, age in enumerate((4, 1, 3, 2)):
+        _touch(d / f"f{i}.bin", age=age * HOUR)
+    mgr = RetentionManager([RetentionPolicy("downloads", d, max_bytes=int(2.5 * MB))])
+
+    report = mgr.run_once()["directories"]["downloads"]
+    # en eski erişilen önce: f0 (4 sa), f2 (3 sa); kota altına inince durur
+    assert report["removed"] == ["f0.bin", "f2.bin"], report
+    assert sorted(p.name for p in d.iterdir()) == ["f1.bin", "f3.bin"]
+    assert report["reclaimed_bytes"] == 2 * MB
+
+
+def test_age_limit_and_dry_run():
+    d = _dir("age")
+    _touch(d / "old.bin", age=3 * 24 * HOUR)
+    _touch(d / "new.bin", age=12 * HOUR)
+    mgr = RetentionManager([RetentionPolicy("temp", d, max_age_days=1)])
+
+    dry = mgr.run_once(dry_run=True)["directories"]["temp"]
+    assert dry["removed"] == ["old.bin"] and (d / "old.bin").exists(), dry
+
+    report = mgr.run_once()["directories"]["temp"]
+    assert report["removed"] == ["old.bin"], report
+    assert not (d / "old.bin").exists() and (d / "new.bin").exists()
+
+
+def test_grace_period_keeps_fresh_entries():
+    d = _dir("grace")
+    _touch(d / "fresh.bin", age=60)
+    _touch(d / "stale.bin", age=HOUR)
+    # kota her şeyi silmeyi gerektirse de grace_seconds içindeki girdi (çalışan işe ait olabilir) kalır
+    mgr = RetentionManager([RetentionPolicy("temp", d, max_bytes=1)], grace_seconds=600)
+
+    report = mgr.run_once()["directories"]["temp"]
+    assert report["removed"] == ["stale.bin"], report
+    assert (d / "fresh.bin").exists()
+
+
+def test_pinned_runs_are_kept():
+    results = _dir("results")
+    pinned = _run(results / "grp" / "run_pinned", age=10 * 24 * HOUR, meta={"run_id": "run_pinned", "note": "x"})
+    _run(results / "grp" / "run_old", age=10 * 24 * HOUR)
+    lone = _run(results / "lone" / "run_1", age=10 * 24 * HOUR)
+
+    fm = FileManager()
+    fm.results_dir = results
+    assert asyncio.run(fm.set_pinned("grp", "run_pinned", True))
+    # set_pinned run.json'ı tmp + replace ile yazar: diğer alanlar kalır, .tmp kalmaz
+    meta = json.loads((pinned / "run.json").read_text(encoding="utf-8"))
+    assert meta == {"run_id": "run_pinned", "note": "x", "pinned": True}, meta
+    assert not (pinned / "run.json.tmp").exists()
+    ts = time.time() - 10 * 24 * HOUR
+    for p in (pinned / "run.json", pinned):
+        os.utime(p, (ts, ts))
+
+    removed_runs = []
+    mgr = RetentionManager(
+        [RetentionPolicy("results", results, max_age_days=1, unit="run")],
+        on_run_removed=lambda g, r: removed_runs.append((g, r)),
+    )
+    report = mgr.run_once()["directories"]["results"]
+    assert sorted(removed_runs) == [("grp", "run_old"), ("lone", "run_1")], removed_runs
+    assert report["pinned_skipped"] == 1, report
+    assert pinned.exists()
+    assert not lone.parent.exists()  # boşalan grup klasörü de silinir
+
+    # pin kaldırılınca bir sonraki çalışmada silinir
+    assert asyncio.run(fm.set_pinned("grp", "run_pinned", False))
+    # run.json'ın yeniden yazılması run'ı "yeni erişilmiş" yapar; yaşı geri al
+    for p in (pinned / "run.json", pinned):
+        os.utime(p, (ts, ts))
+    mgr.run_once()
+    assert not pinned.exists()
+
+
+def test_manifest_sources_are_protected():
+    downloads, cache = _dir("downloads"), _dir("cache")
+    live_src = _touch(cache / "live" / "report.pdf", age=40 * 24 * HOUR)
+    expired_src = _touch(cache / "expired" / "report.pdf", age=40 * 24 * HOUR)
+    for p in (cache / "live", cache / "expired"):
+        os.utime(p, (time.time() - 40 * 24 * HOUR,) * 2)
+    write_manifest(downloads / "live.zip", [(live_src, "report.pdf")], ttl_seconds=HOUR)
+    mp = write_manifest(downloads / "expired.zip", [(expired_src, "report.pdf")], ttl_seconds=HOUR)
+    info = json.loads(mp.read_text(encoding="utf-8"))
+    info["expires_at"] = time.time() - 1
+    mp.write_text(json.dumps(info), encoding="utf-8")
+
+    fm = FileManager()
+    fm.downloads_dir = downloads
+    mgr = RetentionManager([RetentionPolicy("cache", cache, max_age_days=30)], protected=fm.pinned_paths)
+
+    report = mgr.run_once()["directories"]["cache"]
+    # süresi dolmamış manifest'in kaynağını içeren birim pinned sayılır; süresi dolanınki silinir
+    assert report["removed"] == ["expired"], report
+    assert report["pinned_skipped"] == 1, report
+    assert live_src.exists() and not expired_src.exists()
+
+
+def test_protected_paths_failure_skips_run():
+    d = _dir("unavailable")
+    _touch(d / "old.bin", age=10 * 24 * HOUR)
+
+    def broken():
+        raise OSError("downloads unreadable")
+
+    mgr = RetentionManager([RetentionPolicy("temp", d, max_age_days=1)], protected=broken)
+    report = mgr.run_once()
+    assert "skipped" in report and (d / "old.bin").exists(), report
+
+
+def main() -> int:
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"ok    {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL  {name}: {e}")
+    print(f"{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
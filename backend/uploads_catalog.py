@@ -0,0 +1,202 @@
+# backend/uploads_catalog.py
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from run_index import RunIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    name  TEXT PRIMARY KEY,
+    size  INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_uploads_mtime    ON uploads(mtime);
+CREATE INDEX IF NOT EXISTS ix_uploads_size     ON uploads(size);
+CREATE INDEX IF NOT EXISTS ix_images_original  ON images(original_name);
+"""
+
+SORT_COLUMNS = {"name": "u.name", "mtime": "u.mtime", "size": "u.size"}
+
+
+def _parse_ts(value: Optional[str], end_of_day: bool = False) -> Optional[float]:
+    """ISO tarih/saat → epoch saniye. Sadece tarih verilmişse günün başı/sonu."""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.strip())
+    if end_of_day and len(value.strip()) <= 10:
+        dt = dt.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return dt.timestamp()
+
+
+class UploadsCatalog:
+    """
+    uploads/ klasörünün SQLite kataloğu (RunIndex ile aynı veritabanı; "analiz edildi mi"
+    images.original_name ile eşlenir). Yükleme / silme / retention endpoint'leri
+    add() / remove() ile kataloğu günceller; liste isteği dosya sistemini taramaz.
+    Dışarıdan yapılan değişiklikler (Explorer'dan kopyalama vb.) klasörün mtime'ı
+    değişince sync() ile fark bazında (sadece yeni/değişen dosyalar) işlenir.
+    """
+
+    def __init__(self, run_index: RunIndex, uploads_dir: Path):
+        self.index = run_index
+        self.uploads_dir = Path(uploads_dir)
+        self._sync_lock = threading.Lock()
+        self._dir_stamp: Optional[int] = None   # katalogla uyumlu son klasör mtime'ı (ns)
+        self.scans = 0
+        self.index.add_schema(SCHEMA)
+
+    def _write(self):
+        # upload değişiklikleri index sayaçlarını artırıp DetectionQueryEngine'in
+        # bellek içi dizilerini tazelememeli
+        return self.index.transaction(track_changes=False)
+
+    def _stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.uploads_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    # ---------------- Güncelleme ----------------
+
+    def sync(self, force: bool = False) -> Dict[str, int]:
+        """
+        Klasör son senkrondan beri değiştiyse katalogla karşılaştırır: yeni / boyutu ya da
+        zamanı değişen dosyalar eklenir, olmayanlar silinir. Değişmemişse maliyeti tek stat.
+        """
+        stamp = self._stamp()
+        if not force and stamp is not None and stamp == self._dir_stamp:
+            return {"added": 0, "updated": 0, "removed": 0}
+        with self._sync_lock:
+            stamp = self._stamp()  # tarama sırasında gelen değişiklik bir sonraki sync'te görülür
+            on_disk: Dict[str, tuple] = {}
+            if self.uploads_dir.exists():
+                with os.scandir(self.uploads_dir) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_file():
+                                st = entry.stat()
+                                on_disk[entry.name] = (st.st_size, st.st_mtime)
+                        except OSError:
+                            continue
+
+            known = {
+                row["name"]: (row["size"], row["mtime"])
+                for row in self.index.reader().execute("SELECT name, size, mtime FROM uploads")
+            }
+            added = [(n, s, m) for n, (s, m) in on_disk.items() if n not in known]
+            updated = [(n, s, m) for n, (s, m) in on_disk.items() if n in known and known[n] != (s, m)]
+            removed = [(n,) for n in known if n not in on_disk]
+            if added or updated or removed:
+                with self._write() as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO uploads(name, size, mtime) VALUES(?, ?, ?)", added + updated
+                    )
+                    conn.executemany("DELETE FROM uploads WHERE name=?", removed)
+            self._dir_stamp = stamp
+            self.scans += 1
+            return {"added": len(added), "updated": len(updated), "removed": len(removed)}
+
+    def _after_change(self, stamp_before: Optional[int]):
+        # Değişiklikten önce katalog klasörle uyumluysa, yeni mtime'ı da uyumlu say
+        if stamp_before is not None and stamp_before == self._dir_stamp:
+            self._dir_stamp = self._stamp()
+
+    def stamp(self) -> Optional[int]:
+        """Dosya yazmadan/silmeden önce alınır, add()/remove()'a verilir."""
+        return self._stamp()
+
+    def add(self, path: Path, stamp_before: Optional[int] = None):
+        """Yeni yazılan (ya da üzerine yazılan) bir upload'ı kataloğa ekler."""
+        path = Path(path)
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        with self._write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO uploads(name, size, mtime) VALUES(?, ?, ?)",
+                (path.name, st.st_size, st.st_mtime),
+            )
+        self._after_change(stamp_before)
+
+    def remove(self, name: str, stamp_before: Optional[int] = None):
+        with self._write() as conn:
+            conn.execute("DELETE FROM uploads WHERE name=?", (Path(name).name,))
+        self._after_change(stamp_before)
+
+    # ---------------- Sorgu ----------------
+
+    def list(
+        self,
+        q: Optional[str] = None,
+        analyzed: Optional[bool] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        sort: str = "name",
+        descending: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        self.sync()
+
+        where: List[str] = []
+        args: List[Any] = []
+        if q and q.strip():
+            where.append("lower(u.name) LIKE ?")
+            args.append(f"%{q.strip().lower()}%")
+        ts_from, ts_to = _parse_ts(date_from), _parse_ts(date_to, end_of_day=True)
+        if ts_from is not None:
+            where.append("u.mtime >= ?")
+            args.append(ts_from)
+        if ts_to is not None:
+            where.append("u.mtime <= ?")
+            args.append(ts_to)
+        if min_size is not None:
+            where.append("u.size >= ?")
+            args.append(int(min_size))
+        if max_size is not None:
+            where.append("u.size <= ?")
+            args.append(int(max_size))
+        analyzed_sql = "EXISTS (SELECT 1 FROM images i WHERE i.original_name = u.name)"
+        if analyzed is not None:
+            where.append(analyzed_sql if analyzed else f"NOT {analyzed_sql}")
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        conn = self.index.reader()
+        total = conn.execute(f"SELECT COUNT(*) FROM uploads u {where_sql}", args).fetchone()[0]
+
+        page = ""
+        if limit is not None:
+            page = " LIMIT ? OFFSET ?"
+            args = args + [int(limit), int(offset)]
+        elif offset:
+            page = " LIMIT -1 OFFSET ?"
+            args = args + [int(offset)]
+
+        order = "DESC" if descending else "ASC"
+        rows = conn.execute(
+            f"""
+            SELECT u.name, u.size, u.mtime, {analyzed_sql} AS analyzed
+            FROM uploads u
+            {where_sql}
+            ORDER BY {SORT_COLUMNS[sort]} {order}, u.name {order}{page}
+            """,
+            args,
+        ).fetchall()
+
+        files = [
+            {
+                "name": row["name"],
+                "size": row["size"],                # bytes
+                "mtime": int(row["mtime"]),         # unix seconds
+                "url": f"/static/uploads/{row['name']}",
+                "analyzed": bool(row["analyzed"]),
+            }
+            for row in rows
+        ]
+        return {"files": files, "total": total, "limit": limit, "offset": offset}
@@ -0,0 +1,106 @@
+# backend/warmup.py
+import asyncio
+import importlib
+import logging
+import time
+import types
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModule(types.ModuleType):
+    """
+    İlk attribute erişiminde import edilen modül vekili: `pd = LazyModule("pandas")`.
+    Ağır kütüphaneler (torch, ultralytics, pandas) sunucunun açılışını geciktirmez;
+    Warmup onları arka planda yükler, yüklenmemişse ilk kullanan istek yükler.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            module = self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+
+def preload(*modules: str) -> List[str]:
+    """Modülleri import eder; bulunamayanların adlarını döner (opsiyonel bağımlılıklar)."""
+    missing = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            missing.append(name)
+    return missing
+
+
+class Warmup:
+    """
+    Açılıştan sonra arka planda, sırayla çalışan hazırlık adımları (indeks, model,
+    rapor kütüphaneleri). Sunucu bu sırada istek kabul eder; /ready hepsi bitince 200 döner.
+    Adım fonksiyonu thread'de çalışır; dönüş değeri durum notu olarak saklanır,
+    False dönerse adım "skipped" sayılır. Hata veren adım "failed" olur ama
+    hazır olmayı engellemez (ilgili iş ilk istekte tekrar denenir).
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._fns: Dict[str, Callable[[], Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._started = time.perf_counter()
+        self.finished_seconds: Optional[float] = None
+
+    def add(self, name: str, fn: Callable[[], Any]):
+        self._fns[name] = fn
+        self.steps[name] = {"state": "pending", "seconds": None, "detail": None}
+
+    async def _run(self):
+        for name, fn in self._fns.items():
+            step = self.steps[name]
+            step["state"] = "running"
+            t0 = time.perf_counter()
+            try:
+                out = await asyncio.to_thread(fn)
+                step["state"] = "skipped" if out is False else "ready"
+                if out not in (None, True, False):
+                    step["detail"] = out
+            except Exception as e:
+                step["state"] = "failed"
+                step["detail"] = str(e)
+                logger.warning(f"Warm-up step '{name}' failed: {e}")
+            step["seconds"] = round(time.perf_counter() - t0, 3)
+        self.finished_seconds = round(time.perf_counter() - self._started, 3)
+        logger.info(f"Warm-up finished in {self.finished_seconds:.2f}s")
+
+    def start(self) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def done(self, name: str) -> bool:
+        """Adım bitti mi (ready/skipped/failed); tanımsız adım bitmiş sayılır."""
+        step = self.steps.get(name)
+        return step is None or step["state"] not in ("pending", "running")
+
+    @property
+    def ready(self) -> bool:
+        return all(s["state"] not in ("pending", "running") for s in self.steps.values())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "uptime_seconds": round(time.perf_counter() - self._started, 3),
+            "warmup_seconds": self.finished_seconds,
+            "steps": self.steps,
+        }
@@ -0,0 +1,151 @@
+# backend/zip_stream.py
+import io
+import json
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Zaten sıkıştırılmış formatlar tekrar deflate edilmez (CPU israfı, kazanç ~0)
+STORED_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".zip", ".xlsx", ".gz", ".br", ".npz", ".pdf"}
+
+# Dosya yolu, bellekteki bytes ya da parça parça üretilen içerik (Iterable[bytes])
+ZipSource = Union[Path, str, bytes, Iterable[bytes]]
+ZipEntry = Tuple[ZipSource, str]
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Seek edilemeyen yazma hedefi: zipfile buraya yazar, biz biriken baytları
+    parça parça dışarı veririz. tell/seek olmadığı için zipfile local header'dan
+    sonra data descriptor yazar (CRC/boyut sonradan).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._buf = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buf += b
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def _is_path(src: ZipSource) -> bool:
+    return isinstance(src, (str, Path))
+
+
+def _zinfo(src: ZipSource, arcname: str) -> zipfile.ZipInfo:
+    if _is_path(src):
+        zinfo = zipfile.ZipInfo.from_file(str(src), arcname)
+    else:
+        zinfo = zipfile.ZipInfo(arcname, date_time=datetime.now().timetuple()[:6])
+        zinfo.external_attr = 0o644 << 16
+        # üretilen içeriğin boyutu baştan bilinmez (data descriptor'a yazılır)
+        zinfo.file_size = len(src) if isinstance(src, bytes) else 0
+    suffix = Path(arcname).suffix.lower()
+    zinfo.compress_type = zipfile.ZIP_STORED if suffix in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+    return zinfo
+
+
+def iter_zip(entries: Iterable[ZipEntry], chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    """
+    (kaynak, arşiv_adı) çiftlerinden ZIP akışı üretir. Kaynak bir dosya yolu,
+    bellekteki bytes ya da bytes parçaları üreten bir iterator olabilir. Ara
+    klasör / geçici zip dosyası yoktur; bellek kullanımı ~chunk_size ile
+    sınırlıdır. Bulunamayan dosyalar atlanır.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as zf:
+        for src, arcname in entries:
+            if _is_path(src) and not Path(src).is_file():
+                continue
+            zinfo = _zinfo(src, arcname)
+            streamed = not _is_path(src) and not isinstance(src, bytes)
+            with zf.open(zinfo, mode="w", force_zip64=streamed or zinfo.file_size > 0x7FFFFFFF) as dst:
+                if isinstance(src, bytes):
+                    dst.write(src)
+                elif streamed:
+                    for chunk in src:
+                        dst.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                else:
+                    with open(src, "rb") as f:
+                        while True:
+                            chunk = f.read(chunk_size)
+                            if not chunk:
+                                break
+                            dst.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # central directory
+    data = sink.drain()
+    if data:
+        yield data
+
+
+# ---------------- Manifest (sonradan indirilecek paketler) ----------------
+
+def manifest_path_for(zip_path: Path) -> Path:
+    return zip_path.with_name(zip_path.name + ".manifest.json")
+
+
+def write_manifest(
+    zip_path: Path,
+    entries: List[Tuple[Path, str]],
+    download_name: Optional[str] = None,
+    ttl_seconds: float = 0,
+) -> Path:
+    """
+    Paket içeriğini (kaynak yolu, arşiv adı) olarak kaydeder; zip dosyası
+    diske yazılmaz, /download/<ad>.zip isteğinde iter_zip ile akıtılır.
+    download_name: kullanıcıya gösterilecek dosya adı; ttl_seconds > 0 ise
+    expires_at'ten sonra paket indirilemez (kaynakların koruması da biter).
+    """
+    now = time.time()
+    mp = manifest_path_for(zip_path)
+    mp.write_text(
+        json.dumps(
+            {
+                "entries": [[str(src), arc] for src, arc in entries],
+                "download_name": download_name or zip_path.name,
+                "created_at": now,
+                "expires_at": now + ttl_seconds if ttl_seconds > 0 else None,
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    return mp
+
+
+def read_manifest_info(zip_path: Path) -> Dict[str, Any]:
+    """Manifest'in tamamı: entries (Path, arşiv adı), download_name, expires_at."""
+    data = json.loads(manifest_path_for(zip_path).read_text(encoding="utf-8"))
+    data["entries"] = [(Path(src), arc) for src, arc in data.get("entries", [])]
+    data.setdefault("download_name", zip_path.name)
+    data.setdefault("expires_at", None)
+    return data
+
+
+def manifest_expired(info: Dict[str, Any], now: Optional[float] = None) -> bool:
+    expires_at = info.get("expires_at")
+    return expires_at is not None and (time.time() if now is None else now) > expires_at
+
+
+def read_manifest(zip_path: Path) -> List[Tuple[Path, str]]:
+    return read_manifest_info(zip_path)["entries"]